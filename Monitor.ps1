@@ -3,7 +3,9 @@
 # ==========================================
 param(
     [int]$IntervalSeconds = 30,          # 기록 주기 (초)
-    [string[]]$TargetDrives = @("C:", "D:") # 모니터링 드라이브 리스트
+    [string[]]$TargetDrives = @("C:", "D:"), # 모니터링 드라이브 리스트
+    [int]$TopN = 5,                       # 샘플당 기록할 상위 프로세스 수 (메모리/디스크 IO 각각)
+    [switch]$NoProcessRecords             # 구조화 프로세스 레코드(.procs.jsonl) 기록 끄기
 )
 $LogFolder = "C:\SystemLogs"              # 로그 저장 경로
 # ==========================================
@@ -17,6 +19,7 @@ while ($true) {
     # 0. 날짜 기반 로그 분할 및 드라이브 보정
     $CurrentDate = Get-Date -Format "yyyy-MM-dd"
     $LogPath = Join-Path $LogFolder "System_Log_$CurrentDate.csv"
+    $RecordsPath = Join-Path $LogFolder "System_Log_$CurrentDate.procs.jsonl"
     
     if ($TargetDrives.Count -eq 1) {
         # 문자열 하나로 들어왔을 때 (예: "C:,D:") 분리 처리
@@ -47,15 +50,22 @@ while ($true) {
     $osTotalMemGB = [Math]::Round(((Get-CimInstance Win32_ComputerSystem).TotalPhysicalMemory / 1GB), 2)
 
     # 4. 상위 프로세스 식별 (메모리)
-    $topMemLog = ((Get-Process | Sort-Object WorkingSet64 -Descending | Select-Object -First 5 | ForEach-Object {
+    $allProcs = Get-Process
+    $topMemProcs = $allProcs | Sort-Object WorkingSet64 -Descending | Select-Object -First $TopN
+    $topMemLog = (($topMemProcs | ForEach-Object {
                 "$($_.ProcessName):$([Math]::Round($_.WorkingSet64 / 1MB, 0))MB"
             }) -join " | ")
 
-    # 5. 상위 프로세스 식별 (디스크 IO)
-    $diskCounters = Get-Counter '\Process(*)\IO Data Bytes/sec' -ErrorAction SilentlyContinue
-    $diskSamples = $diskCounters.CounterSamples | Where-Object { $_.InstanceName -notmatch "^(_total|idle|system)$" -and $_.CookedValue -gt 10KB }
-    $topDiskLog = if ($diskSamples) {
-        ($diskSamples | Sort-Object CookedValue -Descending | Select-Object -First 5 | ForEach-Object {
+    # 5. 상위 프로세스 식별 (디스크 IO) - 'ID Process' 카운터로 인스턴스명(chrome#2)을 PID에 매핑
+    $diskCounters = Get-Counter '\Process(*)\IO Data Bytes/sec', '\Process(*)\ID Process' -ErrorAction SilentlyContinue
+    $pidByInstance = @{}
+    foreach ($sample in ($diskCounters.CounterSamples | Where-Object { $_.Path -like '*\id process' })) {
+        $pidByInstance[$sample.InstanceName] = [int]$sample.CookedValue
+    }
+    $diskSamples = $diskCounters.CounterSamples | Where-Object { $_.Path -like '*\io data bytes/sec' -and $_.InstanceName -notmatch "^(_total|idle|system)$" -and $_.CookedValue -gt 10KB }
+    $topDiskSamples = $diskSamples | Sort-Object CookedValue -Descending | Select-Object -First $TopN
+    $topDiskLog = if ($topDiskSamples) {
+        ($topDiskSamples | ForEach-Object {
             "$($_.InstanceName):$([Math]::Round($_.CookedValue / 1MB, 2))MB/s"
         }) -join " | "
     }
@@ -64,6 +74,34 @@ while ($true) {
     # 6. 데이터 기록
     $logEntry = "$timestamp,$ipAddress,$physicalMemGB,$osTotalMemGB,""$topMemLog"",""$topDiskLog"""
     Add-Content -Path $LogPath -Value $logEntry
+
+    # 6-1. 구조화 프로세스 레코드 (JSON lines, PID 단위: 메모리/디스크 IO 상위 N개의 합집합)
+    if (-not $NoProcessRecords) {
+        $ioByProcId = @{}
+        foreach ($sample in $topDiskSamples) {
+            $procId = $pidByInstance[$sample.InstanceName]
+            if ($procId) { $ioByProcId[$procId] = $sample.CookedValue / 1MB }
+        }
+        $procById = @{}
+        foreach ($p in $allProcs) { $procById[$p.Id] = $p }
+        $recordIds = @($topMemProcs | ForEach-Object { $_.Id }) + @($ioByProcId.Keys) | Select-Object -Unique
+        $recordLines = foreach ($procId in $recordIds) {
+            $p = $procById[$procId]
+            if (-not $p) { continue }
+            $ioValue = if ($ioByProcId.ContainsKey($procId)) { [Math]::Round($ioByProcId[$procId], 3) } else { 0 }
+            $cpuSeconds = if ($p.TotalProcessorTime) { [Math]::Round($p.TotalProcessorTime.TotalSeconds, 2) } else { $null }
+            [ordered]@{
+                Timestamp   = $timestamp
+                PID         = $procId
+                Process     = $p.ProcessName
+                Memory_MB   = [Math]::Round($p.WorkingSet64 / 1MB, 1)
+                DiskIO_MBps = $ioValue
+                CPU_s       = $cpuSeconds
+                Handles     = $p.HandleCount
+            } | ConvertTo-Json -Compress
+        }
+        if ($recordLines) { Add-Content -Path $RecordsPath -Value $recordLines -Encoding UTF8 }
+    }
     
     # 실시간 콘솔 출력 (간소화)
     Write-Host "[$timestamp] Process Logged. (Top Mem: $(($topMemLog -split '\|')[0]))" -ForegroundColor Green
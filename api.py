@@ -0,0 +1,392 @@
+# api.py
+"""
+Local HTTP query API over the log directory, for scripts and Grafana-style local frontends.
+
+Endpoints (GET; `start` / `end` are ISO 8601 in the logs' local wall clock, both optional):
+    /health                                  status and cache statistics
+    /files                                   manifest of the log directory
+    /columns?start=&end=                     columns (name, dtype) available in the range
+    /metrics?start=&end=&columns=            raw rows: Timestamp + requested columns (default: all metrics)
+    /rollup?start=&end=&freq=&agg=&columns=  per-bucket mean | min | max | sum | count | p95 | p99
+                                             (default freq keeps the range within 4096 buckets)
+    /top?start=&end=&kind=memory&n=10        top-N processes by peak ('memory' | 'disk' Top5 column);
+        [&freq=5min]                         with `freq`: per-bucket mean of each top process
+
+Tables come back as compact JSON ({"total", "offset", "next_offset", "columns", "data"}, rows as
+arrays, timestamps in epoch ms) or, with `format=arrow` / `Accept: application/vnd.apache.arrow.stream`,
+as an Arrow IPC stream. Every table is paged by `limit` / `offset`; X-Total-Rows / X-Next-Offset
+carry the paging state for Arrow clients. Responses over 1 KB are gzip'ed when the client accepts it.
+
+Data is read with data_loader (process_single_file + merge_file_results: same parquet caches and
+merge rules as the dashboard) from the files whose manifest span overlaps the range. The merged
+frame is cached per file signature (path, size, mtime) in its own LRU (API_FRAME_CACHE_MB; the
+most recent frame is kept even when larger, so paging through a big range loads it once), and
+rollup / top-N results per signature and parameters in the figcache LRU; a file that grows or
+changes gets a new signature, so nothing stale is served. ETags make an unchanged poll a 304. The server speaks HTTP/1.1 with
+keep-alive and listens on localhost unless --host says otherwise.
+
+Usage:
+    python api.py [--log-dir C:\\SystemLogs] [--host 127.0.0.1] [--port 8765]
+    curl "http://127.0.0.1:8765/rollup?start=2026-02-06T09:00&end=2026-02-06T18:00&freq=5min&agg=p95&columns=CPU(%)"
+"""
+import argparse
+import concurrent.futures
+import gzip
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+import pandas as pd
+
+from config import DEFAULT_LOG_DIR, API_HOST, API_PORT, API_PAGE_ROWS, API_MAX_PAGE_ROWS, API_FRAME_CACHE_MB
+from data_loader import process_single_file, merge_file_results
+from manifest import update_manifest, resolve_files
+from derived import files_signature
+from figcache import cached_chart, figure_cache_stats
+from parsers import parse_process_column
+from procmatrix import build_process_matrix, matrix_to_frame
+from correlate import choose_rollup, metric_columns
+from timeline import time_slice, time_buckets
+
+JSON_MEDIA_TYPE = 'application/json'
+ARROW_MEDIA_TYPE = 'application/vnd.apache.arrow.stream'
+ROLLUP_AGGREGATES = ('mean', 'min', 'max', 'sum', 'count', 'p95', 'p99')
+TOP_KINDS = {'memory': 'Top5_Memory_MB', 'disk': 'Top5_Disk_IO_Global(MB/s)'}
+FILE_COLUMNS = ['file', 'source', 'size', 'first_ts', 'last_ts', 'rows', 'cached']
+_PAGING_PARAMS = ('limit', 'offset', 'format')
+_GZIP_MIN_BYTES = 1024
+_IDLE_TIMEOUT_S = 30
+
+# update_manifest rewrites _manifest.json through a fixed temp path: one scan at a time
+_manifest_lock = threading.Lock()
+
+_frame_lock = threading.Lock()
+_frames = OrderedDict()  # file signature -> (merged frame, nbytes)
+
+
+def _param(params, name, default=None):
+    values = params.get(name)
+    return values[-1] if values else default
+
+
+def _time_param(params, name):
+    value = _param(params, name)
+    if value in (None, ''):
+        return None
+    try:
+        return pd.Timestamp(value)
+    except ValueError:
+        raise ValueError(f"'{name}' must be an ISO 8601 timestamp, got {value!r}")
+
+
+def _int_param(params, name, default, minimum, maximum):
+    value = _param(params, name)
+    if value in (None, ''):
+        return default
+    try:
+        value = int(value)
+    except ValueError:
+        raise ValueError(f"'{name}' must be an integer, got {value!r}")
+    return min(max(value, minimum), maximum)
+
+
+def _freq_param(params, name='freq'):
+    value = _param(params, name)
+    if value in (None, ''):
+        return None
+    try:
+        if pd.Timedelta(value) <= pd.Timedelta(0):
+            raise ValueError
+    except ValueError:
+        raise ValueError(f"'{name}' must be a positive duration such as 30s, 5min or 1h, got {value!r}")
+    return value
+
+
+def _columns_param(df, params):
+    """Requested columns (repeated and/or comma-separated `columns`), validated against `df`."""
+    names = [c.strip() for value in params.get('columns', []) for c in value.split(',') if c.strip()]
+    if not names:
+        return None
+    unknown = [c for c in names if c not in df.columns]
+    if unknown:
+        raise ValueError(f"Unknown column(s): {', '.join(unknown)}")
+    return [c for c in dict.fromkeys(names) if c != 'Timestamp']
+
+
+def range_files(log_dir, start=None, end=None):
+    """Log files (full paths) whose manifest span overlaps [start, end]; an open bound takes all."""
+    with _manifest_lock:
+        manifest_df = update_manifest(log_dir)
+    spans = manifest_df.dropna(subset=['first_ts', 'last_ts'])
+    if spans.empty:
+        return []
+    start = spans['first_ts'].min() if start is None else start
+    end = spans['last_ts'].max() if end is None else end
+    return [os.path.join(log_dir, f) for f in resolve_files(manifest_df, start, end)]
+
+
+def _load_frame(files):
+    max_workers = min(8, max(1, len(files)))
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = list(executor.map(process_single_file, files))
+    return merge_file_results(results)
+
+
+def _cached_frame(signature, files):
+    """
+    Merged frame of `files`, LRU-cached per signature within API_FRAME_CACHE_MB. Kept apart from
+    figcache so range frames do not evict dashboard figures; the most recently used frame is never
+    evicted, so paging through a range larger than the budget still loads it only once.
+    """
+    with _frame_lock:
+        entry = _frames.get(signature)
+        if entry is not None:
+            _frames.move_to_end(signature)
+            return entry[0]
+
+    df = _load_frame(files)
+    nbytes = 0 if df is None else int(df.memory_usage(index=False).sum())
+    limit = API_FRAME_CACHE_MB * 1024 ** 2
+    with _frame_lock:
+        _frames[signature] = (df, nbytes)
+        _frames.move_to_end(signature)
+        while len(_frames) > 1 and sum(n for _, n in _frames.values()) > limit:
+            _frames.popitem(last=False)
+    return df
+
+
+def frame_cache_stats():
+    with _frame_lock:
+        return {'entries': len(_frames), 'bytes': sum(n for _, n in _frames.values())}
+
+
+def range_frame(log_dir, start=None, end=None):
+    """(merged frame sliced to [start, end] or None, file signature). Cached per signature."""
+    files = range_files(log_dir, start, end)
+    signature = files_signature(files)
+    if not files:
+        return None, signature
+    df = _cached_frame(signature, files)
+    if df is None:
+        return None, signature
+    return time_slice(df, start, end), signature
+
+
+def rollup(df, freq, agg='mean', columns=None):
+    """Per-`freq`-bucket aggregate of `columns` (default: all metrics); empty buckets are omitted."""
+    if agg not in ROLLUP_AGGREGATES:
+        raise ValueError(f"'agg' must be one of {', '.join(ROLLUP_AGGREGATES)}, got {agg!r}")
+    columns = metric_columns(df) if columns is None else columns
+    non_numeric = [c for c in columns if not pd.api.types.is_numeric_dtype(df[c])]
+    if non_numeric:
+        raise ValueError(f"Cannot roll up non-numeric column(s): {', '.join(non_numeric)}")
+
+    regular = time_buckets(df, freq)
+    if regular is not None:
+        codes, starts = regular
+        values = df[columns]
+    else:
+        valid = df['Timestamp'].notna().to_numpy()
+        codes, starts = pd.factorize(df['Timestamp'].dt.floor(freq).to_numpy()[valid], sort=True)
+        values = df.loc[valid, columns]
+
+    grouped = values.groupby(codes, sort=True)
+    if agg in ('p95', 'p99'):
+        out = grouped.quantile(int(agg[1:]) / 100)
+    else:
+        out = grouped.agg(agg)
+    out.index = pd.DatetimeIndex(np.asarray(starts, dtype='datetime64[ns]')[out.index], name='Timestamp')
+    return out.reset_index()
+
+
+def top_processes(df, kind='memory', n=10, freq=None):
+    """
+    Top-`n` processes of a Top5 column by peak value (Process, Max_Value), or with `freq` the
+    per-bucket mean of each of them (Timestamp + one column per process, the rest as 'Other').
+    """
+    if kind not in TOP_KINDS:
+        raise ValueError(f"'kind' must be one of {', '.join(TOP_KINDS)}, got {kind!r}")
+    col = TOP_KINDS[kind]
+    if col not in df.columns:
+        return pd.DataFrame(columns=['Timestamp'] if freq else ['Process', 'Max_Value'])
+    if freq is None:
+        return parse_process_column(df[col]).head(n).reset_index(drop=True)
+    frame = matrix_to_frame(build_process_matrix(df, col, freq=freq), top_n=n)
+    return frame.rename_axis('Timestamp').reset_index()
+
+
+def _columns_endpoint(df, params):
+    return pd.DataFrame({'name': df.columns, 'dtype': [str(t) for t in df.dtypes]})
+
+
+def _metrics_endpoint(df, params):
+    columns = _columns_param(df, params)
+    return df[['Timestamp'] + (metric_columns(df) if columns is None else columns)]
+
+
+def _rollup_endpoint(df, params):
+    freq = _freq_param(params) or choose_rollup(df['Timestamp'].min(), df['Timestamp'].max())
+    return rollup(df, freq, _param(params, 'agg', 'mean'), _columns_param(df, params))
+
+
+def _top_endpoint(df, params):
+    n = _int_param(params, 'n', 10, 1, 1000)
+    return top_processes(df, _param(params, 'kind', 'memory'), n, _freq_param(params))
+
+
+# path -> (builder(df, params) -> DataFrame, cache the result per file signature + parameters)
+RANGE_ENDPOINTS = {
+    '/columns': (_columns_endpoint, False),
+    '/metrics': (_metrics_endpoint, False),   # a slice of the cached frame: nothing to keep
+    '/rollup': (_rollup_endpoint, True),
+    '/top': (_top_endpoint, True),
+}
+
+
+def _encode_json(page, total, offset, next_offset):
+    """Paging envelope spliced onto pandas' split-orient JSON (no re-parse of the rows)."""
+    data = page.to_json(orient='split', index=False, date_format='epoch', date_unit='ms', double_precision=6)
+    envelope = json.dumps({'total': total, 'offset': offset, 'next_offset': next_offset}, separators=(',', ':'))
+    return (envelope[:-1] + ',' + data[1:]).encode('utf-8')
+
+
+def _encode_arrow(page):
+    import pyarrow as pa
+
+    table = pa.Table.from_pandas(page, preserve_index=False)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def _table_response(frame, params, accept):
+    """(headers, body) for one page of `frame` in the requested format."""
+    limit = _int_param(params, 'limit', API_PAGE_ROWS, 1, API_MAX_PAGE_ROWS)
+    offset = _int_param(params, 'offset', 0, 0, np.iinfo(np.int64).max)
+    total = len(frame)
+    page = frame.iloc[offset:offset + limit]
+    next_offset = offset + limit if offset + limit < total else None
+
+    fmt = _param(params, 'format') or ('arrow' if ARROW_MEDIA_TYPE in accept else 'json')
+    if fmt == 'arrow':
+        content_type, body = ARROW_MEDIA_TYPE, _encode_arrow(page)
+    elif fmt == 'json':
+        content_type, body = JSON_MEDIA_TYPE, _encode_json(page, total, offset, next_offset)
+    else:
+        raise ValueError(f"'format' must be json or arrow, got {fmt!r}")
+
+    headers = {'Content-Type': content_type, 'X-Total-Rows': str(total)}
+    if next_offset is not None:
+        headers['X-Next-Offset'] = str(next_offset)
+    return headers, body
+
+
+def _json_body(obj):
+    return {'Content-Type': JSON_MEDIA_TYPE}, json.dumps(obj, default=str).encode('utf-8')
+
+
+def handle_request(log_dir, path, params, if_none_match=None, accept='', accept_encoding=''):
+    """
+    Serves one GET. Returns (status, headers, body); bad parameters answer 400 and unknown
+    paths 404 with a JSON {"error": ...} body instead of raising.
+    """
+    path = path.rstrip('/') or '/'
+    try:
+        if path == '/health':
+            status, (headers, body) = 200, _json_body({
+                'status': 'ok', 'log_dir': log_dir, 'cache': figure_cache_stats(), 'frames': frame_cache_stats(),
+            })
+        elif path == '/files':
+            with _manifest_lock:
+                manifest_df = update_manifest(log_dir)
+            status, (headers, body) = 200, _table_response(manifest_df[FILE_COLUMNS], params, accept)
+        elif path in RANGE_ENDPOINTS:
+            start, end = _time_param(params, 'start'), _time_param(params, 'end')
+            if start is not None and end is not None and start > end:
+                raise ValueError("'start' must not be after 'end'")
+            build, cache_result = RANGE_ENDPOINTS[path]
+            df, signature = range_frame(log_dir, start, end)
+            if df is None:
+                df = pd.DataFrame({'Timestamp': pd.Series(dtype='datetime64[ns]')})
+            if cache_result:
+                options = tuple(sorted((k, tuple(v)) for k, v in params.items() if k not in _PAGING_PARAMS))
+                frame = cached_chart(f'api{path}', signature, options, lambda: build(df, params))
+            else:
+                frame = build(df, params)
+            status, (headers, body) = 200, _table_response(frame, params, accept)
+        else:
+            status, (headers, body) = 404, _json_body({'error': f"Unknown endpoint {path}", 'endpoints': ['/health', '/files', *RANGE_ENDPOINTS]})
+    except ValueError as e:
+        status, (headers, body) = 400, _json_body({'error': str(e)})
+    except FileNotFoundError:
+        status, (headers, body) = 503, _json_body({'error': f"Log directory not found: {log_dir}"})
+
+    if status == 200:
+        etag = '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+        headers['ETag'] = etag
+        headers['Cache-Control'] = 'no-cache'  # revalidate: a growing log changes the answer
+        if if_none_match == etag:
+            return 304, {'ETag': etag, 'Cache-Control': 'no-cache'}, b''
+    if len(body) >= _GZIP_MIN_BYTES and 'gzip' in accept_encoding:
+        body = gzip.compress(body, compresslevel=5)
+        headers['Content-Encoding'] = 'gzip'
+    headers['Vary'] = 'Accept, Accept-Encoding'
+    headers['Content-Length'] = str(len(body))
+    return status, headers, body
+
+
+class _Handler(BaseHTTPRequestHandler):
+    # HTTP/1.1: connections stay open between requests (every response has a Content-Length)
+    protocol_version = 'HTTP/1.1'
+    server_version = 'SystemResourceMonitorAPI/1'
+    timeout = _IDLE_TIMEOUT_S  # idle keep-alive connections are closed after this
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        try:
+            status, headers, body = handle_request(
+                self.server.log_dir, url.path, parse_qs(url.query),
+                if_none_match=self.headers.get('If-None-Match'),
+                accept=self.headers.get('Accept', ''),
+                accept_encoding=self.headers.get('Accept-Encoding', ''),
+            )
+        except Exception as e:
+            status, headers, body = 500, *_json_body({'error': f"{type(e).__name__}: {e}"})
+            headers['Content-Length'] = str(len(body))
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def serve(log_dir=DEFAULT_LOG_DIR, host=API_HOST, port=API_PORT):
+    server = ThreadingHTTPServer((host, port), _Handler)
+    server.daemon_threads = True
+    server.log_dir = log_dir
+    print(f"Serving {log_dir} at http://{host}:{port}/ (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local HTTP API serving metrics, rollups and process top-N from the log directory")
+    parser.add_argument('--log-dir', default=DEFAULT_LOG_DIR)
+    parser.add_argument('--host', default=API_HOST, help="Bind address (default: localhost only)")
+    parser.add_argument('--port', type=int, default=API_PORT)
+    args = parser.parse_args(argv)
+    serve(args.log_dir, args.host, args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -7,13 +7,23 @@ from pathlib import Path
 import webbrowser
 import pandas as pd
 from datetime import datetime, timedelta
-from config import DEFAULT_LOG_DIR
-from data_loader import load_data
+from config import DEFAULT_LOG_DIR, UPLOAD_CACHE_DIR, ARCHIVE_AFTER_DAYS, DOWNSAMPLE_AFTER_DAYS, DOWNSAMPLE_INTERVAL, RETENTION_DAYS
+from data_loader import load_data, load_histograms, load_process_records
 from parsers import parse_process_column, extract_process_time_series
 from dashboards.cpu import render_cpu_dashboard
 from dashboards.memory import render_memory_dashboard
 from dashboards.storage import render_storage_dashboard
 from dashboards.custom import render_custom_dashboard
+from dashboards.episodes import render_episodes_dashboard
+from dashboards.fleet import render_fleet_dashboard
+from fleet import discover_hosts, load_fleet_rollups, fleet_signature
+from manifest import update_manifest, resolve_files, describe_entry
+from timeline import display_segments, segments_to_frame, time_slice
+from archive import compact_logs, apply_retention
+from uploads import mark_used, prune_uploads, spool_uploads
+from timeparse import FAILURES_ATTR
+from derived import set_scope, memoize, memo_stats
+from figcache import figure_cache_stats
 
 # ==========================================
 # 1. 설정 및 데이터 로딩
@@ -76,32 +86,119 @@ with st.sidebar:
     st.divider()
     st.header("📂 Log File Selection")
     
-    # 1. 기본 경로 탐색
-    log_files = []
-    if os.path.exists(DEFAULT_LOG_DIR):
-        log_files = [f for f in os.listdir(DEFAULT_LOG_DIR) if f.endswith('.csv')]
-        log_files.sort(reverse=True) # 최신순 정렬
-    
-    uploaded_files = st.file_uploader("Upload Log CSV(s)", type=['csv'], accept_multiple_files=True)
-    selected_files = st.multiselect(f"Select from {DEFAULT_LOG_DIR}", log_files)
-
     # 데이터 로드
     df = None
     target_files = []
-    
-    if uploaded_files:
-        target_files.extend(uploaded_files)
-    
-    if selected_files:
-        target_files.extend([os.path.join(DEFAULT_LOG_DIR, f) for f in selected_files])
-        
+    fleet_rollups = None
+
+    fleet_mode = st.toggle("🌐 Fleet Mode (Multi-Host)", help="Compare many workstations: one sub-folder per host under the fleet root.")
+
+    if fleet_mode:
+        # 호스트별 하위 폴더 단위로 로드 (호스트 간 타임라인 혼합 방지)
+        fleet_root = st.text_input("Fleet Root Folder", value=os.path.join(DEFAULT_LOG_DIR, "Fleet"))
+        hosts = discover_hosts(fleet_root)
+        fleet_rollups = load_fleet_rollups(fleet_root, fleet_signature(fleet_root))
+        st.caption(f"{len(hosts)} host(s) found")
+
+        drill_host = st.selectbox("Drill into Host", ["(Fleet Overview)"] + list(hosts))
+        if drill_host in hosts:
+            target_files.extend(hosts[drill_host])
+    else:
+        # 0. 보관 정책: 오래된 로그를 월별 zstd Parquet 아카이브로 압축 (archive.py)
+        if os.path.exists(DEFAULT_LOG_DIR):
+            with st.expander("🗜 Archive & Retention"):
+                st.caption(
+                    f"Archive logs idle > {ARCHIVE_AFTER_DAYS}d · 1s → {DOWNSAMPLE_INTERVAL} after {DOWNSAMPLE_AFTER_DAYS}d · "
+                    f"delete after {RETENTION_DAYS}d (config.py)"
+                )
+                if st.button("Compact Old Logs"):
+                    with st.spinner("Compacting..."):
+                        summary = compact_logs(DEFAULT_LOG_DIR)
+                        deleted = apply_retention(DEFAULT_LOG_DIR)
+                    if summary.empty and not deleted:
+                        st.info("Nothing to archive.")
+                    else:
+                        st.dataframe(summary, hide_index=True, width='stretch')
+                        if deleted:
+                            st.caption(f"Deleted {len(deleted)} expired file(s)")
+
+        # 1. 기본 경로 탐색 (manifest: 변경된 파일만 재스캔, 시작 시각 기준 최신순)
+        manifest_df = update_manifest(DEFAULT_LOG_DIR) if os.path.exists(DEFAULT_LOG_DIR) else None
+
+        uploaded_files = st.file_uploader("Upload Log CSV(s)", type=['csv'], accept_multiple_files=True)
+
+        selected_files = []
+        if manifest_df is not None and not manifest_df.empty:
+            pick_mode = st.radio("Pick Logs By", ["File", "Date Range"], horizontal=True)
+            if pick_mode == "Date Range":
+                spans = manifest_df.dropna(subset=['first_ts', 'last_ts'])
+                if not spans.empty:
+                    min_day, max_day = spans['first_ts'].min().date(), spans['last_ts'].max().date()
+                    date_range = st.date_input("Date Range", value=(max_day, max_day), min_value=min_day, max_value=max_day)
+                    if len(date_range) == 2:
+                        range_start = pd.Timestamp(date_range[0])
+                        range_end = pd.Timestamp(date_range[1]) + pd.Timedelta(days=1)
+                        selected_files = resolve_files(manifest_df, range_start, range_end)
+                        st.caption(f"{len(selected_files)} file(s) cover this range")
+            else:
+                file_labels = {entry['file']: describe_entry(entry) for entry in manifest_df.to_dict('records')}
+                selected_files = st.multiselect(f"Select from {DEFAULT_LOG_DIR}", list(file_labels), format_func=file_labels.get)
+
+        if uploaded_files:
+            # Spooled to content-addressed local files: parquet cache + manifest like any local log
+            target_files.extend(spool_uploads(uploaded_files))
+
+        # 업로드 보관 폴더 정리 (세션 시작 시 1회: 오래 안 쓴 업로드 삭제 + 용량 상한)
+        if 'uploads_pruned' not in st.session_state:
+            st.session_state['uploads_pruned'] = True
+            prune_uploads(keep=target_files)
+
+        upload_manifest = update_manifest(UPLOAD_CACHE_DIR) if os.path.isdir(UPLOAD_CACHE_DIR) else None
+        if upload_manifest is not None and not upload_manifest.empty:
+            spooled = {os.path.basename(f) for f in target_files if isinstance(f, str)}
+            upload_labels = {
+                entry['file']: describe_entry(entry)
+                for entry in upload_manifest.to_dict('records') if entry['file'] not in spooled
+            }
+            if upload_labels:
+                previous = st.multiselect("Previous Uploads", list(upload_labels), format_func=upload_labels.get)
+                previous_paths = [os.path.join(UPLOAD_CACHE_DIR, f) for f in previous]
+                mark_used(previous_paths)
+                target_files.extend(previous_paths)
+
+        if selected_files:
+            target_files.extend([os.path.join(DEFAULT_LOG_DIR, f) for f in selected_files])
+
+    hist = None
+    records = None
     if target_files:
         df = load_data(target_files)
+        hist = load_histograms(target_files)
+        # PID 단위 구조화 프로세스 레코드(*.procs.jsonl)가 있으면 Top5 문자열 대신 사용
+        records = load_process_records(target_files)
     
     if df is not None:
         st.success(f"Loaded: {len(df)} rows")
+        ts_failures = df.attrs.get(FAILURES_ATTR) or ()
+        if ts_failures:
+            st.warning(f"⚠️ {sum(r[2] for r in ts_failures):,} row(s) with unreadable timestamps were skipped")
+            with st.expander("Timestamp parse failures"):
+                st.dataframe(
+                    pd.DataFrame(
+                        [(name, fmt, failed, rows, ' | '.join(examples)) for name, fmt, failed, rows, examples in ts_failures],
+                        columns=['File', 'Format', 'Failed', 'Rows', 'Examples'],
+                    ),
+                    hide_index=True, width='stretch',
+                )
+        if 'IP_Address' in df.columns and df['IP_Address'].nunique() > 1:
+            st.warning("⚠️ Logs from multiple hosts (IP_Address) are mixed into one timeline. Use Fleet Mode to compare hosts.")
+        segments = display_segments(df)
+        if segments is not None and len(segments) > 1:
+            with st.expander(f"⏱ Timeline: {len(segments)} regular segments ({len(segments) - 1} gaps)"):
+                st.dataframe(segments_to_frame(segments), hide_index=True, width='stretch')
         # 시간 필터링 (데이터가 1개 이상일 때만 슬라이더 표시)
         min_time, max_time = df['Timestamp'].min(), df['Timestamp'].max()
+        time_range = None
         
         if min_time < max_time:
             time_range = st.slider(
@@ -111,9 +208,13 @@ with st.sidebar:
                 value=(min_time.to_pydatetime(), max_time.to_pydatetime())
             )
             # 데이터 필터링 적용
-            df = df[(df['Timestamp'] >= pd.to_datetime(time_range[0])) & (df['Timestamp'] <= pd.to_datetime(time_range[1]))]
+            df = time_slice(df, time_range[0], time_range[1])
+            if records is not None:
+                records = time_slice(records, time_range[0], time_range[1])
         else:
             st.info("💡 Only one data point available, time filtering skipped.")
+        # 파생 데이터(KPI, 프로세스 시계열 등)는 (로드 파일, 시간 구간) 단위로 세션에 보관
+        set_scope(st, target_files, time_range)
             
         st.divider()
         if st.button("📖 웹 매뉴얼 열기 (MkDocs)", width='stretch'):
@@ -137,7 +238,7 @@ with st.sidebar:
         st.divider()
         st.markdown("### 💾 Export Data")
         if df is not None:
-             csv_data = df.to_csv(index=False).encode('utf-8-sig')
+             csv_data = memoize(st, 'export_csv', lambda: df.to_csv(index=False).encode('utf-8-sig'))
              st.download_button(
                  label="Download Merged CSV",
                  data=csv_data,
@@ -151,12 +252,8 @@ with st.sidebar:
 # 2. 메인 대시보드 UI
 # ==========================================
 
-if df is not None:
-    # ---------------------------------------------------------
-    # (A) 상단 요약 카드 (Executive Summary)
-    # ---------------------------------------------------------
-    st.markdown("---")
-    
+def _compute_kpis(df):
+    """상단 요약 카드 값 (세션 메모이제이션 대상: 체크박스 등 위젯 변경 시 재계산하지 않음)"""
     # CSV에서 메모리 정보 가져오기
     # Ensure values are float before formatting
     try:
@@ -172,14 +269,6 @@ if df is not None:
     except:
         physical_mem_gb = "N/A"
         os_total_mem_gb = "N/A"
-    
-    st.markdown(f"#### 🖥️ 시스템 사양 정보")
-    st.write(f"- **물리 장착 메모리**: {physical_mem_gb} GB")
-    st.write(f"- **OS 사용 가능 메모리**: {os_total_mem_gb} GB")
-    st.write("※ 실제 사용 가능 메모리 %로 계산하였습니다.")
-    
-    total_mem_gb = os_total_mem_gb
-    st.markdown("---")
 
     max_mem_gb = f"{df['Used(GB)'].max():.2f}" if 'Used(GB)' in df.columns else "0.00"
     max_mem_pct = f"{df['Usage(%)'].max():.2f}" if 'Usage(%)' in df.columns else "0.00"
@@ -212,6 +301,36 @@ if df is not None:
             top_offender = top_proc_df.iloc[0]['Process']
             top_offender_val = top_proc_df.iloc[0]['Max_Value'] / 1024 # MB -> GB 변환
 
+    return {
+        'physical_mem_gb': physical_mem_gb,
+        'os_total_mem_gb': os_total_mem_gb,
+        'max_mem_gb': max_mem_gb,
+        'max_mem_pct': max_mem_pct,
+        'trend_str': trend_str,
+        'top_offender': top_offender,
+        'top_offender_val': top_offender_val,
+    }
+
+
+if df is not None:
+    # ---------------------------------------------------------
+    # (A) 상단 요약 카드 (Executive Summary)
+    # ---------------------------------------------------------
+    st.markdown("---")
+    
+    kpis = memoize(st, 'kpis', lambda: _compute_kpis(df))
+    physical_mem_gb, os_total_mem_gb = kpis['physical_mem_gb'], kpis['os_total_mem_gb']
+    max_mem_gb, max_mem_pct, trend_str = kpis['max_mem_gb'], kpis['max_mem_pct'], kpis['trend_str']
+    top_offender, top_offender_val = kpis['top_offender'], kpis['top_offender_val']
+
+    st.markdown(f"#### 🖥️ 시스템 사양 정보")
+    st.write(f"- **물리 장착 메모리**: {physical_mem_gb} GB")
+    st.write(f"- **OS 사용 가능 메모리**: {os_total_mem_gb} GB")
+    st.write("※ 실제 사용 가능 메모리 %로 계산하였습니다.")
+    
+    total_mem_gb = os_total_mem_gb
+    st.markdown("---")
+
     kpi1, kpi2, kpi3 = st.columns(3)
     kpi1.metric(
         label="📈 Peak Memory Usage",
@@ -233,17 +352,37 @@ if df is not None:
     st.markdown("---")
 
     # 탭 메뉴 구성
-    tab_list = ["📊 CPU Dashboard", "🧠 Memory Dashboard", "💾 Storage (D:)", "📈 Custom Graph"]
+    tab_list = ["📊 CPU Dashboard", "🧠 Memory Dashboard", "💾 Storage (D:)", "📈 Custom Graph", "⏱ Episodes"]
     menu = st.selectbox("Select Dashboard View", tab_list)
 
     if menu == "📊 CPU Dashboard":
-        render_cpu_dashboard(st, df)
+        render_cpu_dashboard(st, df, hist)
     elif menu == "🧠 Memory Dashboard":
-        render_memory_dashboard(st, df, parse_process_column, extract_process_time_series, total_mem_gb)
+        render_memory_dashboard(st, df, parse_process_column, extract_process_time_series, total_mem_gb, records=records)
     elif menu == "💾 Storage (D:)":
-        render_storage_dashboard(st, df, parse_process_column)
+        render_storage_dashboard(st, df, parse_process_column, records=records)
     elif menu == "📈 Custom Graph":
-        render_custom_dashboard(st, df, parse_process_column)
+        render_custom_dashboard(st, df, parse_process_column, files=target_files, records=records)
+    elif menu == "⏱ Episodes":
+        render_episodes_dashboard(st, df)
+
+elif fleet_rollups is not None:
+    render_fleet_dashboard(st, fleet_rollups)
 
 else:
     st.info(f"👈 Please upload a log file or ensure files exist in {DEFAULT_LOG_DIR}")
+
+# 캐시 적중률 (렌더 후 집계: 이번 실행의 조회 포함)
+with st.sidebar:
+    with st.expander("⚡ Cache Stats"):
+        memo = memo_stats(st)
+        figs = figure_cache_stats()
+        fig_lookups = figs['hits'] + figs['misses']
+        st.caption(
+            f"Derived data: {memo['hit_rate']:.0%} hit ({memo['hits']:,}/{memo['hits'] + memo['misses']:,}), "
+            f"{memo['entries']} entries, {memo['invalidations']} invalidation(s)"
+        )
+        st.caption(
+            f"Figures: {figs['hits'] / fig_lookups if fig_lookups else 0:.0%} hit ({figs['hits']:,}/{fig_lookups:,}), "
+            f"{figs['entries']} entries, {figs['bytes'] / 1024 ** 2:.1f} MB"
+        )
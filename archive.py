@@ -0,0 +1,308 @@
+# archive.py
+"""
+Archival compaction and retention for the log directory.
+
+Closed logs (CSV / .pcmb older than ARCHIVE_AFTER_DAYS) are rolled into one zstd parquet
+archive per source and month, e.g. Global_Usage_2026-02.archive.parquet and
+System_Log_2026-02.archive.parquet, sorted by Timestamp. Logman rows older than
+DOWNSAMPLE_AFTER_DAYS are averaged to DOWNSAMPLE_INTERVAL; the hourly percentile histograms are
+built from the full-resolution rows first and kept next to the archive, so p95/p99 stay exact.
+Structured process records (.procs.jsonl, procrecords.py) go to a monthly
+System_Log_2026-02.archive.procs.parquet the same way.
+The source files and their .parquet / .hist.parquet / .procs.* sidecars are then deleted.
+
+process_single_file reads archives like any other log, so the picker, fleet mode and SQL views
+need no special handling.
+
+Usage:
+    python archive.py [--log-dir C:\\SystemLogs] [--dry-run]
+"""
+import argparse
+import json
+import os
+import time
+
+import pandas as pd
+
+from config import (
+    DEFAULT_LOG_DIR, ARCHIVE_AFTER_DAYS, DOWNSAMPLE_AFTER_DAYS, DOWNSAMPLE_INTERVAL, RETENTION_DAYS,
+)
+from binlog import BINLOG_EXTENSION, drop_converted_csvs
+
+ARCHIVE_SUFFIX = '.archive.parquet'
+ARCHIVE_COMPRESSION = 'zstd'
+_SOURCE_PREFIX = {'logman': 'Global_Usage', 'process': 'System_Log'}
+_SIDECAR_SUFFIXES = ('.parquet', '.hist.parquet', '.procs.jsonl', '.procs.parquet')
+_ARCHIVED_FILES_KEY = b'pcm_archived_files'
+
+
+def _source_type(fname):
+    return 'logman' if "Global_Usage" in fname else 'process'
+
+
+def archive_path(log_dir, source, month):
+    """Archive file for a source ('logman' / 'process') and a month Period."""
+    return os.path.join(log_dir, f"{_SOURCE_PREFIX[source]}_{month.strftime('%Y-%m')}{ARCHIVE_SUFFIX}")
+
+
+def find_closed_logs(log_dir, archive_after_days=ARCHIVE_AFTER_DAYS, now=None):
+    """
+    Raw logs (CSV / .pcmb) not modified for `archive_after_days`; a live log is never closed.
+    A CSV converted to a binary log is skipped (it is removed together with the .pcmb).
+    """
+    if archive_after_days is None:
+        return []
+    cutoff = (now or time.time()) - archive_after_days * 86400
+    logs = sorted(entry.path for entry in os.scandir(log_dir)
+                  if entry.is_file() and entry.name.endswith(('.csv', BINLOG_EXTENSION)))
+    return [p for p in drop_converted_csvs(logs) if os.path.getmtime(p) < cutoff]
+
+
+def _downsample(df, cutoff, interval):
+    """Averages numeric rows older than `cutoff` into `interval` buckets; newer rows are kept as-is."""
+    old = df['Timestamp'] < cutoff
+    if not old.any():
+        return df
+    numeric = [c for c in df.columns if c != 'Timestamp' and pd.api.types.is_numeric_dtype(df[c])]
+    averaged = (
+        df.loc[old, ['Timestamp'] + numeric]
+        .set_index('Timestamp')
+        .resample(interval)
+        .mean()
+        .dropna(how='all')
+        .reset_index()
+    )
+    return pd.concat([averaged, df.loc[~old]], ignore_index=True)
+
+
+def _archived_files(path):
+    """Source file names already rolled into an archive (or its histogram sidecar)."""
+    import pyarrow.parquet as pq
+
+    if not os.path.exists(path):
+        return []
+    return json.loads((pq.read_schema(path).metadata or {}).get(_ARCHIVED_FILES_KEY, b'[]'))
+
+
+def _write_archive(df, path, source, archived, failures=()):
+    """
+    Sorted, zstd parquet via a temp file; logman runs whose timestamps an exact segment table
+    reproduces keep only the table.
+    `archived` (source file names) and `failures` (timestamp parse summaries of those files, whose
+    unreadable rows are not in the archive) are stored in the metadata.
+    """
+    from data_loader import _sort_by_time
+    from timeline import attach_segments, write_parquet
+    from timeparse import FAILURES_ATTR, REPORT_ATTR, failures_metadata
+
+    df = _sort_by_time(df)
+    # pandas would store a source file's report as attrs of the whole archive
+    df.attrs.pop(REPORT_ATTR, None)
+    df.attrs.pop(FAILURES_ATTR, None)
+    if source == 'logman':
+        attach_segments(df)
+    tmp_path = path + '.tmp'
+    write_parquet(df, tmp_path, compression=ARCHIVE_COMPRESSION,
+                  metadata={_ARCHIVED_FILES_KEY: json.dumps(sorted(archived)).encode('utf-8'),
+                            **failures_metadata(failures)})
+    os.replace(tmp_path, path)
+
+
+def _write_archive_histograms(path, month, hist_by_file):
+    """
+    Adds the month's buckets of each source file's histogram to the archive's sidecar.
+    Contributing file names are kept in the parquet metadata so a repeated run never counts twice.
+    """
+    from data_loader import _hist_path
+    from sketches import merge_histograms
+    from timeline import write_parquet
+
+    hist_path = _hist_path(path)
+    archived = _archived_files(hist_path)
+    frames = [pd.read_parquet(hist_path)] if os.path.exists(hist_path) else []
+
+    for name, hist in hist_by_file.items():
+        if name in archived or hist is None or hist.empty:
+            continue
+        month_hist = hist[hist['Bucket'].dt.to_period('M') == month]
+        if not month_hist.empty:
+            frames.append(month_hist)
+            archived.append(name)
+
+    write_parquet(merge_histograms(frames), hist_path + '.tmp', compression=ARCHIVE_COMPRESSION,
+                  metadata={_ARCHIVED_FILES_KEY: json.dumps(sorted(archived)).encode('utf-8')})
+    os.replace(hist_path + '.tmp', hist_path)
+
+
+def archive_records_path(path):
+    """Process-records sidecar of an archive: X.archive.parquet -> X.archive.procs.parquet."""
+    return path[:-len('.parquet')] + '.procs.parquet'
+
+
+def _write_archive_records(path, month, records_by_file):
+    """Adds the month's process records of each source file to the archive's records sidecar."""
+    from data_loader import _sort_by_time
+    from timeline import write_parquet
+
+    records_path = archive_records_path(path)
+    archived = _archived_files(records_path)
+    frames = [pd.read_parquet(records_path)] if os.path.exists(records_path) else []
+
+    for name, records in records_by_file.items():
+        if name in archived or records is None or records.empty:
+            continue
+        month_records = records[records['Timestamp'].dt.to_period('M') == month]
+        if not month_records.empty:
+            frames.append(month_records)
+            archived.append(name)
+    if not frames:
+        return
+
+    merged = _sort_by_time(pd.concat(frames, ignore_index=True))
+    merged['Process'] = merged['Process'].astype('category')
+    write_parquet(merged, records_path + '.tmp', compression=ARCHIVE_COMPRESSION,
+                  metadata={_ARCHIVED_FILES_KEY: json.dumps(sorted(archived)).encode('utf-8')})
+    os.replace(records_path + '.tmp', records_path)
+
+
+def _remove_log(path):
+    stem = os.path.splitext(path)[0]
+    # A binary log's source CSV (convert_csv_to_binlog) holds the same samples
+    converted = [stem + '.csv'] if path.endswith(BINLOG_EXTENSION) else []
+    for p in [path] + converted + [stem + suffix for suffix in _SIDECAR_SUFFIXES]:
+        if os.path.exists(p):
+            os.remove(p)
+
+
+def compact_logs(log_dir=DEFAULT_LOG_DIR, archive_after_days=ARCHIVE_AFTER_DAYS,
+                 downsample_after_days=DOWNSAMPLE_AFTER_DAYS, downsample_interval=DOWNSAMPLE_INTERVAL,
+                 dry_run=False, now=None):
+    """
+    Rolls closed logs into monthly archives. Returns one summary row per archive written:
+    Archive, Source, Files, Rows, Input(MB), Archive(MB).
+    Archives are written before any source file is deleted and record which files they already
+    hold, so an interrupted run can simply be repeated. Only the new rows are downsampled; rows
+    already in an archive were averaged when they went in. A file's timestamp parse report goes to
+    the archive of its first month, so the rows dropped for unreadable timestamps stay reported.
+    """
+    from data_loader import process_single_file, _load_file_histograms, _load_file_records
+    from timeline import read_parquet
+    from timeparse import REPORT_ATTR, read_failures_metadata
+
+    now = now or time.time()
+    # Logs are written in local wall-clock time
+    downsample_cutoff = (
+        pd.Timestamp.fromtimestamp(now - downsample_after_days * 86400)
+        if downsample_after_days is not None else None
+    )
+
+    by_source = {'logman': [], 'process': []}
+    for path in find_closed_logs(log_dir, archive_after_days, now):
+        by_source[_source_type(os.path.basename(path))].append(path)
+
+    summary = []
+    for source, paths in by_source.items():
+        if not paths:
+            continue
+        results = [process_single_file(p) for p in paths]
+        loaded = [(p, res[1]) for p, res in zip(paths, results) if res is not None and not res[1].empty]
+        if not loaded:
+            continue
+        rows = pd.concat(
+            [df.dropna(subset=['Timestamp']).assign(_file=os.path.basename(p)) for p, df in loaded],
+            ignore_index=True,
+        )
+        hist_by_file = {os.path.basename(p): _load_file_histograms(p) for p, _ in loaded} if source == 'logman' else {}
+        records_by_file = {os.path.basename(p): _load_file_records(p) for p, _ in loaded} if source == 'process' else {}
+        months = rows['Timestamp'].dt.to_period('M')
+        reports = {os.path.basename(p): df.attrs.get(REPORT_ATTR) for p, df in loaded}
+        first_months = months.groupby(rows['_file']).min()
+
+        for month in months.unique():
+            target = archive_path(log_dir, source, month)
+            archived = _archived_files(target)
+            month_rows = rows[(months == month) & ~rows['_file'].isin(archived)]
+            month_files = {p for p, df in loaded if (df['Timestamp'].dt.to_period('M') == month).any()}
+            summary.append({
+                'Archive': os.path.basename(target),
+                'Source': source,
+                'Files': len(month_files),
+                'Rows': len(month_rows),
+                'Input(MB)': sum(os.path.getsize(p) for p in month_files) / 1024 ** 2,
+                'Archive(MB)': None,
+            })
+            if dry_run:
+                continue
+
+            if not month_rows.empty:
+                new_files = set(month_rows['_file'])
+                new_rows = month_rows.drop(columns=['_file'])
+                if source == 'logman' and downsample_cutoff is not None:
+                    new_rows = _downsample(new_rows, downsample_cutoff, downsample_interval)
+                existing = read_parquet(target) if os.path.exists(target) else None
+                failures = (read_failures_metadata(target) if existing is not None else ()) + tuple(
+                    reports[name] for name in sorted(new_files)
+                    if reports[name] and first_months[name] == month
+                )
+                merged = pd.concat([existing, new_rows], ignore_index=True)
+                _write_archive(merged, target, source, set(archived) | new_files, failures)
+            if hist_by_file:
+                _write_archive_histograms(target, month, hist_by_file)
+            if any(r is not None for r in records_by_file.values()):
+                _write_archive_records(target, month, records_by_file)
+            summary[-1]['Archive(MB)'] = os.path.getsize(target) / 1024 ** 2
+
+        if not dry_run:
+            for p, _ in loaded:
+                _remove_log(p)
+
+    return pd.DataFrame(summary, columns=['Archive', 'Source', 'Files', 'Rows', 'Input(MB)', 'Archive(MB)'])
+
+
+def apply_retention(log_dir=DEFAULT_LOG_DIR, retention_days=RETENTION_DAYS, dry_run=False, now=None):
+    """
+    Deletes archives whose month ended more than `retention_days` ago, and raw logs not modified
+    for that long (with their sidecars). Returns the deleted file names.
+    """
+    if retention_days is None:
+        return []
+    now = now or time.time()
+    cutoff = pd.Timestamp.fromtimestamp(now - retention_days * 86400)
+    deleted = []
+    for entry in os.scandir(log_dir):
+        if not entry.is_file():
+            continue
+        if entry.name.endswith(ARCHIVE_SUFFIX):
+            month = entry.name[:-len(ARCHIVE_SUFFIX)].rsplit('_', 1)[-1]
+            try:
+                expired = (pd.Period(month, freq='M').end_time < cutoff)
+            except ValueError:
+                continue
+        elif entry.name.endswith(('.csv', BINLOG_EXTENSION)):
+            expired = entry.stat().st_mtime < now - retention_days * 86400
+        else:
+            continue
+        if expired:
+            deleted.append(entry.name)
+            if not dry_run:
+                _remove_log(entry.path)
+    return sorted(deleted)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compact closed logs into monthly parquet archives and apply retention")
+    parser.add_argument('--log-dir', default=DEFAULT_LOG_DIR)
+    parser.add_argument('--dry-run', action='store_true', help="Only report what would be archived / deleted")
+    args = parser.parse_args(argv)
+
+    summary = compact_logs(args.log_dir, dry_run=args.dry_run)
+    if summary.empty:
+        print("Nothing to archive.")
+    else:
+        print(summary.to_string(index=False))
+    for name in apply_retention(args.log_dir, dry_run=args.dry_run):
+        print(f"{'Would delete' if args.dry_run else 'Deleted'}: {name}")
+
+
+if __name__ == "__main__":
+    main()
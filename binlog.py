@@ -0,0 +1,145 @@
+# binlog.py
+"""
+Fixed-record binary sample log (*.pcmb).
+
+Layout:
+    8 bytes   magic  b'PCMBIN01'
+    4 bytes   little-endian uint32 header length N
+    N bytes   UTF-8 JSON header {"version", "source", "columns"} padded with spaces to 8-byte alignment
+    records   packed: int64 Timestamp (ns, local wall clock) + float32 per column
+
+Appends are a single write of packed bytes; reads are a numpy.memmap over the record area.
+"""
+import json
+import os
+import struct
+
+import numpy as np
+import pandas as pd
+
+BINLOG_EXTENSION = '.pcmb'
+MAGIC = b'PCMBIN01'
+VERSION = 1
+_PREFIX = struct.Struct('<8sI')
+
+
+def drop_converted_csvs(paths):
+    """
+    Drops each CSV that has a binary log with the same stem next to it: convert_csv_to_binlog
+    leaves the source CSV in place, and both hold the same samples. Order is kept.
+    """
+    binary_stems = {os.path.splitext(p)[0] for p in paths if p.endswith(BINLOG_EXTENSION)}
+    return [p for p in paths if not (p.endswith('.csv') and os.path.splitext(p)[0] in binary_stems)]
+
+
+def record_dtype(columns):
+    return np.dtype([('Timestamp', '<i8')] + [(c, '<f4') for c in columns])
+
+
+def _encode_header(columns, source):
+    payload = json.dumps({'version': VERSION, 'source': source, 'columns': list(columns)}).encode('utf-8')
+    pad = (-(_PREFIX.size + len(payload))) % 8
+    payload += b' ' * pad
+    return _PREFIX.pack(MAGIC, len(payload)) + payload
+
+
+def read_binlog_header(path):
+    """Returns (header dict, data offset in bytes)."""
+    with open(path, 'rb') as fh:
+        magic, length = _PREFIX.unpack(fh.read(_PREFIX.size))
+        if magic != MAGIC:
+            raise ValueError(f"Not a binary sample log: {path}")
+        header = json.loads(fh.read(length).decode('utf-8'))
+    return header, _PREFIX.size + length
+
+
+def open_binlog_for_append(path, columns, source='logman'):
+    """
+    Opens (creating if needed) a binary log for appending. Returns (file handle, record dtype).
+    An existing file must have the same column schema.
+    """
+    if os.path.exists(path) and os.path.getsize(path) > 0:
+        header, offset = read_binlog_header(path)
+        if header['columns'] != list(columns):
+            raise ValueError(f"Column schema mismatch for {path}")
+        dtype = record_dtype(columns)
+        fh = open(path, 'r+b')
+        # Drop a trailing partial record left by an interrupted writer
+        n_records = (os.path.getsize(path) - offset) // dtype.itemsize
+        fh.truncate(offset + n_records * dtype.itemsize)
+        fh.seek(0, os.SEEK_END)
+        return fh, dtype
+
+    fh = open(path, 'wb')
+    fh.write(_encode_header(columns, source))
+    fh.flush()
+    return fh, record_dtype(columns)
+
+
+def append_records(fh, dtype, timestamps, values):
+    """
+    Appends rows. `timestamps` is datetime64-like (n,), `values` is a (n, n_columns) array.
+    """
+    timestamps = np.asarray(timestamps, dtype='datetime64[ns]').reshape(-1)
+    values = np.asarray(values, dtype='<f4').reshape(len(timestamps), -1)
+    records = np.empty(len(timestamps), dtype=dtype)
+    records['Timestamp'] = timestamps.view('i8')
+    for i, name in enumerate(dtype.names[1:]):
+        records[name] = values[:, i]
+    fh.write(records.tobytes())
+    fh.flush()
+
+
+def read_binlog_array(path):
+    """Zero-copy structured view of all complete records (numpy.memmap, read-only)."""
+    header, offset = read_binlog_header(path)
+    dtype = record_dtype(header['columns'])
+    n_records = (os.path.getsize(path) - offset) // dtype.itemsize
+    if n_records == 0:
+        return header, np.empty(0, dtype=dtype)
+    return header, np.memmap(path, dtype=dtype, mode='r', offset=offset, shape=(n_records,))
+
+
+def read_binlog(path):
+    """Loads a binary log as a DataFrame with the same columns process_single_file produces."""
+    header, records = read_binlog_array(path)
+    data = {'Timestamp': records['Timestamp'].view('datetime64[ns]')}
+    for col in header['columns']:
+        data[col] = records[col]
+    return header, pd.DataFrame(data, copy=False)
+
+
+def convert_csv_to_binlog(csv_path, out_path=None):
+    """
+    Converts a Logman CSV into a binary log next to it (Global_Usage_*.csv -> Global_Usage_*.pcmb).
+    Only numeric columns are stored; process logs (Top5 strings) are not convertible and return None.
+    """
+    from data_loader import process_single_file
+
+    res = process_single_file(csv_path)
+    if res is None or res[0] != 'logman':
+        return None
+
+    df = res[1].dropna(subset=['Timestamp'])
+    columns = [c for c in df.columns if c != 'Timestamp' and pd.api.types.is_numeric_dtype(df[c])]
+    out_path = out_path or os.path.splitext(csv_path)[0] + BINLOG_EXTENSION
+
+    tmp_path = out_path + '.tmp'
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)  # leftover from an interrupted conversion
+    fh, dtype = open_binlog_for_append(tmp_path, columns)
+    try:
+        append_records(fh, dtype, df['Timestamp'].to_numpy(), df[columns].to_numpy(dtype='float32'))
+    finally:
+        fh.close()
+    os.replace(tmp_path, out_path)
+    return out_path
+
+
+if __name__ == "__main__":
+    import sys
+
+    # python binlog.py C:\SystemLogs\Global_Usage_*.csv
+    for arg in sys.argv[1:]:
+        result = convert_csv_to_binlog(arg)
+        print(f"{arg} -> {result}" if result else f"{arg}: skipped (not a Logman CSV)")
@@ -0,0 +1,292 @@
+# collector.py
+"""
+Low-overhead Python collector (psutil) that writes the same files as the Windows scripts:
+- System_Log_YYYY-MM-DD.csv  : Monitor.ps1 process log (Top-N memory / disk I/O processes)
+- System_Log_YYYY-MM-DD.procs.jsonl : structured records of the same Top-N processes with PID,
+  CPU time and handle count (procrecords.py); --no-records turns it off
+- Global_Usage_YYYYMMDD_HHMMSS.csv : logman-style PDH-CSV with CPU / memory / disk counters
+
+Usage:
+    python collector.py --interval 5 --global-interval 1 --top-n 10
+"""
+import argparse
+import heapq
+import os
+import socket
+import sys
+import time
+from datetime import datetime
+
+from config import DEFAULT_LOG_DIR
+from binlog import BINLOG_EXTENSION, open_binlog_for_append, append_records
+from procrecords import RECORDS_SUFFIX, format_record
+
+try:
+    import psutil
+except ImportError:  # pragma: no cover - optional dependency
+    psutil = None
+
+PROCESS_HEADER = "Timestamp,IP_Address,PhysicalMem(GB),OSTotalMem(GB),Top5_Memory_MB,Top5_Disk_IO_Global(MB/s)"
+GLOBAL_COLUMNS = ['CPU(%)', 'AvailableMem(MB)', 'CommittedBytes', 'DiskRead(B/s)', 'DiskWrite(B/s)']
+EXCLUDED_IO_NAMES = {'_total', 'idle', 'system', 'system idle process'}
+MIN_IO_BYTES_PER_SEC = 10 * 1024  # same 10KB/s cut-off as Monitor.ps1
+
+
+def host_static_info():
+    """Collected once at start-up; Monitor.ps1 re-queried these (twice) on every loop."""
+    ip_address = "N/A"
+    for addrs in psutil.net_if_addrs().values():
+        for addr in addrs:
+            if addr.family == socket.AF_INET and not addr.address.startswith('127.'):
+                ip_address = addr.address
+                break
+        if ip_address != "N/A":
+            break
+
+    total_bytes = psutil.virtual_memory().total
+    return {
+        'host': socket.gethostname(),
+        'ip_address': ip_address,
+        # DIMM capacity is not exposed by psutil; round OS-visible memory up to whole GB instead
+        'physical_mem_gb': round(total_bytes / 1024 ** 3 + 0.49),
+        'os_total_mem_gb': round(total_bytes / 1024 ** 3, 2),
+    }
+
+
+def sample_top_processes(prev_io, prev_time, top_n):
+    """
+    One pass over the process table. Uses heapq.nlargest (O(n log N)) instead of a full sort.
+    Returns (top_memory, top_disk_io, io_snapshot, snapshot_time) with (value, pid, name) entries;
+    disk I/O rates are computed from the delta against the previous snapshot.
+    """
+    now = time.monotonic()
+    elapsed = now - prev_time if prev_time else None
+    mem_items = []
+    io_items = []
+    io_snapshot = {}
+
+    for proc in psutil.process_iter(['pid', 'name', 'memory_info', 'io_counters']):
+        info = proc.info
+        name = info.get('name') or f"pid{info['pid']}"
+        mem = info.get('memory_info')
+        if mem is not None:
+            mem_items.append((mem.rss, info['pid'], name))
+
+        io = info.get('io_counters')
+        if io is not None:
+            total_io = io.read_bytes + io.write_bytes
+            io_snapshot[info['pid']] = total_io
+            if elapsed and info['pid'] in prev_io and name.lower() not in EXCLUDED_IO_NAMES:
+                rate = (total_io - prev_io[info['pid']]) / elapsed
+                if rate > MIN_IO_BYTES_PER_SEC:
+                    io_items.append((rate, info['pid'], name))
+
+    top_mem = heapq.nlargest(top_n, mem_items)
+    top_io = heapq.nlargest(top_n, io_items)
+    return top_mem, top_io, io_snapshot, now
+
+
+def format_top_memory(top_mem):
+    return " | ".join(f"{name}:{round(rss / 1024 ** 2)}MB" for rss, _, name in top_mem)
+
+
+def format_top_io(top_io):
+    if not top_io:
+        return "No_Active_IO"
+    return " | ".join(f"{name}:{rate / 1024 ** 2:.2f}MB/s" for rate, _, name in top_io)
+
+
+def format_records(top_mem, top_io, timestamp):
+    """
+    JSON lines for the union of the top memory / disk I/O PIDs. CPU time and handle count are
+    read only for these few processes, not during the full process-table pass.
+    """
+    memory = {pid: rss for rss, pid, _ in top_mem}
+    io_rate = {pid: rate for rate, pid, _ in top_io}
+    names = {pid: name for _, pid, name in top_mem + top_io}
+    lines = []
+    for pid, name in names.items():
+        rss, cpu_s, handles = memory.get(pid), None, None
+        try:
+            proc = psutil.Process(pid)
+            with proc.oneshot():
+                times = proc.cpu_times()
+                cpu_s = times.user + times.system
+                handles = proc.num_handles() if psutil.WINDOWS else proc.num_fds()
+                if rss is None:
+                    rss = proc.memory_info().rss
+        except psutil.Error:
+            pass  # exited or access denied: keep what the table pass saw
+        memory_mb = None if rss is None else rss / 1024 ** 2
+        lines.append(format_record(timestamp, pid, name, memory_mb, io_rate.get(pid, 0.0) / 1024 ** 2, cpu_s, handles))
+    return lines
+
+
+def _timestamp(now, sub_second):
+    if sub_second:
+        return now.strftime('%Y-%m-%d %H:%M:%S.%f')[:-3]
+    return now.strftime('%Y-%m-%d %H:%M:%S')
+
+
+def _open_append(path, header):
+    is_new = not os.path.exists(path) or os.path.getsize(path) == 0
+    # Kept open for the whole run (Add-Content re-opened the file on every write)
+    fh = open(path, 'a', encoding='utf-8', newline='')
+    if is_new and header:
+        fh.write(header + "\n")
+        fh.flush()
+    return fh
+
+
+def _global_header(host):
+    counters = [
+        r"\Processor(_Total)\% Processor Time",
+        r"\Memory\Available MBytes",
+        r"\Memory\Committed Bytes",
+        r"\LogicalDisk(_Total)\Disk Read Bytes/sec",
+        r"\LogicalDisk(_Total)\Disk Write Bytes/sec",
+    ]
+    offset = -int(time.localtime().tm_gmtoff // 60)
+    cols = [f"(PDH-CSV 4.0) ({time.tzname[0]})({offset})"] + [f"\\\\{host}{c}" for c in counters]
+    return ",".join(f'"{c}"' for c in cols)
+
+
+def sample_global(prev_disk, prev_time):
+    """CPU / memory / total disk rates in logman column order."""
+    now = time.monotonic()
+    cpu = psutil.cpu_percent(interval=None)
+    vm = psutil.virtual_memory()
+    swap = psutil.swap_memory()
+    disk = psutil.disk_io_counters()
+    read_rate = write_rate = 0.0
+    if disk is not None and prev_disk is not None and now > prev_time:
+        read_rate = (disk.read_bytes - prev_disk.read_bytes) / (now - prev_time)
+        write_rate = (disk.write_bytes - prev_disk.write_bytes) / (now - prev_time)
+    committed = vm.total - vm.available + swap.used
+    values = [cpu, vm.available / 1024 ** 2, committed, read_rate, write_rate]
+    return values, disk, now
+
+
+def run_collector(log_dir, interval=30.0, global_interval=1.0, top_n=5, duration=None, verbose=True, binary=False,
+                  records=True):
+    """
+    Main loop. Both streams share one deadline scheduler so sub-second intervals don't drift.
+    With binary=True the global stream goes to a fixed-record Global_Usage_*.pcmb (see binlog.py);
+    with records=True every process sample is also written as JSON lines (procrecords.py).
+    Returns the self-overhead summary (collector CPU time vs wall time).
+    """
+    if psutil is None:
+        raise RuntimeError("psutil is required for the Python collector: pip install psutil")
+
+    os.makedirs(log_dir, exist_ok=True)
+    static = host_static_info()
+    sub_second = interval < 1 or (global_interval and global_interval < 1)
+
+    proc_fh = None
+    records_fh = None
+    proc_date = None
+    global_fh = None
+    global_dtype = None
+    if global_interval:
+        global_stem = os.path.join(log_dir, f"Global_Usage_{datetime.now():%Y%m%d_%H%M%S}")
+        if binary:
+            global_fh, global_dtype = open_binlog_for_append(global_stem + BINLOG_EXTENSION, GLOBAL_COLUMNS)
+        else:
+            global_fh = _open_append(global_stem + ".csv", _global_header(static['host']))
+
+    psutil.cpu_percent(interval=None)  # prime the CPU counter
+    prev_io, prev_io_time = {}, None
+    prev_disk, prev_disk_time = psutil.disk_io_counters(), time.monotonic()
+
+    start_wall = time.monotonic()
+    start_cpu = time.process_time()
+    next_proc = next_global = start_wall
+    samples = 0
+
+    try:
+        while duration is None or time.monotonic() - start_wall < duration:
+            now_mono = time.monotonic()
+
+            if global_fh is not None and now_mono >= next_global:
+                values, prev_disk, prev_disk_time = sample_global(prev_disk, prev_disk_time)
+                if global_dtype is not None:
+                    append_records(global_fh, global_dtype, [datetime.now()], [values])
+                else:
+                    stamp = datetime.now().strftime('%m/%d/%Y %H:%M:%S.%f')[:-3]
+                    global_fh.write(",".join([f'"{stamp}"'] + [f'"{v:.6f}"' for v in values]) + "\n")
+                    global_fh.flush()
+                next_global = max(next_global + global_interval, time.monotonic())
+
+            if now_mono >= next_proc:
+                now = datetime.now()
+                if proc_date != now.date():
+                    for fh in (proc_fh, records_fh):
+                        if fh is not None:
+                            fh.close()
+                    proc_stem = os.path.join(log_dir, f"System_Log_{now:%Y-%m-%d}")
+                    proc_fh = _open_append(proc_stem + ".csv", PROCESS_HEADER)
+                    if records:
+                        records_fh = _open_append(proc_stem + RECORDS_SUFFIX, None)
+                    proc_date = now.date()
+
+                top_mem, top_io, prev_io, prev_io_time = sample_top_processes(prev_io, prev_io_time, top_n)
+                top_mem_log = format_top_memory(top_mem)
+                proc_fh.write(
+                    f"{_timestamp(now, sub_second)},{static['ip_address']},{static['physical_mem_gb']},"
+                    f"{static['os_total_mem_gb']},\"{top_mem_log}\",\"{format_top_io(top_io)}\"\n"
+                )
+                proc_fh.flush()
+                if records_fh is not None:
+                    lines = format_records(top_mem, top_io, _timestamp(now, sub_second))
+                    records_fh.write("".join(line + "\n" for line in lines))
+                    records_fh.flush()
+                samples += 1
+                next_proc = max(next_proc + interval, time.monotonic())
+
+                if verbose:
+                    # The first sample includes psutil warm-up, so overhead is reported from the second one
+                    overhead = f" overhead={measure_overhead(start_wall, start_cpu)['cpu_percent']:.2f}% CPU" if samples > 1 else ""
+                    print(f"[{_timestamp(now, sub_second)}] Process Logged. (Top Mem: {top_mem_log.split('|')[0].strip()}){overhead}")
+
+            deadlines = [next_proc] + ([next_global] if global_fh is not None else [])
+            time.sleep(max(0.0, min(deadlines) - time.monotonic()))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for fh in (proc_fh, records_fh, global_fh):
+            if fh is not None:
+                fh.close()
+
+    summary = measure_overhead(start_wall, start_cpu)
+    summary['process_samples'] = samples
+    return summary
+
+
+def measure_overhead(start_wall, start_cpu):
+    """Collector CPU time as a percentage of one core over the elapsed wall time."""
+    wall = max(time.monotonic() - start_wall, 1e-9)
+    cpu = time.process_time() - start_cpu
+    return {'wall_s': wall, 'cpu_s': cpu, 'cpu_percent': cpu / wall * 100}
+
+
+def main(argv=None):
+    default_dir = DEFAULT_LOG_DIR if sys.platform.startswith('win') else os.path.expanduser('~/SystemLogs')
+    parser = argparse.ArgumentParser(description="Python resource collector (Monitor.ps1 / logman compatible output)")
+    parser.add_argument('--log-dir', default=default_dir)
+    parser.add_argument('--interval', type=float, default=30.0, help="Process (Top-N) interval in seconds")
+    parser.add_argument('--global-interval', type=float, default=1.0, help="Global counter interval in seconds (0 = off)")
+    parser.add_argument('--top-n', type=int, default=5, help="Processes kept per sample for memory and for disk I/O")
+    parser.add_argument('--duration', type=float, default=None, help="Stop after N seconds")
+    parser.add_argument('--binary', action='store_true', help="Write global counters as a binary .pcmb log")
+    parser.add_argument('--no-records', action='store_true', help="Do not write the structured .procs.jsonl records")
+    parser.add_argument('--quiet', action='store_true')
+    args = parser.parse_args(argv)
+
+    summary = run_collector(args.log_dir, args.interval, args.global_interval, args.top_n, args.duration,
+                            not args.quiet, args.binary, not args.no_records)
+    print(f"Collector overhead: {summary['cpu_s']:.2f}s CPU over {summary['wall_s']:.1f}s "
+          f"({summary['cpu_percent']:.2f}% of one core, {summary['process_samples']} process samples)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,6 @@
 # config.py
+import os
+import tempfile
 
 COLOR_CPU = '#FF4B4B'
 COLOR_MEM = '#0068C9'
@@ -7,6 +9,26 @@ COLOR_PROCESS = '#800080'
 COLOR_ANOMALY = 'rgba(255, 0, 0, 0.1)'
 
 DEFAULT_LOG_DIR = r"C:\SystemLogs"
+# Uploaded CSVs are spooled here once, named by content hash (uploads.py)
+UPLOAD_CACHE_DIR = os.path.join(os.environ.get('LOCALAPPDATA') or tempfile.gettempdir(), 'SystemResourceMonitor', 'uploads')
+UPLOAD_RETENTION_DAYS = 30      # spooled uploads not used for this long are deleted (None: keep)
+UPLOAD_CACHE_MB = 2048          # then least recently used ones go until the folder fits (None: no cap)
+
+# Archival compaction (archive.py). None disables the step.
+ARCHIVE_AFTER_DAYS = 7          # closed logs older than this are rolled into monthly archives
+DOWNSAMPLE_AFTER_DAYS = 30      # logman rows older than this are averaged to DOWNSAMPLE_INTERVAL
+DOWNSAMPLE_INTERVAL = '1min'
+RETENTION_DAYS = 365            # archives (and raw logs) older than this are deleted
+
+# Built Plotly figures kept across reruns (figcache.py)
+FIGURE_CACHE_MB = 256
+
+# Local HTTP query API (api.py)
+API_HOST = '127.0.0.1'          # localhost only; other machines need an explicit --host
+API_PORT = 8765
+API_PAGE_ROWS = 10_000          # default rows per page
+API_MAX_PAGE_ROWS = 100_000
+API_FRAME_CACHE_MB = 512       # merged range frames; the most recent one is kept even if larger
 
 LAST_BUILD = "~0,4datetime:~4,2datetime:~6,2datetime:~8,2datetime:~10,2" # Updated by build.bat
 
@@ -0,0 +1,166 @@
+# correlate.py
+"""
+Correlation and lag analysis between metrics and per-process series.
+
+Everything runs on a rollup: the window is averaged onto a regular grid whose step is chosen so
+the grid has at most MAX_POINTS rows (1s data over a day -> 30s, over a week -> 3min), which keeps
+a long capture as cheap as a short one. Per-process columns come from the procmatrix matrix of the
+Top5 columns at the same step, so they line up with the counters row for row.
+
+Cross-correlation of the target against all other columns is one batched FFT; the best lag per
+signal is the peak |r| within +/- max_lag steps. A positive lag means the signal FOLLOWS the target.
+"""
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from procmatrix import build_process_matrix, matrix_to_frame
+from timeline import time_buckets
+
+MAX_POINTS = 4096
+ROLLUP_CHOICES = ('1s', '5s', '10s', '30s', '1min', '2min', '3min', '5min', '10min', '15min', '30min', '1h')
+PROCESS_COLUMNS = {'Top5_Memory_MB': 'Mem', 'Top5_Disk_IO_Global(MB/s)': 'IO'}
+# Signals need at least this many overlapping grid points to be ranked
+MIN_OVERLAP = 10
+
+
+def choose_rollup(start, end, max_points=MAX_POINTS, choices=ROLLUP_CHOICES):
+    """Narrowest step in `choices` that keeps [start, end] within `max_points` grid rows."""
+    span = pd.Timestamp(end) - pd.Timestamp(start)
+    for freq in choices:
+        if span / pd.Timedelta(freq) < max_points:
+            return freq
+    return choices[-1]
+
+
+def metric_columns(df):
+    """Numeric counters worth correlating (static identity columns excluded)."""
+    skip = {'PhysicalMem(GB)', 'OSTotalMem(GB)'}
+    return [c for c in df.columns if c != 'Timestamp' and c not in skip and pd.api.types.is_numeric_dtype(df[c])]
+
+
+def rollup_frame(df, freq, columns=None, top_processes=20):
+    """
+    Averages `columns` (default: all metrics) and the top processes of each Top5 column onto a
+    regular `freq` grid spanning the data. Empty grid rows stay NaN.
+    """
+    columns = metric_columns(df) if columns is None else columns
+    regular = time_buckets(df, freq)
+    if regular is not None:
+        codes, starts = regular
+        valid = np.ones(len(df), dtype=bool)
+    else:
+        valid = df['Timestamp'].notna().to_numpy()
+        codes, starts = pd.factorize(df['Timestamp'].dt.floor(freq).to_numpy()[valid], sort=True)
+    starts = pd.DatetimeIndex(starts)
+    grid = pd.date_range(starts[0], starts[-1], freq=freq, name='Timestamp') if len(starts) else pd.DatetimeIndex([], name='Timestamp')
+
+    data = {}
+    for col in columns:
+        values = pd.to_numeric(df[col], errors='coerce').to_numpy(dtype='float64')[valid]
+        present = ~np.isnan(values)
+        sums = np.bincount(codes[present], weights=values[present], minlength=len(starts))
+        counts = np.bincount(codes[present], minlength=len(starts))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            data[col] = sums / counts
+    frame = pd.DataFrame(data, index=starts).reindex(grid)
+
+    for col, prefix in PROCESS_COLUMNS.items():
+        if col not in df.columns:
+            continue
+        matrix = build_process_matrix(df, col, freq=freq)
+        if len(matrix['value']) == 0:
+            continue
+        processes = matrix_to_frame(matrix, top_n=top_processes)
+        processes = processes.drop(columns=[c for c in processes.columns if c == 'Other'])
+        processes.columns = [f"{prefix}: {p}" for p in processes.columns]
+        frame = frame.join(processes.reindex(grid))
+    return frame
+
+
+def correlation_matrix(frame, min_periods=MIN_OVERLAP):
+    """Pairwise Pearson correlation at lag 0 (NaN-aware)."""
+    return frame.corr(min_periods=min_periods)
+
+
+def _standardize(values):
+    """Column-wise z-scores with NaN -> 0 (missing points add nothing to the FFT sums)."""
+    with np.errstate(invalid='ignore'), warnings.catch_warnings():
+        warnings.simplefilter('ignore', category=RuntimeWarning)  # all-NaN columns
+        mean = np.nanmean(values, axis=0)
+        std = np.nanstd(values, axis=0)
+    present = ~np.isnan(values)
+    # Constant (or empty) columns carry no signal: no overlap -> NaN correlation
+    flat = ~(std > 0)
+    present[:, flat] = False
+    std[flat] = 1.0
+    z = (values - mean) / std
+    return np.where(present, z, 0.0), present
+
+
+def cross_correlation(frame, target, max_lag):
+    """
+    Normalised cross-correlation of every column against `target` for lags -max_lag..max_lag
+    (grid steps). Returns (lags, DataFrame[lag x column]); r[k] pairs target[t] with column[t + k].
+    """
+    values = frame.to_numpy(dtype='float64')
+    n = len(values)
+    max_lag = int(min(max_lag, max(n - 1, 0)))
+    z, present = _standardize(values)
+    t_idx = frame.columns.get_loc(target)
+
+    size = 1 << int(np.ceil(np.log2(max(2 * n, 2))))
+    spectrum = np.fft.rfft(z, n=size, axis=0)
+    present_spec = np.fft.rfft(present.astype('float64'), n=size, axis=0)
+    # corr[k] = sum_t target[t] * other[t + k]: conj(target) * other, then inverse FFT
+    raw = np.fft.irfft(np.conj(spectrum[:, [t_idx]]) * spectrum, n=size, axis=0)
+    overlap = np.fft.irfft(np.conj(present_spec[:, [t_idx]]) * present_spec, n=size, axis=0)
+
+    lags = np.arange(-max_lag, max_lag + 1)
+    rows = lags % size
+    overlap = np.rint(overlap[rows])
+    with np.errstate(invalid='ignore', divide='ignore'):
+        r = raw[rows] / overlap
+    r[overlap < MIN_OVERLAP] = np.nan
+    return lags, pd.DataFrame(np.clip(r, -1, 1), index=pd.Index(lags, name='Lag'), columns=frame.columns)
+
+
+def format_lag(lag):
+    """Signed, compact duration: +6min, -1h30min, 0."""
+    seconds = int(lag.total_seconds())
+    if seconds == 0:
+        return '0'
+    sign, seconds = ('+' if seconds > 0 else '-'), abs(seconds)
+    hours, rest = divmod(seconds, 3600)
+    minutes, secs = divmod(rest, 60)
+    parts = [f"{hours}h" if hours else '', f"{minutes}min" if minutes else '', f"{secs}s" if secs else '']
+    return sign + ''.join(parts)
+
+
+def related_signals(frame, target, max_lag, freq):
+    """
+    Ranks every other column by its strongest correlation with `target` within +/- max_lag steps.
+    Columns: Signal, Corr (lag 0), Best Lag, Corr @ Best Lag, Relation.
+    """
+    lags, r = cross_correlation(frame, target, max_lag)
+    r = r.drop(columns=[target])
+    if r.empty:
+        return pd.DataFrame(columns=['Signal', 'Corr (lag 0)', 'Best Lag', 'Corr @ Best Lag', 'Relation'])
+
+    abs_r = np.abs(r.to_numpy())
+    has_value = ~np.isnan(abs_r).all(axis=0)
+    best = np.where(np.isnan(abs_r), -1, abs_r).argmax(axis=0)
+    best_lag = lags[best]
+    best_r = r.to_numpy()[best, np.arange(r.shape[1])]
+    step = pd.Timedelta(freq)
+
+    relation = np.where(best_lag > 0, 'follows target', np.where(best_lag < 0, 'leads target', 'in step'))
+    table = pd.DataFrame({
+        'Signal': r.columns,
+        'Corr (lag 0)': r.loc[0].to_numpy(),
+        'Best Lag': [format_lag(step * int(k)) for k in best_lag],
+        'Corr @ Best Lag': best_r,
+        'Relation': relation,
+    })[has_value]
+    return table.reindex(table['Corr @ Best Lag'].abs().sort_values(ascending=False).index).reset_index(drop=True)
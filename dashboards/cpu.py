@@ -2,20 +2,15 @@
 import plotly.graph_objects as go
 import pandas as pd
 from config import COLOR_CPU
+from sketches import histogram_percentiles, memory_usage_percentiles
+from figcache import cached_chart
+from derived import scoped_fingerprint
 
-def render_cpu_dashboard(st, df):
-    st.subheader("CPU Performance & Thermal")
-    
-    if 'CPU(%)' not in df.columns:
-        st.error(f"❌ CPU Data not found. Available columns: {list(df.columns)}")
-        return
-
+def _build_cpu_figure(df):
     fig = go.Figure()
     fig.add_trace(go.Scatter(x=df['Timestamp'], y=df['CPU(%)'], name='CPU Usage (%)', line=dict(color=COLOR_CPU, width=2)))
     
     if 'CPU_Temp(C)' in df.columns:
-        # 온도는 N/A일 수 있으므로 숫자형 변환 시도
-        df['CPU_Temp(C)'] = pd.to_numeric(df['CPU_Temp(C)'], errors='coerce')
         fig.add_trace(go.Scatter(x=df['Timestamp'], y=df['CPU_Temp(C)'], name='CPU Temp (°C)', yaxis='y2', line=dict(color='#FFD700', dash='dot'))) # 노랑/골드
 
     fig.update_layout(
@@ -25,6 +20,22 @@ def render_cpu_dashboard(st, df):
         hovermode="x unified",
         legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
     )
+    return fig
+
+
+def render_cpu_dashboard(st, df, hist=None):
+    st.subheader("CPU Performance & Thermal")
+    
+    if 'CPU(%)' not in df.columns:
+        st.error(f"❌ CPU Data not found. Available columns: {list(df.columns)}")
+        return
+
+    if 'CPU_Temp(C)' in df.columns:
+        # 온도는 N/A일 수 있으므로 숫자형 변환 시도
+        df['CPU_Temp(C)'] = pd.to_numeric(df['CPU_Temp(C)'], errors='coerce')
+
+    chart_cols = ['Timestamp', 'CPU(%)', 'CPU_Temp(C)']
+    fig = cached_chart('cpu', scoped_fingerprint(st, 'df', df, chart_cols), (), lambda: _build_cpu_figure(df))
     st.plotly_chart(fig, width='stretch')
     
     # 통계 지표
@@ -35,7 +46,47 @@ def render_cpu_dashboard(st, df):
     
     col1.metric("Max CPU Usage", f"{cpu_max:.2f}%")
     col1.metric("Avg CPU Usage", f"{cpu_mean:.2f}%")
+
+    range_start, range_end = df['Timestamp'].min(), df['Timestamp'].max()
+    cpu_pct = histogram_percentiles(hist, 'CPU(%)', start=range_start, end=range_end)
+    if not cpu_pct.empty:
+        col1.metric("p95 CPU Usage", f"{cpu_pct['p95'].iloc[0]:.2f}%")
+        col1.metric("p99 CPU Usage", f"{cpu_pct['p99'].iloc[0]:.2f}%")
     
     if 'CPU_Temp(C)' in df.columns and df['CPU_Temp(C)'].notna().any():
         temp_max = df['CPU_Temp(C)'].max()
         col2.metric("Max CPU Temp", f"{temp_max:.1f}°C")
+
+    if hist is not None and not hist.empty:
+        render_percentile_report(st, df, hist, range_start, range_end)
+
+
+def render_percentile_report(st, df, hist, range_start, range_end):
+    st.divider()
+    st.subheader("📐 Percentile Report (p95 / p99)")
+    st.caption("Computed from hourly histograms cached at ingest (±1% relative error, range edges rounded to whole hours).")
+
+    metric_options = sorted(hist['Metric'].unique())
+    if 'AvailableMem(MB)' in metric_options and 'OSTotalMem(GB)' in df.columns and df['OSTotalMem(GB)'].notna().any():
+        metric_options = ['Memory Usage(%)'] + metric_options
+    default_metrics = [m for m in ['CPU(%)', 'Memory Usage(%)'] if m in metric_options]
+    default_metrics += [m for m in metric_options if m.startswith('DiskQueue')][:1]
+
+    rc1, rc2 = st.columns([3, 1])
+    metrics = rc1.multiselect("Metrics", metric_options, default=default_metrics)
+    granularity = rc2.selectbox("Per", ["Hour", "Day", "Whole Range"], index=1)
+    by = {"Hour": 'h', "Day": 'D', "Whole Range": None}[granularity]
+
+    frames = []
+    for metric in metrics:
+        if metric == 'Memory Usage(%)':
+            total_mem_gb = df['OSTotalMem(GB)'].dropna().iloc[0]
+            table = memory_usage_percentiles(hist, total_mem_gb, start=range_start, end=range_end, by=by)
+        else:
+            table = histogram_percentiles(hist, metric, start=range_start, end=range_end, by=by)
+        if not table.empty:
+            frames.append(table.assign(Metric=metric))
+
+    if frames:
+        report = pd.concat(frames, ignore_index=True)[['Metric', 'Period', 'p95', 'p99', 'Samples']]
+        st.dataframe(report, width='stretch', hide_index=True)
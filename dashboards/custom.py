@@ -1,9 +1,30 @@
 import plotly.express as px
+import plotly.graph_objects as go
 import streamlit as st
 import pandas as pd
 from excel_exporter import generate_excel
+from timeline import time_slice
+from logsql import EXAMPLE_QUERY, duckdb, list_views, open_log_store, run_query
+from figcache import cached_chart
+from derived import memoize, scoped_fingerprint
+from procmatrix import auto_freq, build_process_matrix, build_record_matrix, coarsen_matrix, matrix_to_frame
+from procrecords import METRICS
+from correlate import choose_rollup, correlation_matrix, related_signals, rollup_frame
 
-def render_custom_dashboard(st, df, parse_process_column):
+# Heatmap cells are bounded so the rendered image stays light over weeks of data
+HEATMAP_MAX_BUCKETS = 1500
+HEATMAP_SOURCES = {
+    "Memory (MB)": 'Top5_Memory_MB',
+    "Disk I/O (MB/s)": 'Top5_Disk_IO_Global(MB/s)',
+}
+
+def _build_custom_figure(df, selected_cols):
+    fig_custom = px.line(df, x='Timestamp', y=selected_cols, title="Custom Time Series Analysis")
+    fig_custom.update_layout(hovermode="x unified")
+    return fig_custom
+
+
+def render_custom_dashboard(st, df, parse_process_column, files=None, records=None):
     st.subheader("🛠️ Custom Visualization")
     
     # 1. 시계열 그래프 섹션
@@ -16,8 +37,8 @@ def render_custom_dashboard(st, df, parse_process_column):
     selected_cols = st.multiselect("Select Metrics to Plot (Y-Axis)", available_cols, default=['CPU(%)', 'Usage(%)'])
     
     if selected_cols:
-        fig_custom = px.line(df, x='Timestamp', y=selected_cols, title="Custom Time Series Analysis")
-        fig_custom.update_layout(hovermode="x unified")
+        fig_custom = cached_chart('custom', scoped_fingerprint(st, 'df', df, ['Timestamp'] + selected_cols), tuple(selected_cols),
+                                  lambda: _build_custom_figure(df, selected_cols))
         st.plotly_chart(fig_custom, width='stretch')
         
         # 엑셀 내보내기 서브 섹션
@@ -34,7 +55,7 @@ def render_custom_dashboard(st, df, parse_process_column):
             )
         
         # 선택한 시작 시간 이후의 데이터만 필터링
-        export_df = df[df['Timestamp'] >= export_start]
+        export_df = time_slice(df, start=export_start)
         
         with exp_col2:
             st.write(" ") # 수직 정렬용
@@ -90,3 +111,155 @@ def render_custom_dashboard(st, df, parse_process_column):
                 st.info("No disk I/O process data.")
         else:
             st.warning("Disk I/O process column not found.")
+
+    st.divider()
+
+    # 3. 시간 × 프로세스 히트맵 (Top5 전체 기간, 수천 개 프로세스도 희소 행렬로 집계)
+    render_process_heatmap(st, df, records)
+
+    st.divider()
+
+    # 4. 연관 신호 (상관/지연) 분석 - 구간 길이에 맞는 rollup 격자에서 계산
+    render_related_signals(st, df)
+
+    st.divider()
+
+    # 5. SQL 질의 섹션 (DuckDB가 Parquet 캐시를 직접 스캔, 집계 결과만 pandas로)
+    render_sql_query(st, df, files or [])
+
+
+def _build_process_heatmap(matrix, freq, top_n, share, unit):
+    frame = matrix_to_frame(coarsen_matrix(matrix, freq), top_n=top_n, share=share)
+    # Largest consumers on top
+    frame = frame[frame.columns[::-1]]
+    fig = go.Figure(go.Heatmap(
+        x=frame.index,
+        y=frame.columns,
+        z=frame.to_numpy().T,
+        colorscale='Viridis',
+        colorbar=dict(title='%' if share else unit),
+        hovertemplate="%{x}<br>%{y}: %{z:.1f}" + ('%' if share else f" {unit}") + "<extra></extra>",
+    ))
+    fig.update_layout(
+        title=f"{'Share of Top5 total' if share else 'Average'} per process ({freq} buckets)",
+        height=max(400, 18 * len(frame.columns) + 150),
+        yaxis=dict(type='category'),
+    )
+    return fig
+
+
+def render_process_heatmap(st, df, records=None):
+    st.markdown("### 🔥 Process Heatmap")
+    has_records = records is not None and not records.empty
+    sources = {label: col for label, col in HEATMAP_SOURCES.items() if has_records or col in df.columns}
+    if not sources:
+        st.info("No Top5 process columns in the loaded data.")
+        return
+
+    hc1, hc2, hc3, hc4 = st.columns(4)
+    label = hc1.selectbox("Resource", list(sources))
+    bucket_choice = hc2.selectbox("Bucket", ["Auto", "1min", "5min", "15min", "1h", "6h", "1D"])
+    top_n = hc3.slider("Top Processes", 5, 100, 25, 5)
+    share = hc4.radio("Value", ["Share (%)", "Average"], horizontal=True) == "Share (%)"
+
+    col = sources[label]
+    # The base-resolution matrix is built once per data; bucket width / Top N are reductions over it.
+    # Structured records (PID-level, typed) are used when present instead of parsing the Top5 strings
+    if has_records:
+        metric = METRICS[col]
+        fp = scoped_fingerprint(st, 'records', records, ['Timestamp', 'PID', metric])
+        matrix = cached_chart('process_matrix', fp, (metric,), lambda: build_record_matrix(records, metric))
+    else:
+        fp = scoped_fingerprint(st, 'df', df, ['Timestamp', col])
+        matrix = cached_chart('process_matrix', fp, (col,),
+                              lambda: build_process_matrix(df, col))
+    if len(matrix['value']) == 0:
+        st.info("No process samples in the selected range.")
+        return
+
+    freq = auto_freq(matrix, HEATMAP_MAX_BUCKETS) if bucket_choice == "Auto" else bucket_choice
+    unit = label[label.index('(') + 1:-1]
+    fig = cached_chart('process_heatmap', fp, (col, freq, top_n, share),
+                       lambda: _build_process_heatmap(matrix, freq, top_n, share, unit))
+    st.plotly_chart(fig, width='stretch')
+    st.caption(f"{len(matrix['processes']):,} distinct processes · showing top {min(top_n, len(matrix['processes']))}"
+               f"{' + Other' if len(matrix['processes']) > top_n else ''}")
+
+
+def render_related_signals(st, df):
+    st.markdown("### 🔗 Related Signals")
+    if df.empty or df['Timestamp'].isna().all():
+        st.info("No data in the selected range.")
+        return
+
+    freq = choose_rollup(df['Timestamp'].min(), df['Timestamp'].max())
+    fp = scoped_fingerprint(st, 'df', df)
+    frame = cached_chart('rollup', fp, (freq,), lambda: rollup_frame(df, freq))
+    if frame.shape[1] < 2 or len(frame) < 3:
+        st.info("Not enough signals to correlate.")
+        return
+
+    rc1, rc2 = st.columns(2)
+    signals = list(frame.columns)
+    default = signals.index('CPU(%)') if 'CPU(%)' in signals else 0
+    target = rc1.selectbox("Target Signal", signals, index=default)
+    step = pd.Timedelta(freq)
+    max_lag_min = rc2.slider("Max Lag (minutes)", 0, 120, 10, help="Search window for lead/lag on each side")
+    max_lag = int(pd.Timedelta(minutes=max_lag_min) / step)
+
+    table = cached_chart('related_signals', fp, (freq, target, max_lag),
+                         lambda: related_signals(frame, target, max_lag, freq))
+    st.caption(f"Computed on {freq} averages ({len(frame):,} points). Positive lag: the signal follows the target.")
+    if table.empty:
+        st.info("No overlapping signals to compare.")
+        return
+    st.dataframe(table.round({'Corr (lag 0)': 2, 'Corr @ Best Lag': 2}), hide_index=True, width='stretch')
+
+    with st.expander("Correlation Matrix (lag 0)"):
+        top = [target] + table['Signal'].head(15).tolist()
+        corr = correlation_matrix(frame[top])
+        fig_corr = px.imshow(corr, zmin=-1, zmax=1, color_continuous_scale='RdBu_r', text_auto='.2f', aspect='auto')
+        st.plotly_chart(fig_corr, width='stretch')
+
+
+def render_sql_query(st, df, files):
+    st.markdown("### 🧮 SQL Query")
+    if duckdb is None:
+        st.info("💡 Install `duckdb` (pip install duckdb) to query the log store with SQL.")
+        return
+
+    try:
+        # One connection per session scope (files + time range); reruns only re-register `current`
+        con = memoize(st, 'sql_store', lambda: open_log_store(files))
+        con.register('current', df)
+    except Exception as e:
+        st.error(f"Failed to open log store: {e}")
+        return
+
+    try:
+        with st.expander("Available views"):
+            for view, columns in list_views(con).items():
+                st.markdown(f"**{view}**: " + ", ".join(f"`{c}`" for c in columns))
+            st.caption("`current` = rows shown above (Time Range applied). Uploaded files appear in the `logman` / `process` views like local logs.")
+
+        sql = st.text_area("Query", value=EXAMPLE_QUERY, height=150)
+        if not st.button("▶ Run Query"):
+            return
+        result, truncated = run_query(con, sql)
+    except Exception as e:
+        st.error(f"Query failed: {e}")
+        return
+
+    if truncated:
+        st.warning(f"Showing the first {len(result):,} rows. Aggregate (GROUP BY) for a complete answer.")
+    st.dataframe(result, hide_index=True, width='stretch')
+
+    # 첫 컬럼을 X축, 나머지 숫자 컬럼을 Y축으로 자동 그래프
+    value_cols = [c for c in result.columns[1:] if pd.api.types.is_numeric_dtype(result[c])]
+    if len(result) > 1 and value_cols:
+        x_col = result.columns[0]
+        if pd.api.types.is_datetime64_any_dtype(result[x_col]):
+            fig_sql = px.line(result, x=x_col, y=value_cols)
+        else:
+            fig_sql = px.bar(result, x=x_col, y=value_cols, barmode='group')
+        st.plotly_chart(fig_sql, width='stretch')
@@ -0,0 +1,66 @@
+# dashboards/episodes.py
+import pandas as pd
+import plotly.express as px
+from episodes import find_episodes_for_rules
+
+DEFAULT_RULES = [
+    {'Metric': 'CPU(%)', 'Operator': '>', 'Threshold': 90.0, 'Min Duration (s)': 30.0},
+    {'Metric': 'DiskQueue_D:', 'Operator': '>', 'Threshold': 2.0, 'Min Duration (s)': 10.0},
+]
+MAX_TIMELINE_EPISODES = 2000
+
+
+def render_episodes_dashboard(st, df):
+    st.subheader("⏱ Saturation Episodes")
+    st.caption("Find periods where a metric stayed above/below a threshold for longer than a minimum duration.")
+
+    exclude_cols = ['Timestamp', 'IP_Address', 'Top5_Memory_MB', 'Top5_Disk_IO_Global(MB/s)']
+    metric_cols = [c for c in df.columns if c not in exclude_cols and pd.api.types.is_numeric_dtype(df[c])]
+    if not metric_cols:
+        st.warning("No numeric metrics available.")
+        return
+
+    default_rules = [r for r in DEFAULT_RULES if r['Metric'] in metric_cols] or [
+        {'Metric': metric_cols[0], 'Operator': '>', 'Threshold': 0.0, 'Min Duration (s)': 10.0}
+    ]
+    rules_df = st.data_editor(
+        pd.DataFrame(default_rules),
+        num_rows="dynamic",
+        width='stretch',
+        column_config={
+            'Metric': st.column_config.SelectboxColumn('Metric', options=metric_cols, required=True),
+            'Operator': st.column_config.SelectboxColumn('Operator', options=['>', '<'], required=True),
+            'Threshold': st.column_config.NumberColumn('Threshold', required=True),
+            'Min Duration (s)': st.column_config.NumberColumn('Min Duration (s)', min_value=0.0, default=0.0),
+        },
+        key="episode_rules",
+    )
+
+    episodes = find_episodes_for_rules(df, rules_df.to_dict('records'))
+    if episodes.empty:
+        st.info("No episodes matched the rules in the selected time range.")
+        return
+
+    # Summary per rule
+    summary = episodes.groupby('Rule').agg(
+        Episodes=('Start', 'size'),
+        Total_Duration=('Duration', 'sum'),
+        Longest=('Duration', 'max'),
+        Worst_Peak=('Peak', 'max'),
+    ).reset_index()
+    st.dataframe(summary, width='stretch', hide_index=True)
+
+    timeline_df = episodes.nlargest(MAX_TIMELINE_EPISODES, 'Duration') if len(episodes) > MAX_TIMELINE_EPISODES else episodes
+    fig = px.timeline(
+        timeline_df, x_start='Start', x_end='End', y='Rule', color='Rule',
+        hover_data={'Peak': ':.2f', 'Mean': ':.2f', 'Samples': True},
+        title="Episode Timeline"
+    )
+    fig.update_layout(showlegend=False)
+    st.plotly_chart(fig, width='stretch')
+    if len(timeline_df) < len(episodes):
+        st.caption(f"Timeline shows the {len(timeline_df):,} longest of {len(episodes):,} episodes.")
+
+    display_df = episodes.copy()
+    display_df['Duration'] = display_df['Duration'].astype(str).str.replace('0 days ', '', regex=False)
+    st.dataframe(display_df, width='stretch', hide_index=True)
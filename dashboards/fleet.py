@@ -0,0 +1,58 @@
+# dashboards/fleet.py
+import plotly.express as px
+from config import COLOR_CPU, COLOR_MEM
+from fleet import fleet_offenders
+
+
+def render_fleet_dashboard(st, rollups):
+    st.subheader("🌐 Fleet Comparison")
+
+    if rollups is None or rollups.empty:
+        st.info("No host folders with log files found under the fleet root.")
+        return
+
+    if 'IP_Count' in rollups.columns:
+        mixed = rollups.loc[rollups['IP_Count'] > 1, 'Host'].tolist()
+        if mixed:
+            st.warning(
+                f"Logs with more than one IP_Address in: {', '.join(mixed)}. Each folder is treated as one host, "
+                "so logs copied from several PCs into one folder are merged into one timeline - keep one folder per host."
+            )
+
+    k1, k2, k3 = st.columns(3)
+    k1.metric("Hosts", len(rollups))
+    if 'Peak CPU(%)' in rollups.columns:
+        worst_cpu = rollups.loc[rollups['Peak CPU(%)'].idxmax()]
+        k2.metric("Highest Peak CPU", f"{worst_cpu['Peak CPU(%)']:.1f}%", worst_cpu['Host'], delta_color="off")
+    if 'Peak Usage(%)' in rollups.columns and rollups['Peak Usage(%)'].notna().any():
+        worst_mem = rollups.loc[rollups['Peak Usage(%)'].idxmax()]
+        k3.metric("Highest Peak Memory", f"{worst_mem['Peak Usage(%)']:.1f}%", worst_mem['Host'], delta_color="off")
+
+    sort_options = [c for c in ['Peak CPU(%)', 'p95 CPU(%)', 'Peak Usage(%)', 'p95 Usage(%)', 'Peak DiskQueue'] if c in rollups.columns]
+    if sort_options:
+        sort_by = st.selectbox("Rank hosts by", sort_options)
+        ranked = rollups.sort_values(sort_by, ascending=False)
+
+        c1, c2 = st.columns(2)
+        if 'Peak CPU(%)' in ranked.columns:
+            fig_cpu = px.bar(ranked, x='Host', y=[c for c in ['Peak CPU(%)', 'p95 CPU(%)'] if c in ranked.columns],
+                             barmode='group', title="CPU per Host (%)",
+                             color_discrete_sequence=[COLOR_CPU, '#FF9999'])
+            c1.plotly_chart(fig_cpu, width='stretch')
+        if 'Peak Usage(%)' in ranked.columns:
+            fig_mem = px.bar(ranked, x='Host', y=[c for c in ['Peak Usage(%)', 'p95 Usage(%)'] if c in ranked.columns],
+                             barmode='group', title="Memory Usage per Host (%)",
+                             color_discrete_sequence=[COLOR_MEM, '#7FB3E6'])
+            c2.plotly_chart(fig_mem, width='stretch')
+
+    st.markdown("### 📋 Host Rollups")
+    st.dataframe(rollups, width='stretch', hide_index=True)
+
+    st.markdown("### 🔥 Worst Offenders Fleet-wide")
+    o1, o2 = st.columns(2)
+    with o1:
+        st.caption("Memory (MB)")
+        st.dataframe(fleet_offenders(rollups, 'Memory').head(15), width='stretch', hide_index=True)
+    with o2:
+        st.caption("Disk I/O (MB/s)")
+        st.dataframe(fleet_offenders(rollups, 'DiskIO').head(15), width='stretch', hide_index=True)
@@ -4,11 +4,12 @@ import plotly.graph_objects as go
 import streamlit as st
 import pandas as pd
 from config import COLOR_MEM, COLOR_SWAP, COLOR_PROCESS
+from trends import fit_process_trends, rank_leak_suspects
+from figcache import cached_chart
+from derived import memoize, scoped_fingerprint
+from procrecords import process_summary, records_peak, records_time_series
 
-def render_memory_dashboard(st, df, parse_process_column, extract_process_time_series, total_mem):
-    st.subheader(f"Memory Analysis ({total_mem}GB Capacity)")
-    
-    # 1. Memory Graph
+def _build_memory_figure(df):
     fig_mem = go.Figure()
 
     # Memory Area
@@ -56,13 +57,40 @@ def render_memory_dashboard(st, df, parse_process_column, extract_process_time_s
         hovermode="x unified",
         legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
     )
+    return fig_mem
+
+
+def _build_process_trend_figure(ts_df, selected_procs):
+    # Filter for selected processes
+    filtered_ts = ts_df[ts_df['Process'].isin(selected_procs)]
+    if filtered_ts.empty:
+        return None
+    fig_trend = px.line(filtered_ts, x='Timestamp', y='Value', color='Process',
+                        title="Memory Usage Over Time (MB)",
+                        labels={'Value': 'Memory (MB)'})
+    fig_trend.update_layout(hovermode="x unified")
+    return fig_trend
+
+
+def render_memory_dashboard(st, df, parse_process_column, extract_process_time_series, total_mem, records=None):
+    st.subheader(f"Memory Analysis ({total_mem}GB Capacity)")
+    
+    # 1. Memory Graph
+    chart_cols = ['Timestamp', 'Usage(%)', 'Swap_Usage(%)', 'Used(GB)']
+    fig_mem = cached_chart('memory', scoped_fingerprint(st, 'df', df, chart_cols), (), lambda: _build_memory_figure(df))
     st.plotly_chart(fig_mem, width='stretch')
     
     st.divider()
     
-    # Top Memory Processes
-    if 'Top5_Memory_MB' in df.columns:
-        top_mem_df = parse_process_column(df['Top5_Memory_MB'])
+    # Top Memory Processes: structured PID records when the capture has them, Top5 strings otherwise
+    has_records = records is not None and not records.empty
+    if has_records or 'Top5_Memory_MB' in df.columns:
+        by_pid = False
+        if has_records:
+            by_pid = st.toggle("Track by PID", help="Keep same-name processes apart, e.g. one leaking chrome.exe among many")
+            top_mem_df = memoize(st, 'memory_top_processes', lambda: records_peak(records, 'Memory_MB', by_pid), deps=(by_pid,))
+        else:
+            top_mem_df = memoize(st, 'memory_top_processes', lambda: parse_process_column(df['Top5_Memory_MB']))
         
         if not top_mem_df.empty:
             # --- TOP 3 Peak Chart ---
@@ -89,18 +117,20 @@ def render_memory_dashboard(st, df, parse_process_column, extract_process_time_s
                 if cols[i].checkbox(f"{name}", value=(i==0)): # Default select first one
                     selected_procs.append(name)
             
+            # Extract time series for all rows (shared by trend chart and leak detection)
+            if has_records:
+                ts_df = memoize(st, 'memory_process_ts', lambda: records_time_series(records, 'Memory_MB', by_pid), deps=(by_pid,))
+                proc_fp = scoped_fingerprint(st, 'records', records, ['Timestamp', 'PID', 'Memory_MB'])
+            else:
+                ts_df = memoize(st, 'memory_process_ts', lambda: extract_process_time_series(df, 'Top5_Memory_MB'))
+                proc_fp = scoped_fingerprint(st, 'df', df, ['Timestamp', 'Top5_Memory_MB'])
+
             if selected_procs:
-                # Extract time series for all rows
-                ts_df = extract_process_time_series(df, 'Top5_Memory_MB')
                 if not ts_df.empty:
-                    # Filter for selected processes
-                    filtered_ts = ts_df[ts_df['Process'].isin(selected_procs)]
+                    fig_trend = cached_chart('memory_process_trend', proc_fp, (by_pid, tuple(selected_procs)),
+                                             lambda: _build_process_trend_figure(ts_df, selected_procs))
                     
-                    if not filtered_ts.empty:
-                        fig_trend = px.line(filtered_ts, x='Timestamp', y='Value', color='Process',
-                                            title="Memory Usage Over Time (MB)",
-                                            labels={'Value': 'Memory (MB)'})
-                        fig_trend.update_layout(hovermode="x unified")
+                    if fig_trend is not None:
                         st.plotly_chart(fig_trend, width='stretch')
                     else:
                         st.info("No time-series data found for selected processes.")
@@ -109,10 +139,36 @@ def render_memory_dashboard(st, df, parse_process_column, extract_process_time_s
             
             with st.expander("See Top 10 Details"):
                 st.dataframe(top_mem_df.head(10))
+                if has_records:
+                    st.caption("Per PID: CPU time used and handle growth within the selected range")
+                    st.dataframe(memoize(st, 'memory_process_summary', lambda: process_summary(records)).head(20),
+                                 hide_index=True, width='stretch')
+
+            st.divider()
+
+            # --- Leak Suspects (per-process linear trend) ---
+            st.subheader("🔍 Memory Leak Suspects (Sustained Growth)")
+            lc1, lc2 = st.columns(2)
+            min_r2 = lc1.slider("Min Fit Quality (R²)", 0.0, 1.0, 0.6, 0.05)
+            min_slope = lc2.number_input("Min Growth (MB/h)", min_value=0.0, value=10.0, step=5.0)
+
+            trends_df = memoize(st, 'memory_process_fit', lambda: fit_process_trends(ts_df), deps=(by_pid,))
+            suspects = rank_leak_suspects(trends_df, min_r2=min_r2, min_slope=min_slope)
+            if not suspects.empty:
+                fig_leak = px.bar(suspects, x='Slope(MB/h)', y='Process', orientation='h',
+                                  color='R2', color_continuous_scale='Reds', range_color=[0, 1],
+                                  title="Sustained Memory Growth by Process (MB/hour)",
+                                  hover_data=['Samples', 'Span(h)', 'Growth(MB)'])
+                fig_leak.update_layout(yaxis={'categoryorder': 'total ascending'})
+                st.plotly_chart(fig_leak, width='stretch')
+                st.dataframe(suspects, width='stretch', hide_index=True)
+            else:
+                st.info(f"No process grew steadily in the selected range ({len(trends_df)} processes fitted).")
         else:
             st.warning("No process data available.")
-            with st.expander("💀 Debug: Raw Data Inspection"):
-                st.write("First 10 rows of 'Top5_Memory_MB':")
-                st.write(df['Top5_Memory_MB'].head(10))
-                st.write("Column Type:", df['Top5_Memory_MB'].dtype)
+            if 'Top5_Memory_MB' in df.columns:
+                with st.expander("💀 Debug: Raw Data Inspection"):
+                    st.write("First 10 rows of 'Top5_Memory_MB':")
+                    st.write(df['Top5_Memory_MB'].head(10))
+                    st.write("Column Type:", df['Top5_Memory_MB'].dtype)
 
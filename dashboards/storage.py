@@ -3,6 +3,10 @@ import re
 import pandas as pd
 import plotly.express as px
 
+from figcache import cached_chart
+from derived import memoize, scoped_fingerprint
+from procrecords import records_peak
+
 DRIVE_COL_PATTERN = re.compile(r"_[A-Z]:")
 DEFAULT_MAX_PLOT_POINTS = 30000
 
@@ -55,29 +59,52 @@ def _collect_drive_columns(columns, prefixes):
     ]
 
 
-def render_storage_dashboard(st, df, parse_process_column):
-    st.subheader("Storage Performance Analysis")
-
-    quality_options = {
-        "Fast": 12000,
-        "Balanced": DEFAULT_MAX_PLOT_POINTS,
-        "Detailed": 60000,
-        "Original (slow)": None,
-    }
-    quality = st.selectbox("Chart Quality", list(quality_options.keys()), index=1)
-    max_points = quality_options[quality]
-
+def _storage_plot_frame(df):
+    """
+    Sorted plotting copy with numeric active-time columns and MB/s I/O columns.
+    Returns (plot_df, active_cols, io_display_cols, io_title).
+    """
     # Use a dedicated plotting copy to avoid mutating original app dataframe.
     plot_df = df.sort_values('Timestamp').reset_index(drop=True).copy()
-    if max_points is None and len(plot_df) > 100000:
-        st.warning("Original mode can be slow on large datasets.")
 
-    # 1) Disk Active Time
     active_cols = _collect_drive_columns(plot_df.columns, ['DiskTime_'])
-    if active_cols:
-        for col in active_cols:
-            plot_df[col] = pd.to_numeric(plot_df[col], errors='coerce')
+    for col in active_cols:
+        plot_df[col] = pd.to_numeric(plot_df[col], errors='coerce')
 
+    io_raw_cols = _collect_drive_columns(plot_df.columns, ['DiskRead_', 'DiskWrite_'])
+    io_display_cols = []
+    if io_raw_cols:
+        for col in io_raw_cols:
+            new_col = col.replace('(B/s)', '(MB/s)')
+            plot_df[new_col] = pd.to_numeric(plot_df[col], errors='coerce') / (1024 * 1024)
+            io_display_cols.append(new_col)
+        io_title = 'Per-Drive Disk I/O Throughput (MB/s)'
+    else:
+        # Fallback to total-only metrics when per-drive metrics are not present.
+        io_total_cols = [
+            col for col in plot_df.columns
+            if ('DiskRead' in col or 'DiskWrite' in col) and '_Total' in col
+        ]
+        for col in io_total_cols:
+            new_col = (
+                col.replace('(B/s)', '(MB/s)')
+                .replace('DiskRead', 'TotalRead')
+                .replace('DiskWrite', 'TotalWrite')
+            )
+            plot_df[new_col] = pd.to_numeric(plot_df[col], errors='coerce') / (1024 * 1024)
+            io_display_cols.append(new_col)
+        io_title = 'Total System Disk I/O (MB/s)'
+
+    return plot_df, active_cols, io_display_cols, io_title
+
+
+def _build_storage_figures(plot_frame, max_points):
+    """Disk active time and I/O throughput figures with their plotted point counts."""
+    plot_df, active_cols, io_display_cols, io_title = plot_frame
+    charts = {'active': None, 'io': None}
+
+    # 1) Disk Active Time
+    if active_cols:
         active_plot_df = (
             _downsample_for_plot(plot_df, active_cols, max_points=max_points)
             if max_points is not None
@@ -91,24 +118,10 @@ def render_storage_dashboard(st, df, parse_process_column):
             render_mode='webgl'
         )
         fig_load.update_layout(yaxis=dict(range=[0, 100]), hovermode='x unified')
-        st.plotly_chart(fig_load, width='stretch')
-
-        if len(active_plot_df) < len(plot_df):
-            st.caption(f"Rendering optimized: {len(plot_df):,} -> {len(active_plot_df):,} points")
-    else:
-        st.info('No Disk Drive (C:, D:, etc.) Active Time data available.')
-
-    st.divider()
+        charts['active'] = (fig_load, len(active_plot_df))
 
     # 2) Per-drive I/O throughput
-    io_raw_cols = _collect_drive_columns(plot_df.columns, ['DiskRead_', 'DiskWrite_'])
-    if io_raw_cols:
-        io_display_cols = []
-        for col in io_raw_cols:
-            new_col = col.replace('(B/s)', '(MB/s)')
-            plot_df[new_col] = pd.to_numeric(plot_df[col], errors='coerce') / (1024 * 1024)
-            io_display_cols.append(new_col)
-
+    if io_display_cols:
         io_plot_df = (
             _downsample_for_plot(plot_df, io_display_cols, max_points=max_points)
             if max_points is not None
@@ -118,55 +131,71 @@ def render_storage_dashboard(st, df, parse_process_column):
             io_plot_df,
             x='Timestamp',
             y=io_display_cols,
-            title='Per-Drive Disk I/O Throughput (MB/s)',
+            title=io_title,
             render_mode='webgl'
         )
         fig_io.update_layout(hovermode='x unified')
+        charts['io'] = (fig_io, len(io_plot_df))
+
+    return charts
+
+
+def render_storage_dashboard(st, df, parse_process_column, records=None):
+    st.subheader("Storage Performance Analysis")
+
+    quality_options = {
+        "Fast": 12000,
+        "Balanced": DEFAULT_MAX_PLOT_POINTS,
+        "Detailed": 60000,
+        "Original (slow)": None,
+    }
+    quality = st.selectbox("Chart Quality", list(quality_options.keys()), index=1)
+    max_points = quality_options[quality]
+
+    if max_points is None and len(df) > 100000:
+        st.warning("Original mode can be slow on large datasets.")
+
+    # Figures depend only on the disk columns and the quality setting (reused across reruns);
+    # the MB/s plotting frame is derived once per loaded data / time range and shared by all quality modes
+    def build():
+        plot_frame = memoize(st, 'storage_plot_frame', lambda: _storage_plot_frame(df))
+        return _build_storage_figures(plot_frame, max_points)
+
+    disk_cols = ['Timestamp'] + [c for c in df.columns if c.startswith(('DiskTime', 'DiskRead', 'DiskWrite'))]
+    charts = cached_chart('storage', scoped_fingerprint(st, 'df', df, disk_cols), (max_points,), build)
+    n_rows = len(df)
+
+    # 1) Disk Active Time
+    if charts['active'] is not None:
+        fig_load, n_points = charts['active']
+        st.plotly_chart(fig_load, width='stretch')
+        if n_points < n_rows:
+            st.caption(f"Rendering optimized: {n_rows:,} -> {n_points:,} points")
+    else:
+        st.info('No Disk Drive (C:, D:, etc.) Active Time data available.')
+
+    st.divider()
+
+    # 2) Per-drive I/O throughput (total-only fallback when per-drive metrics are not present)
+    if charts['io'] is not None:
+        fig_io, n_points = charts['io']
         st.plotly_chart(fig_io, width='stretch')
-        if len(io_plot_df) < len(plot_df):
-            st.caption(f"I/O rendering optimized: {len(plot_df):,} -> {len(io_plot_df):,} points")
+        if n_points < n_rows:
+            st.caption(f"I/O rendering optimized: {n_rows:,} -> {n_points:,} points")
     else:
-        # Fallback to total-only metrics when per-drive metrics are not present.
-        io_total_cols = [
-            col for col in plot_df.columns
-            if ('DiskRead' in col or 'DiskWrite' in col) and '_Total' in col
-        ]
-        if io_total_cols:
-            io_display_total = []
-            for col in io_total_cols:
-                new_col = (
-                    col.replace('(B/s)', '(MB/s)')
-                    .replace('DiskRead', 'TotalRead')
-                    .replace('DiskWrite', 'TotalWrite')
-                )
-                plot_df[new_col] = pd.to_numeric(plot_df[col], errors='coerce') / (1024 * 1024)
-                io_display_total.append(new_col)
-
-            io_total_plot_df = (
-                _downsample_for_plot(plot_df, io_display_total, max_points=max_points)
-                if max_points is not None
-                else plot_df
-            )
-            fig_total_io = px.line(
-                io_total_plot_df,
-                x='Timestamp',
-                y=io_display_total,
-                title='Total System Disk I/O (MB/s)',
-                render_mode='webgl'
-            )
-            fig_total_io.update_layout(hovermode='x unified')
-            st.plotly_chart(fig_total_io, width='stretch')
-            if len(io_total_plot_df) < len(plot_df):
-                st.caption(f"I/O rendering optimized: {len(plot_df):,} -> {len(io_total_plot_df):,} points")
-        else:
-            st.error('No Disk I/O data (Read/Write) found in log.')
+        st.error('No Disk I/O data (Read/Write) found in log.')
 
     st.divider()
 
     # 3) Top 5 process I/O consumers
     st.subheader('Top 5 Disk I/O Consumers')
-    if 'Top5_Disk_IO_Global(MB/s)' in df.columns:
-        top_disk_df = parse_process_column(df['Top5_Disk_IO_Global(MB/s)']).head(5)
+    if records is not None and not records.empty:
+        top_disk_df = memoize(st, 'storage_top_processes', lambda: records_peak(records, 'DiskIO_MBps')).head(5)
+    elif 'Top5_Disk_IO_Global(MB/s)' in df.columns:
+        top_disk_df = memoize(st, 'storage_top_processes', lambda: parse_process_column(df['Top5_Disk_IO_Global(MB/s)'])).head(5)
+    else:
+        top_disk_df = None
+    if top_disk_df is not None:
         if not top_disk_df.empty:
             fig_disk_bar = px.bar(
                 top_disk_df,
@@ -1,7 +1,17 @@
 # data_loader.py
+import numpy as np
 import pandas as pd
 import streamlit as st
 import os
+from sketches import build_histograms, merge_histograms
+from binlog import BINLOG_EXTENSION, read_binlog
+from archive import ARCHIVE_SUFFIX, archive_records_path
+from timeline import APPROX_SEGMENTS_ATTR, SEGMENTS_ATTR, attach_segments, is_legacy_segment_cache, read_parquet, write_parquet
+from timeparse import (
+    FAILURES_ATTR, REPORT_ATTR, describe_report, parse_timestamps, read_failures_metadata, read_report_metadata,
+    report_metadata,
+)
+from procrecords import read_process_records, records_cache_path, records_path
 
 
 def _is_parquet_cache_valid(csv_path, parquet_path):
@@ -10,6 +20,10 @@ def _is_parquet_cache_valid(csv_path, parquet_path):
     return os.path.getmtime(parquet_path) >= os.path.getmtime(csv_path)
 
 
+def _hist_path(csv_path):
+    return os.path.splitext(csv_path)[0] + '.hist.parquet'
+
+
 def _downcast_numeric(df):
     float_cols = df.select_dtypes(include=['float64']).columns
     int_cols = df.select_dtypes(include=['int64']).columns
@@ -22,6 +36,54 @@ def _downcast_numeric(df):
     return df
 
 
+def _sort_by_time(df):
+    # Sort once (stable, so equal timestamps keep file order); skip entirely when already ordered
+    if df['Timestamp'].is_monotonic_increasing:
+        return df.reset_index(drop=True)
+    return df.sort_values('Timestamp', kind='stable', ignore_index=True)
+
+
+def _asof_join(master_df, proc_df, tolerance):
+    """
+    Backward as-of join equivalent to pd.merge_asof(direction='backward').
+    The match index is computed once with np.searchsorted and the tolerance is applied as a mask.
+    Text process columns are not copied per row: they become Categoricals whose codes are the
+    match index into the process samples. Both frames must already be sorted by Timestamp.
+    """
+    proc_df = proc_df[proc_df['Timestamp'].notna()]
+    n_proc = len(proc_df)
+    master_ts = master_df['Timestamp'].to_numpy(dtype='datetime64[ns]').view('i8')
+    proc_ts = proc_df['Timestamp'].to_numpy(dtype='datetime64[ns]').view('i8')
+
+    # Searching the few process samples in the long master timeline is far cheaper than the reverse:
+    # sample j applies from master row pos[j] onwards, so a running count gives each row's match.
+    n_valid = int(master_df['Timestamp'].notna().sum())  # NaT rows are sorted last
+    pos = np.searchsorted(master_ts[:n_valid], proc_ts, side='left')
+    idx = np.full(len(master_ts), -1, dtype=np.int64)
+    idx[:n_valid] = np.cumsum(np.bincount(pos, minlength=n_valid + 1)[:n_valid]) - 1
+
+    valid = idx >= 0
+    if n_proc:
+        valid &= (master_ts - proc_ts[np.maximum(idx, 0)]) <= tolerance.value
+    # Unmatched rows point one past the end, at a NaN / missing-category sentinel
+    idx[~valid] = n_proc
+
+    merged = master_df.copy(deep=False)
+    for col in proc_df.columns:
+        if col == 'Timestamp' or col in merged.columns:
+            continue
+        values = proc_df[col]
+        if pd.api.types.is_numeric_dtype(values):
+            merged[col] = np.append(values.to_numpy(dtype='float64'), np.nan).take(idx)
+        else:
+            codes, uniques = pd.factorize(values)
+            code_dtype = np.int8 if len(uniques) < 127 else np.int16 if len(uniques) < 32767 else np.int32
+            row_codes = np.append(codes, -1).astype(code_dtype).take(idx)
+            merged[col] = pd.Categorical.from_codes(row_codes, categories=uniques)
+
+    return merged
+
+
 @st.cache_data
 def load_data(files):
     """
@@ -30,15 +92,29 @@ def load_data(files):
     2. Monitor CSVs (Process Details: 30s) - Contains 'System_Log' in filename (or others)
     """
     import concurrent.futures
-    
-    logman_dfs = []
-    process_dfs = []
-    
+
     # Process files in parallel
     max_workers = min(8, max(1, len(files)))
     with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
-        results = executor.map(process_single_file, files)
-        
+        results = list(executor.map(process_single_file, files))
+
+    return merge_file_results(results)
+
+
+def merge_file_results(results):
+    """
+    Combines `process_single_file` results for ONE machine:
+    Logman rows form the master timeline and process rows are attached with an as-of join.
+    """
+    logman_dfs = []
+    process_dfs = []
+    # Per-file timestamp parse failures, surfaced on the merged frame (archives carry several)
+    failures = tuple(
+        summary for res in results if res is not None
+        for summary in (res[1].attrs.get(REPORT_ATTR),) + tuple(res[1].attrs.get(FAILURES_ATTR) or ())
+        if summary
+    )
+
     for res in results:
         if res is None: continue
         rtype, df = res
@@ -50,30 +126,27 @@ def load_data(files):
 
     # 1. Combine Logman Data (Master Timeline)
     master_df = None
+    segment_attrs = {}
     if logman_dfs:
-        master_df = pd.concat(logman_dfs, ignore_index=True).sort_values('Timestamp')
+        master_df = _sort_by_time(pd.concat(logman_dfs, ignore_index=True))
+        # Fixed-stride runs get a segment table; only an exact one (every logged timestamp on it)
+        # is used for index arithmetic (timeline.time_slice). Logged timestamps are never changed.
+        attach_segments(master_df)
+        segment_attrs = {k: master_df.attrs[k] for k in (SEGMENTS_ATTR, APPROX_SEGMENTS_ATTR) if k in master_df.attrs}
         
     # 2. Combine Process Data
     proc_df = None
     if process_dfs:
-        proc_df = pd.concat(process_dfs, ignore_index=True).sort_values('Timestamp')
+        proc_df = _sort_by_time(pd.concat(process_dfs, ignore_index=True))
 
     # 3. Merge Strategies
     if master_df is not None and proc_df is not None:
-        # Merge Process Data onto Master Timeline using nearest backward match (tolerate 30s lag)
-        master_df = master_df.sort_values('Timestamp')
-        proc_df = proc_df.sort_values('Timestamp')
-        
-        merged = pd.merge_asof(
-            master_df, 
-            proc_df, 
-            on='Timestamp', 
-            direction='backward',
-            tolerance=pd.Timedelta(seconds=35) # Allow 30s + buffer
-        )
+        # Attach Process Data onto Master Timeline using nearest backward match (tolerate 30s lag)
+        merged = _asof_join(master_df, proc_df, tolerance=pd.Timedelta(seconds=35)) # Allow 30s + buffer
         # Fill strictly static info (IP, Total Mem) if missing due to start time diff
         # Actually forward fill might leave NaNs at the very start if proc started later
-        merged[['PhysicalMem(GB)', 'OSTotalMem(GB)']] = merged[['PhysicalMem(GB)', 'OSTotalMem(GB)']].bfill().ffill()
+        static_cols = [c for c in ['PhysicalMem(GB)', 'OSTotalMem(GB)'] if c in merged.columns]
+        merged[static_cols] = merged[static_cols].bfill().ffill()
         
         # Calculate derived columns common to old app.py logic
         # Logman gives AvailableMem, we need Used(GB), Usage(%)
@@ -83,29 +156,221 @@ def load_data(files):
              merged['Used(GB)'] = (merged['OSTotalMem(GB)'] * 1024 - merged['AvailableMem(MB)']) / 1024
              merged['Usage(%)'] = (merged['Used(GB)'] / merged['OSTotalMem(GB)']) * 100
 
-        return _downcast_numeric(merged)
+        merged = _downcast_numeric(merged)
+        merged.attrs.update(segment_attrs)
+        merged.attrs[FAILURES_ATTR] = failures
+        return merged
         
     elif master_df is not None:
-        return _downcast_numeric(master_df) # Only global data
+        master_df = _downcast_numeric(master_df) # Only global data
+        master_df.attrs.update(segment_attrs)
+        master_df.attrs[FAILURES_ATTR] = failures
+        return master_df
     elif proc_df is not None:
-        return _downcast_numeric(proc_df) # Only process data (fallback to old behavior)
+        proc_df = _downcast_numeric(proc_df) # Only process data (fallback to old behavior)
+        proc_df.attrs[FAILURES_ATTR] = failures
+        return proc_df
         
     return None
 
+def _load_file_histograms(f):
+    is_local_file = isinstance(f, str)
+    fname = f if is_local_file else f.name
+    if "Global_Usage" not in fname:
+        return None
+
+    if is_local_file and _is_parquet_cache_valid(f, _hist_path(f)):
+        try:
+            return pd.read_parquet(_hist_path(f))
+        except:
+            pass
+
+    if not is_local_file:
+        f.seek(0)
+    res = process_single_file(f)
+    if res is None:
+        return None
+    hist = build_histograms(res[1])
+    if is_local_file:
+        try:
+            hist.to_parquet(_hist_path(f), index=False)
+        except:
+            pass
+    return hist
+
+
+@st.cache_data
+def load_histograms(files):
+    """
+    Loads the per-file percentile histograms (hourly buckets) for Logman files and merges them.
+    Local files reuse the `.hist.parquet` sidecar written at ingest; uploads are sketched on the fly.
+    """
+    hist_frames = [_load_file_histograms(f) for f in files]
+    return merge_histograms(hist_frames)
+
+
+def _load_file_records(f):
+    if not isinstance(f, str) or "Global_Usage" in os.path.basename(f):
+        return None
+    if f.endswith(ARCHIVE_SUFFIX):
+        path = archive_records_path(f)
+        return pd.read_parquet(path) if os.path.exists(path) else None
+    path = records_path(f)
+    if path is None or not os.path.exists(path):
+        return None
+
+    cache_path = records_cache_path(path)
+    if _is_parquet_cache_valid(path, cache_path):
+        try:
+            return pd.read_parquet(cache_path)
+        except:
+            pass
+
+    try:
+        records = read_process_records(path)
+    except OSError:
+        return None
+    try:
+        records.to_parquet(cache_path, index=False)
+    except:
+        pass
+    return records
+
+
+@st.cache_data
+def load_process_records(files):
+    """
+    Loads the structured process records (`*.procs.jsonl`, see procrecords.py) that sit next to
+    the selected process logs, merged and sorted by Timestamp. None when no log has them
+    (older captures, uploads): callers then use the Top5 strings.
+    """
+    frames = [r for r in (_load_file_records(f) for f in files) if r is not None and not r.empty]
+    if not frames:
+        return None
+    records = _sort_by_time(pd.concat(frames, ignore_index=True))
+    records['Process'] = records['Process'].astype('category')
+    return records
+
+
+def normalize_logman_columns(columns):
+    """Maps raw PDH counter headers to the friendly column names used by the dashboards."""
+    # Rename columns from "\Object\Counter" to friendly names
+    # Mapping dictionary for EXACT matches
+    rename_map = {
+        r'Processor(_Total)\% Processor Time': 'CPU(%)',
+        r'Memory\Available MBytes': 'AvailableMem(MB)',
+        r'Memory\Committed Bytes': 'CommittedBytes',
+        # Disk Read/Write Total only
+        r'LogicalDisk(_Total)\Disk Read Bytes/sec': 'DiskRead(B/s)',
+        r'LogicalDisk(_Total)\Disk Write Bytes/sec': 'DiskWrite(B/s)'
+    }
+    
+    new_cols = []
+    import re
+    
+    for c in columns:
+        # 1. Check exact map
+        found = False
+        for key, val in rename_map.items():
+            if key in c:
+                new_cols.append(val)
+                found = True
+                break
+        
+        if found: continue
+
+        # 2. Check Dynamic Disk Patterns (Regex)
+        # Pattern: ...\LogicalDisk(C:)\% Disk Time -> DiskTime_C(%)
+        # Pattern: ...\LogicalDisk(C:)\Current Disk Queue Length -> DiskQueue_C
+        
+        # Disk Time
+        match_time = re.search(r'LogicalDisk\((.*)\)\\% Disk Time', c)
+        if match_time:
+            drive_letter = match_time.group(1) # e.g. "C:" or "_Total"
+            if drive_letter == "_Total":
+                new_cols.append("DiskTime(%)")
+            else:
+                new_cols.append(f"DiskTime_{drive_letter}(%)")
+            continue
+            
+        # Disk Queue
+        match_queue = re.search(r'LogicalDisk\((.*)\)\\Current Disk Queue Length', c)
+        if match_queue:
+            drive_letter = match_queue.group(1)
+            if drive_letter == "_Total":
+                new_cols.append("DiskQueue")
+            else:
+                new_cols.append(f"DiskQueue_{drive_letter}")
+            continue
+        
+        # Disk Read Speed
+        match_read = re.search(r'LogicalDisk\((.*)\)\\Disk Read Bytes/sec', c)
+        if match_read:
+            drive_letter = match_read.group(1)
+            if drive_letter == "_Total":
+                new_cols.append("DiskRead(B/s)")
+            else:
+                new_cols.append(f"DiskRead_{drive_letter}(B/s)")
+            continue
+
+        # Disk Write Speed
+        match_write = re.search(r'LogicalDisk\((.*)\)\\Disk Write Bytes/sec', c)
+        if match_write:
+            drive_letter = match_write.group(1)
+            if drive_letter == "_Total":
+                new_cols.append("DiskWrite(B/s)")
+            else:
+                new_cols.append(f"DiskWrite_{drive_letter}(B/s)")
+            continue
+            
+        if "PDH-CSV" in c:
+            new_cols.append("Timestamp") # First column is timestamp
+        else:
+            new_cols.append(c) # Keep original if unknown catch
+    
+    return new_cols
+
+
+def _parse_timestamp_column(df, raw_columns, fname):
+    """
+    Parses df['Timestamp'] with the detected format. Rows that do not parse are dropped;
+    the returned summary (None if all parsed) is kept in df.attrs[REPORT_ATTR].
+    """
+    df['Timestamp'], report = parse_timestamps(df['Timestamp'], raw_columns)
+    summary = None
+    if report is not None:
+        df = df.drop(index=df.index[report['failed_rows']]).reset_index(drop=True)
+        summary = describe_report(os.path.basename(fname), report)
+    df.attrs[REPORT_ATTR] = summary
+    return df, summary
+
+
 def process_single_file(f):
     try:
         # Check filename if string, or name attribute if UploadedFile
         is_local_file = isinstance(f, str)
         fname = f if is_local_file else f.name
+
+        # Binary sample logs are memory-mapped directly: no text parsing, no parquet cache needed
+        if is_local_file and fname.endswith(BINLOG_EXTENSION):
+            header, df = read_binlog(f)
+            return (header.get('source', 'logman'), df)
+
+        # Monthly archives (archive.py) are already sorted, typed parquet
+        if is_local_file and fname.endswith(ARCHIVE_SUFFIX):
+            df = read_parquet(f)
+            df.attrs[FAILURES_ATTR] = read_failures_metadata(f)
+            return ('logman' if "Global_Usage" in os.path.basename(fname) else 'process', df)
         
         # [Optimization] Parquet Caching for Local Files
         # If we have a local CSV, check if we already have a compiled .parquet version
         if is_local_file:
             parquet_path = f.replace('.csv', '.parquet')
-            if _is_parquet_cache_valid(f, parquet_path):
+            if _is_parquet_cache_valid(f, parquet_path) and not is_legacy_segment_cache(parquet_path):
                 try:
                     # Load cached parquet - extremely fast
-                    df = pd.read_parquet(parquet_path)
+                    df = read_parquet(parquet_path)
+                    df.attrs[REPORT_ATTR] = read_report_metadata(parquet_path)
                     return ('logman' if "Global_Usage" in fname else 'process', df)
                 except:
                     # If parquet load fails (corrupt?), fallback to CSV
@@ -127,89 +392,13 @@ def process_single_file(f):
             if df.columns[0].startswith("(PDH-CSV"):
                 pass
             
-            # Rename columns from "\Object\Counter" to friendly names
-            # Mapping dictionary for EXACT matches
-            rename_map = {
-                r'Processor(_Total)\% Processor Time': 'CPU(%)',
-                r'Memory\Available MBytes': 'AvailableMem(MB)',
-                r'Memory\Committed Bytes': 'CommittedBytes',
-                # Disk Read/Write Total only
-                r'LogicalDisk(_Total)\Disk Read Bytes/sec': 'DiskRead(B/s)',
-                r'LogicalDisk(_Total)\Disk Write Bytes/sec': 'DiskWrite(B/s)'
-            }
-            
-            new_cols = []
-            import re
-            
-            for c in df.columns:
-                # 1. Check exact map
-                found = False
-                for key, val in rename_map.items():
-                    if key in c:
-                        new_cols.append(val)
-                        found = True
-                        break
-                
-                if found: continue
-
-                # 2. Check Dynamic Disk Patterns (Regex)
-                # Pattern: ...\LogicalDisk(C:)\% Disk Time -> DiskTime_C(%)
-                # Pattern: ...\LogicalDisk(C:)\Current Disk Queue Length -> DiskQueue_C
-                
-                # Disk Time
-                match_time = re.search(r'LogicalDisk\((.*)\)\\% Disk Time', c)
-                if match_time:
-                    drive_letter = match_time.group(1) # e.g. "C:" or "_Total"
-                    if drive_letter == "_Total":
-                        new_cols.append("DiskTime(%)")
-                    else:
-                        new_cols.append(f"DiskTime_{drive_letter}(%)")
-                    continue
-                    
-                # Disk Queue
-                match_queue = re.search(r'LogicalDisk\((.*)\)\\Current Disk Queue Length', c)
-                if match_queue:
-                    drive_letter = match_queue.group(1)
-                    if drive_letter == "_Total":
-                        new_cols.append("DiskQueue")
-                    else:
-                        new_cols.append(f"DiskQueue_{drive_letter}")
-                    continue
-                
-                # Disk Read Speed
-                match_read = re.search(r'LogicalDisk\((.*)\)\\Disk Read Bytes/sec', c)
-                if match_read:
-                    drive_letter = match_read.group(1)
-                    if drive_letter == "_Total":
-                        new_cols.append("DiskRead(B/s)")
-                    else:
-                        new_cols.append(f"DiskRead_{drive_letter}(B/s)")
-                    continue
-
-                # Disk Write Speed
-                match_write = re.search(r'LogicalDisk\((.*)\)\\Disk Write Bytes/sec', c)
-                if match_write:
-                    drive_letter = match_write.group(1)
-                    if drive_letter == "_Total":
-                        new_cols.append("DiskWrite(B/s)")
-                    else:
-                        new_cols.append(f"DiskWrite_{drive_letter}(B/s)")
-                    continue
-                    
-                if "PDH-CSV" in c:
-                    new_cols.append("Timestamp") # First column is timestamp
-                else:
-                    new_cols.append(c) # Keep original if unknown catch
-            
-            df.columns = new_cols
+            raw_columns = list(df.columns)
+            df.columns = normalize_logman_columns(df.columns)
             
             # Convert timestamp
             # Logman Format: "MM/DD/YYYY HH:MM:SS.mmm" e.g. "02/06/2026 11:51:16.208"
-            # Optimization: Try explicit format first.
-            try:
-                df['Timestamp'] = pd.to_datetime(df['Timestamp'], format='%m/%d/%Y %H:%M:%S.%f').astype('datetime64[ns]')
-            except:
-                df['Timestamp'] = pd.to_datetime(df['Timestamp'], errors='coerce').astype('datetime64[ns]')
+            # Format is detected once per header signature; unparseable rows are dropped and reported
+            df, summary = _parse_timestamp_column(df, raw_columns, fname)
             
             # Enforce numeric conversion for known metric columns
             # Logman CSVs often wrap numbers in quotes, reading them as strings if not careful
@@ -225,11 +414,16 @@ def process_single_file(f):
                     df[col] = pd.to_numeric(df[col], errors='coerce')
 
             df = _downcast_numeric(df)
+
+            # Regular -si sampling: an exact segment table replaces the stored Timestamp column
+            attach_segments(df)
             
             # [Optimization] Save to Parquet for next time
             if is_local_file:
                  try:
-                     df.to_parquet(parquet_path, index=False)
+                     write_parquet(df, parquet_path, metadata=report_metadata(summary))
+                     # Percentile sketches are built once at ingest and cached next to the parquet
+                     build_histograms(df).to_parquet(_hist_path(f), index=False)
                  except:
                      pass
 
@@ -238,14 +432,14 @@ def process_single_file(f):
         else:
             # Regular Monitor.ps1 CSV
             df.columns = [c.strip() for c in df.columns]
-            # Monitor.ps1 usually uses standard ISO-like or locale dependent. errors='coerce' is safe.
-            df['Timestamp'] = pd.to_datetime(df['Timestamp'], errors='coerce').astype('datetime64[ns]')
+            # Monitor.ps1 writes "yyyy-MM-dd HH:mm:ss", but hand-exported logs may follow the locale
+            df, summary = _parse_timestamp_column(df, list(df.columns), fname)
             
             if is_local_file:
                  try:
                      # For process logs, we also cache
                      parquet_path = f.replace('.csv', '.parquet')
-                     df.to_parquet(parquet_path, index=False)
+                     write_parquet(df, parquet_path, metadata=report_metadata(summary))
                  except:
                      pass
 
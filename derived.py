@@ -0,0 +1,89 @@
+# derived.py
+"""
+Session-scoped memoization of derived data (KPIs, process time series, converted columns,
+chart fingerprints).
+
+Entries live in st.session_state and belong to a scope: the signature of the loaded files
+(path, size, mtime) plus the selected time range. app.py sets the scope once per rerun; when a
+file changes on disk or the range moves, every entry of the old scope is dropped, so nothing
+derived from stale data survives. Inside a scope an entry is keyed by its name and explicit
+`deps` (widget values it depends on), so toggling an unrelated checkbox costs only the render.
+"""
+import os
+
+SESSION_KEY = '_derived'
+
+
+def files_signature(files):
+    """Hashable identity of the loaded inputs: local paths with size/mtime, uploads by name/size."""
+    signature = []
+    for f in files:
+        if isinstance(f, str):
+            try:
+                stat = os.stat(f)
+                signature.append((f, stat.st_size, stat.st_mtime_ns))
+            except OSError:
+                signature.append((f, None, None))
+        else:
+            signature.append((getattr(f, 'file_id', None) or f.name, getattr(f, 'size', None), None))
+    return tuple(sorted(signature, key=repr))
+
+
+def _store(st):
+    state = st.session_state
+    if SESSION_KEY not in state:
+        state[SESSION_KEY] = {'scope': None, 'entries': {}, 'hits': 0, 'misses': 0, 'invalidations': 0}
+    return state[SESSION_KEY]
+
+
+def set_scope(st, files, time_range=None):
+    """Declares what the current df was derived from; a different scope drops all entries."""
+    store = _store(st)
+    scope = (files_signature(files), tuple(time_range) if time_range is not None else None)
+    if scope != store['scope']:
+        if store['entries']:
+            store['invalidations'] += 1
+        store['scope'] = scope
+        store['entries'] = {}
+
+
+def memoize(st, name, compute, deps=()):
+    """
+    Returns compute() for (name, deps) within the current scope, computing it once.
+    `deps` must be hashable. Without a scope (set_scope not called) nothing is stored.
+    """
+    store = _store(st)
+    if store['scope'] is None:
+        store['misses'] += 1
+        return compute()
+    key = (name, deps)
+    if key in store['entries']:
+        store['hits'] += 1
+        return store['entries'][key]
+    store['misses'] += 1
+    value = compute()
+    store['entries'][key] = value
+    return value
+
+
+def scoped_fingerprint(st, name, df, columns=None):
+    """
+    figcache.data_fingerprint of `df[columns]`, hashed once per scope. `name` identifies the
+    frame (e.g. 'df', 'records'): two frames sharing a column list must not share a fingerprint.
+    """
+    from figcache import data_fingerprint
+
+    return memoize(st, ('fingerprint', name), lambda: data_fingerprint(df, columns),
+                   deps=tuple(columns) if columns is not None else None)
+
+
+def memo_stats(st):
+    store = _store(st)
+    lookups = store['hits'] + store['misses']
+    return {
+        'hits': store['hits'],
+        'misses': store['misses'],
+        'hit_rate': store['hits'] / lookups if lookups else 0.0,
+        'entries': len(store['entries']),
+        'invalidations': store['invalidations'],
+    }
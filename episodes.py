@@ -0,0 +1,117 @@
+# episodes.py
+import numpy as np
+import pandas as pd
+
+EPISODE_COLUMNS = ['Rule', 'Start', 'End', 'Duration', 'Peak', 'Mean', 'Samples']
+PROCESS_COLUMNS = ['Top5_Memory_MB', 'Top5_Disk_IO_Global(MB/s)']
+
+
+def _empty_episodes(extra_cols=()):
+    return pd.DataFrame(columns=EPISODE_COLUMNS + list(extra_cols))
+
+
+def find_episodes(df, column, threshold, min_duration=0, above=True, max_gap=None, rule_name=None):
+    """
+    Run-length encodes `column > threshold` (or `<` when above=False) and returns
+    one row per episode: Start, End, Duration, Peak, Mean, Samples.
+    End is the first sample after the run, so N samples at 1s give N seconds.
+    Runs are split on sampling gaps larger than `max_gap` (default: 3x median interval).
+    The Top5 process strings active at each episode's peak are joined when present.
+    """
+    proc_cols = [c for c in PROCESS_COLUMNS if c in df.columns]
+    if column not in df.columns or df.empty:
+        return _empty_episodes(proc_cols)
+
+    data = df[['Timestamp', column] + proc_cols]
+    data = data[data['Timestamp'].notna()]
+    if not data['Timestamp'].is_monotonic_increasing:
+        data = data.sort_values('Timestamp', kind='stable')
+
+    n_rows = len(data)
+    if n_rows == 0:
+        return _empty_episodes(proc_cols)
+
+    ts = data['Timestamp'].to_numpy(dtype='datetime64[ns]').view('i8')
+    vals = pd.to_numeric(data[column], errors='coerce').to_numpy(dtype='float64')
+
+    # NaN compares False, so missing samples always terminate a run
+    mask = vals > threshold if above else vals < threshold
+    if not mask.any():
+        return _empty_episodes(proc_cols)
+
+    dt = np.diff(ts)
+    step = int(np.median(dt)) if len(dt) else 0
+    gap_limit = int(pd.Timedelta(max_gap).value) if max_gap is not None else 3 * step
+
+    # gap_before[i] is True when the interval (i-1 -> i) is too large to bridge
+    gap_before = np.zeros(n_rows, dtype=bool)
+    if len(dt) and gap_limit > 0:
+        gap_before[1:] = dt > gap_limit
+    gap_after = np.append(gap_before[1:], True)
+
+    prev_mask = np.append(False, mask[:-1])
+    next_mask = np.append(mask[1:], False)
+    start_flags = mask & (~prev_mask | gap_before)
+    starts = np.flatnonzero(start_flags)
+    ends = np.flatnonzero(mask & (~next_mask | gap_after))
+
+    # Episode end = next sample timestamp when it is contiguous, else last sample + one interval
+    after = np.minimum(ends + 1, n_rows - 1)
+    contiguous_next = (ends + 1 < n_rows) & ~gap_after[ends]
+    start_ts = ts[starts]
+    end_ts = np.where(contiguous_next, ts[after], ts[ends] + step)
+    durations = end_ts - start_ts
+
+    # Per-run statistics over masked rows only
+    run_rows = np.flatnonzero(mask)
+    run_ids = np.cumsum(start_flags)[run_rows] - 1
+    run_vals = vals[run_rows]
+    samples = np.bincount(run_ids, minlength=len(starts))
+    means = np.bincount(run_ids, weights=run_vals, minlength=len(starts)) / samples
+
+    order = np.lexsort((-run_vals if above else run_vals, run_ids))
+    _, first = np.unique(run_ids[order], return_index=True)
+    peak_rows = run_rows[order[first]]
+
+    keep = durations >= int(pd.Timedelta(seconds=min_duration).value)
+    if not keep.any():
+        return _empty_episodes(proc_cols)
+
+    result = pd.DataFrame({
+        'Rule': rule_name or f"{column} {'>' if above else '<'} {threshold:g}",
+        'Start': pd.to_datetime(start_ts[keep]),
+        'End': pd.to_datetime(end_ts[keep]),
+        'Duration': pd.to_timedelta(durations[keep]),
+        'Peak': vals[peak_rows[keep]],
+        'Mean': means[keep],
+        'Samples': samples[keep],
+    })
+    for col in proc_cols:
+        result[col] = data[col].to_numpy()[peak_rows[keep]]
+
+    return result
+
+
+def find_episodes_for_rules(df, rules):
+    """
+    Evaluates several rules at once. Each rule is a dict with
+    'Metric', 'Operator' ('>' or '<'), 'Threshold' and 'Min Duration (s)'.
+    """
+    frames = []
+    for rule in rules:
+        metric = rule.get('Metric')
+        threshold = rule.get('Threshold')
+        if not metric or threshold is None or pd.isna(threshold):
+            continue
+        min_duration = rule.get('Min Duration (s)')
+        if min_duration is None or pd.isna(min_duration):
+            min_duration = 0  # a row just added in the editor has NaN here
+        above = rule.get('Operator', '>') != '<'
+        name = f"{metric} {'>' if above else '<'} {float(threshold):g} for {float(min_duration):g}s+"
+        episodes = find_episodes(df, metric, float(threshold), float(min_duration), above=above, rule_name=name)
+        if not episodes.empty:
+            frames.append(episodes)
+
+    if not frames:
+        return _empty_episodes([c for c in PROCESS_COLUMNS if c in df.columns])
+    return pd.concat(frames, ignore_index=True).sort_values('Start', ignore_index=True)
@@ -0,0 +1,104 @@
+# figcache.py
+"""
+Process-wide cache for built Plotly figures and chart payloads.
+
+Streamlit reruns the whole script on every widget change; dashboards wrap their figure builders
+in `cached_chart` so a chart whose input data and options did not change is reused instead of
+being rebuilt. Entries are keyed by a content fingerprint of only the columns the chart plots,
+plus its render options, and evicted least-recently-used once FIGURE_CACHE_MB is exceeded.
+Cached figures are shared between reruns and sessions: callers must not modify them.
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from config import FIGURE_CACHE_MB
+
+_TRACE_ARRAYS = ('x', 'y', 'z', 'text', 'customdata', 'base')
+
+_lock = threading.Lock()
+_entries = OrderedDict()  # key -> (payload, nbytes)
+_stats = {'hits': 0, 'misses': 0, 'bytes': 0}
+
+
+def data_fingerprint(df, columns=None):
+    """
+    Content hash of `df[columns]`: shape, dtypes and every row of the selected columns, so a
+    change anywhere (including string / categorical columns such as Top5_*) alters it. Hashing
+    is O(rows); dashboards call it through derived.scoped_fingerprint, once per scope.
+    """
+    columns = [c for c in (columns if columns is not None else df.columns) if c in df.columns]
+    h = hashlib.sha1()
+    h.update(repr((len(df), [(c, str(df[c].dtype)) for c in columns])).encode('utf-8'))
+    if len(df) and columns:
+        h.update(pd.util.hash_pandas_object(df[columns], index=False).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+def _payload_bytes(obj):
+    """Approximate memory held by a cached payload (figure trace arrays, frames, containers)."""
+    if obj is None:
+        return 0
+    if isinstance(obj, pd.DataFrame):
+        return int(obj.memory_usage(index=False).sum())
+    if isinstance(obj, (pd.Series, np.ndarray)):
+        return int(obj.nbytes)
+    if isinstance(obj, (list, tuple)):
+        return sum(_payload_bytes(o) for o in obj)
+    if isinstance(obj, dict):
+        return sum(_payload_bytes(o) for o in obj.values())
+    data = getattr(obj, 'data', None)
+    if isinstance(data, tuple):  # plotly Figure
+        total = 0
+        for trace in data:
+            for prop in _TRACE_ARRAYS:
+                value = getattr(trace, prop, None) if prop in trace else None
+                if value is None:
+                    continue
+                total += value.nbytes if hasattr(value, 'nbytes') else len(value) * 8
+        return total
+    return 0
+
+
+def cached_chart(name, fingerprint, options, build):
+    """
+    Returns build() for (name, fingerprint, options), reusing the cached result when present.
+    `options` must be hashable (tuples of widget values etc.).
+    """
+    key = (name, fingerprint, options)
+    with _lock:
+        entry = _entries.get(key)
+        if entry is not None:
+            _entries.move_to_end(key)
+            _stats['hits'] += 1
+            return entry[0]
+        _stats['misses'] += 1
+
+    payload = build()
+    nbytes = max(1024, _payload_bytes(payload))
+    limit = FIGURE_CACHE_MB * 1024 ** 2
+    if nbytes > limit:
+        return payload
+
+    with _lock:
+        if key not in _entries:
+            _entries[key] = (payload, nbytes)
+            _stats['bytes'] += nbytes
+        while _stats['bytes'] > limit and _entries:
+            _, (_, evicted) = _entries.popitem(last=False)
+            _stats['bytes'] -= evicted
+    return payload
+
+
+def figure_cache_stats():
+    with _lock:
+        return dict(_stats, entries=len(_entries))
+
+
+def clear_figure_cache():
+    with _lock:
+        _entries.clear()
+        _stats.update(hits=0, misses=0, bytes=0)
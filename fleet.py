@@ -0,0 +1,173 @@
+# fleet.py
+import concurrent.futures
+import hashlib
+import os
+
+import pandas as pd
+import streamlit as st
+
+from data_loader import process_single_file, merge_file_results
+from parsers import parse_process_column
+from binlog import BINLOG_EXTENSION, drop_converted_csvs
+from archive import ARCHIVE_SUFFIX
+
+# Fleet layout: one sub-directory per host under the fleet root, e.g.
+#   C:\SystemLogs\Fleet\WS-0012\Global_Usage_*.csv, System_Log_*.csv
+# A host is a folder, not an IP_Address: only the process log carries the IP, so the Logman rows
+# of a folder cannot be split by it. A folder seen with several IPs is flagged (IP_Count > 1).
+ROLLUP_FILENAME = '_host_rollup.parquet'
+PROCESS_COLUMNS = {'Top5_Memory_MB': 'Memory', 'Top5_Disk_IO_Global(MB/s)': 'DiskIO'}
+
+
+def list_host_files(host_dir):
+    names = [f for f in os.listdir(host_dir) if f.endswith(('.csv', BINLOG_EXTENSION, ARCHIVE_SUFFIX))]
+    return sorted(os.path.join(host_dir, f) for f in drop_converted_csvs(names))
+
+
+def discover_hosts(root_dir):
+    """Returns {host_name: [csv paths]} for every sub-directory of `root_dir` holding logs."""
+    hosts = {}
+    if not os.path.isdir(root_dir):
+        return hosts
+    for entry in sorted(os.scandir(root_dir), key=lambda e: e.name):
+        if entry.is_dir():
+            files = list_host_files(entry.path)
+            if files:
+                hosts[entry.name] = files
+    return hosts
+
+
+def _files_signature(files):
+    h = hashlib.sha1()
+    for f in files:
+        stat = os.stat(f)
+        h.update(f"{os.path.basename(f)}|{stat.st_size}|{stat.st_mtime_ns}\n".encode('utf-8'))
+    return h.hexdigest()
+
+
+def _top_processes_string(df, col, n=5):
+    """Encodes the host's top-N peak processes in the same 'name:value | ...' form as Monitor.ps1."""
+    if col not in df.columns:
+        return ""
+    top = parse_process_column(df[col]).head(n)
+    return " | ".join(f"{name}:{value:.1f}" for name, value in zip(top['Process'], top['Max_Value']))
+
+
+def compute_host_rollup(host, df):
+    """Summarises one host's merged frame into a single comparison row."""
+    row = {
+        'Host': host,
+        'IP_Address': None,
+        'Rows': len(df),
+        'Start': df['Timestamp'].min(),
+        'End': df['Timestamp'].max(),
+    }
+    if 'IP_Address' in df.columns and df['IP_Address'].notna().any():
+        ips = df['IP_Address'].dropna().astype(str)
+        row['IP_Address'] = ips.iloc[-1]
+        # More than one (e.g. DHCP change, or several hosts' logs copied into one folder)
+        row['IP_Count'] = ips.nunique()
+
+    metric_stats = {
+        'CPU(%)': ['max', 'mean', 'p95'],
+        'Usage(%)': ['max', 'mean', 'p95'],
+        'Used(GB)': ['max'],
+        'OSTotalMem(GB)': ['max'],
+        'DiskQueue': ['max', 'p95'],
+        'DiskTime(%)': ['max', 'mean'],
+    }
+    for col, stats in metric_stats.items():
+        if col not in df.columns:
+            continue
+        values = pd.to_numeric(df[col], errors='coerce')
+        for stat in stats:
+            label = {'max': 'Peak', 'mean': 'Avg', 'p95': 'p95'}[stat]
+            row[f'{label} {col}'] = float(values.quantile(0.95) if stat == 'p95' else getattr(values, stat)())
+
+    for col, kind in PROCESS_COLUMNS.items():
+        row[f'Top_{kind}_Processes'] = _top_processes_string(df, col)
+
+    return row
+
+
+def load_host_rollup(host, files):
+    """
+    Returns the cached rollup for `host`, rebuilding it only when its log files changed.
+    The rollup sidecar is a one-row parquet tagged with a size/mtime signature of the inputs.
+    """
+    host_dir = os.path.dirname(files[0])
+    rollup_path = os.path.join(host_dir, ROLLUP_FILENAME)
+    signature = _files_signature(files)
+
+    if os.path.exists(rollup_path):
+        try:
+            cached = pd.read_parquet(rollup_path)
+            if not cached.empty and cached['Signature'].iloc[0] == signature:
+                return cached.iloc[0].to_dict()
+        except:
+            pass
+
+    df = merge_file_results([process_single_file(f) for f in files])
+    if df is None or df.empty:
+        return None
+
+    row = compute_host_rollup(host, df)
+    row['Signature'] = signature
+    try:
+        pd.DataFrame([row]).to_parquet(rollup_path, index=False)
+    except:
+        pass
+    return row
+
+
+@st.cache_data
+def load_fleet_rollups(root_dir, signature=None):
+    """
+    Loads per-host rollups for every host under `root_dir` in parallel.
+    `signature` is only used as part of the cache key (see `fleet_signature`).
+    """
+    hosts = discover_hosts(root_dir)
+    if not hosts:
+        return pd.DataFrame()
+
+    max_workers = min(8, len(hosts))
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        rows = list(executor.map(lambda item: load_host_rollup(*item), hosts.items()))
+
+    rollups = pd.DataFrame([r for r in rows if r is not None])
+    if rollups.empty:
+        return rollups
+    return rollups.drop(columns=['Signature'], errors='ignore').sort_values('Host', ignore_index=True)
+
+
+def fleet_signature(root_dir):
+    """Cheap change detector for the whole fleet (names, sizes and mtimes only)."""
+    hosts = discover_hosts(root_dir)
+    parts = [f"{host}:{_files_signature(files)}" for host, files in hosts.items()]
+    return hashlib.sha1("\n".join(parts).encode('utf-8')).hexdigest()
+
+
+def fleet_offenders(rollups, kind='Memory'):
+    """
+    Worst processes fleet-wide from the per-host top lists:
+    peak value, the host where it peaked and how many hosts it appears on.
+    """
+    col = f'Top_{kind}_Processes'
+    if rollups is None or rollups.empty or col not in rollups.columns:
+        return pd.DataFrame(columns=['Process', 'Peak', 'Worst_Host', 'Hosts'])
+
+    rows = []
+    for host, data_str in zip(rollups['Host'], rollups[col]):
+        for _, proc in parse_process_column(pd.Series([data_str])).iterrows():
+            rows.append((proc['Process'], proc['Max_Value'], host))
+    if not rows:
+        return pd.DataFrame(columns=['Process', 'Peak', 'Worst_Host', 'Hosts'])
+
+    long_df = pd.DataFrame(rows, columns=['Process', 'Peak', 'Host'])
+    worst = long_df.loc[long_df.groupby('Process')['Peak'].idxmax()]
+    hosts = long_df.groupby('Process')['Host'].nunique().rename('Hosts')
+    return (
+        worst.rename(columns={'Host': 'Worst_Host'})
+        .merge(hosts, left_on='Process', right_index=True)
+        .sort_values('Peak', ascending=False, ignore_index=True)
+    )
@@ -0,0 +1,182 @@
+# logsql.py
+"""
+Ad-hoc SQL over the log store (DuckDB, optional dependency).
+
+Views available to a query:
+    logman       Logman counters (parquet caches / archives / binary logs), one row per sample
+    process      Monitor.ps1 process log rows (parquet caches / archives)
+    process_top  Parsed Top5 strings: Timestamp, Kind ('Memory' | 'DiskIO'), Process, Value
+    samples      logman rows with the latest process row attached (same 35 s rule as load_data)
+    current      The frame currently shown in the dashboard (after the Time Range filter)
+
+DuckDB scans the parquet files itself, so only the aggregated result reaches pandas. Once the
+views exist the connection is sandboxed: only the store's own parquet files are readable
+(`allowed_paths`), external access (read_text / read_csv / URLs on anything else) is disabled and
+the configuration is locked, so a query cannot turn it back on.
+"""
+import os
+
+from data_loader import _is_parquet_cache_valid, process_single_file
+from binlog import BINLOG_EXTENSION, read_binlog
+from timeline import read_parquet_segments
+from archive import ARCHIVE_SUFFIX
+
+try:
+    import duckdb
+except ImportError:  # pragma: no cover - optional dependency
+    duckdb = None
+
+MAX_RESULT_ROWS = 10_000
+PROCESS_TOLERANCE_S = 35
+TOP5_COLUMNS = {'Top5_Memory_MB': 'Memory', 'Top5_Disk_IO_Global(MB/s)': 'DiskIO'}
+EXAMPLE_QUERY = """-- CPU by hour of day
+SELECT hour(Timestamp) AS Hour, avg("CPU(%)") AS Avg_CPU, max("CPU(%)") AS Peak_CPU
+FROM logman
+GROUP BY Hour
+ORDER BY Hour"""
+
+
+def _quote(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _literal(value):
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def _path_list(paths):
+    return "[" + ", ".join(_literal(p.replace('\\', '/')) for p in paths) + "]"
+
+
+def _cached_parquet(path):
+    """Parquet cache for a local CSV, building it through the normal loader when missing or stale."""
+    parquet_path = os.path.splitext(path)[0] + '.parquet'
+    if not _is_parquet_cache_valid(path, parquet_path):
+        process_single_file(path)
+    return parquet_path if _is_parquet_cache_valid(path, parquet_path) else None
+
+
+def _logman_view(con, parquet_paths, binlog_paths):
+    parts = []
+    plain = [p for p in parquet_paths if read_parquet_segments(p) is None]
+    segmented = {p: read_parquet_segments(p) for p in parquet_paths if p not in plain}
+
+    if plain:
+        parts.append(f"SELECT * FROM read_parquet({_path_list(plain)}, union_by_name = true)")
+
+    if segmented:
+        # Fixed-stride caches have no Timestamp column: rebuild it from the segment table
+        # (timeline.py) with an as-of join on the parquet row number
+        con.execute("CREATE TEMP TABLE _segments (file VARCHAR, seg_start BIGINT, seg_step BIGINT, seg_offset BIGINT)")
+        con.executemany(
+            "INSERT INTO _segments VALUES (?, ?, ?, ?)",
+            [(p.replace('\\', '/'), start, step, offset) for p, segs in segmented.items() for start, step, offset, _ in segs],
+        )
+        parts.append(
+            "SELECT make_timestamp_ns(s.seg_start + (r.file_row_number - s.seg_offset) * s.seg_step) AS Timestamp, "
+            "r.* EXCLUDE (filename, file_row_number) "
+            f"FROM read_parquet({_path_list(list(segmented))}, filename = true, file_row_number = true, union_by_name = true) r "
+            "ASOF JOIN _segments s ON r.filename = s.file AND r.file_row_number >= s.seg_offset"
+        )
+
+    for i, path in enumerate(binlog_paths):
+        # Memory-mapped records; DuckDB scans the frame in place
+        con.register(f'_binlog_{i}', read_binlog(path)[1])
+        parts.append(f"SELECT * FROM _binlog_{i}")
+
+    if parts:
+        con.execute("CREATE VIEW logman AS " + " UNION ALL BY NAME ".join(parts))
+    return bool(parts)
+
+
+def _process_views(con, parquet_paths):
+    if not parquet_paths:
+        return []
+    con.execute(f"CREATE VIEW process AS SELECT * FROM read_parquet({_path_list(parquet_paths)}, union_by_name = true)")
+    columns = [row[0] for row in con.execute("DESCRIBE process").fetchall()]
+
+    items = [
+        f"SELECT Timestamp, '{kind}' AS Kind, trim(unnest(string_split(trim(CAST({_quote(col)} AS VARCHAR), '\"'' '), '|'))) AS item FROM process"
+        for col, kind in TOP5_COLUMNS.items() if col in columns
+    ]
+    if items:
+        # Same rules as parsers.parse_process_column: "name:value" items, duplicates in one row summed
+        con.execute(
+            "CREATE VIEW process_top AS "
+            f"WITH items AS ({' UNION ALL '.join(items)}) "
+            "SELECT Timestamp, Kind, trim(split_part(item, ':', 1)) AS Process, "
+            "sum(TRY_CAST(regexp_extract(substr(item, strpos(item, ':') + 1), '[0-9.]+') AS DOUBLE)) AS Value "
+            "FROM items WHERE strpos(item, ':') > 0 GROUP BY ALL"
+        )
+    return [c for c in columns if c != 'Timestamp']
+
+
+def _samples_view(con, process_columns):
+    attached = [
+        f"CASE WHEN l.Timestamp - p.Timestamp <= INTERVAL {PROCESS_TOLERANCE_S} SECOND THEN p.{_quote(c)} END AS {_quote(c)}"
+        for c in process_columns
+    ]
+    logman_columns = {row[0] for row in con.execute("DESCRIBE logman").fetchall()}
+    derived = []
+    if 'AvailableMem(MB)' in logman_columns and 'OSTotalMem(GB)' in process_columns:
+        used = '(p."OSTotalMem(GB)" * 1024 - l."AvailableMem(MB)") / 1024'
+        derived = [f'{used} AS "Used(GB)"', f'{used} / p."OSTotalMem(GB)" * 100 AS "Usage(%)"']
+    con.execute(
+        "CREATE VIEW samples AS SELECT l.*" + "".join(", " + c for c in attached + derived) + " "
+        "FROM logman l ASOF LEFT JOIN process p ON l.Timestamp >= p.Timestamp"
+    )
+
+
+def open_log_store(files, current_df=None):
+    """
+    Returns an in-memory, sandboxed DuckDB connection with the views listed in the module
+    docstring defined over `files` (local paths; uploads arrive as their spooled copies, see
+    uploads.py). `current` can be re-registered later with `con.register('current', df)`.
+    """
+    if duckdb is None:
+        raise RuntimeError("duckdb is required for SQL queries: pip install duckdb")
+
+    logman_parquets, process_parquets, binlogs = [], [], []
+    for f in files:
+        if not isinstance(f, str):
+            continue
+        if f.endswith(BINLOG_EXTENSION):
+            binlogs.append(f)
+            continue
+        parquet_path = f if f.endswith(ARCHIVE_SUFFIX) else _cached_parquet(f)
+        if parquet_path is None:
+            continue
+        (logman_parquets if "Global_Usage" in os.path.basename(f) else process_parquets).append(parquet_path)
+
+    con = duckdb.connect()
+    has_logman = _logman_view(con, logman_parquets, binlogs)
+    process_columns = _process_views(con, process_parquets)
+    if has_logman and process_parquets:
+        _samples_view(con, process_columns)
+    if current_df is not None:
+        con.register('current', current_df)
+
+    store_paths = logman_parquets + process_parquets
+    if store_paths:
+        con.execute(f"SET allowed_paths = {_path_list(store_paths)}")
+    con.execute("SET enable_external_access = false")
+    con.execute("SET lock_configuration = true")
+    return con
+
+
+def list_views(con):
+    """{view name: [columns]} for the query help panel."""
+    names = [row[0] for row in con.execute("SELECT view_name FROM duckdb_views() WHERE NOT internal").fetchall()]
+    return {name: [row[0] for row in con.execute(f"DESCRIBE {_quote(name)}").fetchall()] for name in names}
+
+
+def run_query(con, sql, limit=MAX_RESULT_ROWS):
+    """
+    Runs a single read-only statement (SELECT / WITH ...) and returns at most `limit` rows
+    as a DataFrame, plus whether the result was truncated.
+    """
+    statements = con.extract_statements(sql)
+    if len(statements) != 1 or statements[0].type != duckdb.StatementType.SELECT:
+        raise ValueError("Only a single SELECT query is allowed.")
+    result = con.sql(statements[0].query).limit(limit + 1).df()
+    return result.head(limit), len(result) > limit
@@ -0,0 +1,236 @@
+# manifest.py
+import csv
+import io
+import json
+import os
+
+import pandas as pd
+
+from data_loader import _is_parquet_cache_valid, normalize_logman_columns
+from binlog import BINLOG_EXTENSION, drop_converted_csvs, read_binlog_array
+from timeline import read_parquet_segments, segment_span
+from archive import ARCHIVE_SUFFIX
+from timeparse import parse_timestamps
+
+MANIFEST_FILENAME = '_manifest.json'
+MANIFEST_VERSION = 1
+LOG_EXTENSIONS = ('.csv', BINLOG_EXTENSION, ARCHIVE_SUFFIX)
+_TAIL_BYTES = 64 * 1024
+_COUNT_CHUNK = 1024 * 1024
+
+
+def _source_type(fname):
+    return 'logman' if "Global_Usage" in fname else 'process'
+
+
+def _parse_first_field(line, columns):
+    row = next(csv.reader(io.StringIO(line)), [])
+    if not row or not row[0].strip():
+        return pd.NaT
+    # Same per-header format decision as the loader (timeparse caches it by header signature)
+    parsed, _ = parse_timestamps(pd.Series([row[0].strip()], dtype=object), columns)
+    return parsed.iloc[0]
+
+
+def _count_lines(path):
+    lines = 0
+    last = b''
+    with open(path, 'rb') as fh:
+        while chunk := fh.read(_COUNT_CHUNK):
+            lines += chunk.count(b'\n')
+            last = chunk[-1:]
+    # A final line without trailing newline still counts
+    return lines + (1 if last and last != b'\n' else 0)
+
+
+def _read_head_tail(path):
+    """Returns (header line, first data line, last data line) without reading the whole file."""
+    with open(path, 'rb') as fh:
+        head = fh.read(_TAIL_BYTES)
+        size = fh.seek(0, os.SEEK_END)
+        fh.seek(max(0, size - _TAIL_BYTES))
+        tail = fh.read()
+
+    head_lines = [l for l in head.decode('utf-8-sig', errors='replace').splitlines() if l.strip()]
+    tail_lines = [l for l in tail.decode('utf-8', errors='replace').splitlines() if l.strip()]
+    header = head_lines[0] if head_lines else ''
+    first = head_lines[1] if len(head_lines) > 1 else ''
+    last = tail_lines[-1] if len(tail_lines) > 1 or size <= _TAIL_BYTES else ''
+    if last == header:
+        last = ''
+    return header, first, last
+
+
+def scan_log_file(path):
+    """
+    Describes one log file: source type, first/last timestamp, row count, columns and cache state.
+    Uses the parquet cache (segment table or Timestamp column only) when valid, otherwise reads only the head
+    and tail of the CSV plus a raw newline count.
+    """
+    fname = os.path.basename(path)
+    source = _source_type(fname)
+    stat = os.stat(path)
+    if fname.endswith(BINLOG_EXTENSION):
+        return _scan_binlog(path, fname, stat)
+
+    if fname.endswith(ARCHIVE_SUFFIX):
+        # An archive is its own parquet cache
+        parquet_path, cached = path, True
+    else:
+        parquet_path = os.path.splitext(path)[0] + '.parquet'
+        cached = _is_parquet_cache_valid(path, parquet_path)
+
+    entry = {
+        'file': fname,
+        'source': source,
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+        'first_ts': None,
+        'last_ts': None,
+        'rows': 0,
+        'columns': [],
+        'cached': cached,
+    }
+
+    if cached:
+        try:
+            entry['columns'] = _parquet_columns(parquet_path)
+            segments = read_parquet_segments(parquet_path)
+            if segments is not None:
+                # Regular series: span and row count come from the segment table in the metadata
+                entry['columns'] = ['Timestamp'] + entry['columns']
+                entry['first_ts'], entry['last_ts'], entry['rows'] = segment_span(segments)
+            else:
+                ts = pd.read_parquet(parquet_path, columns=['Timestamp'])['Timestamp']
+                entry['rows'] = len(ts)
+                entry['first_ts'], entry['last_ts'] = ts.min(), ts.max()
+        except Exception:
+            cached = entry['cached'] = False
+
+    if not cached:
+        header, first, last = _read_head_tail(path)
+        columns = [c.strip() for c in next(csv.reader(io.StringIO(header)), [])]
+        entry['columns'] = normalize_logman_columns(columns) if source == 'logman' else columns
+        entry['rows'] = max(0, _count_lines(path) - 1)
+        entry['first_ts'] = _parse_first_field(first, columns) if first else pd.NaT
+        entry['last_ts'] = _parse_first_field(last, columns) if last else entry['first_ts']
+
+    for key in ('first_ts', 'last_ts'):
+        entry[key] = None if pd.isna(entry[key]) else pd.Timestamp(entry[key]).isoformat()
+    return entry
+
+
+def _scan_binlog(path, fname, stat):
+    # Binary logs are their own cache: row count and span come straight from the memmap
+    header, records = read_binlog_array(path)
+    timestamps = records['Timestamp'].view('datetime64[ns]')
+    return {
+        'file': fname,
+        'source': header.get('source', 'logman'),
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+        'first_ts': pd.Timestamp(timestamps[0]).isoformat() if len(records) else None,
+        'last_ts': pd.Timestamp(timestamps[-1]).isoformat() if len(records) else None,
+        'rows': int(len(records)),
+        'columns': ['Timestamp'] + header['columns'],
+        'cached': True,
+    }
+
+
+def _parquet_columns(parquet_path):
+    import pyarrow.parquet as pq
+    return [c for c in pq.read_schema(parquet_path).names if not c.startswith('__index_level_')]
+
+
+def _load_manifest(manifest_path):
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as fh:
+            data = json.load(fh)
+        if data.get('version') == MANIFEST_VERSION:
+            return data.get('files', {})
+    except (OSError, ValueError):
+        pass
+    return {}
+
+
+def _save_manifest(manifest_path, entries):
+    tmp_path = manifest_path + '.tmp'
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as fh:
+            json.dump({'version': MANIFEST_VERSION, 'files': entries}, fh, ensure_ascii=False)
+        os.replace(tmp_path, manifest_path)
+    except OSError:
+        pass
+
+
+def update_manifest(log_dir):
+    """
+    Refreshes `<log_dir>/_manifest.json` incrementally: only files whose size or mtime changed
+    are re-scanned, deleted files are dropped. A CSV converted to a binary log is left out (the
+    .pcmb holds the same samples). Returns the manifest as a DataFrame sorted by first timestamp
+    (newest first).
+    """
+    manifest_path = os.path.join(log_dir, MANIFEST_FILENAME)
+    entries = _load_manifest(manifest_path)
+    changed = False
+    seen = set()
+
+    items = {item.name: item for item in os.scandir(log_dir)
+             if item.is_file() and item.name.endswith(LOG_EXTENSIONS)}
+    for name in drop_converted_csvs(sorted(items)):
+        item = items[name]
+        seen.add(item.name)
+        stat = item.stat()
+        old = entries.get(item.name)
+        if old and old['size'] == stat.st_size and old['mtime_ns'] == stat.st_mtime_ns:
+            # Cache state can change without the CSV changing (parquet written on first load)
+            if not old['cached']:
+                cached = _is_parquet_cache_valid(item.path, os.path.splitext(item.path)[0] + '.parquet')
+                if cached:
+                    old['cached'] = True
+                    changed = True
+            continue
+        try:
+            entries[item.name] = scan_log_file(item.path)
+            changed = True
+        except OSError:
+            continue
+
+    for name in list(entries):
+        if name not in seen:
+            del entries[name]
+            changed = True
+
+    if changed:
+        _save_manifest(manifest_path, entries)
+
+    return manifest_to_frame(entries)
+
+
+def manifest_to_frame(entries):
+    columns = ['file', 'source', 'size', 'mtime_ns', 'first_ts', 'last_ts', 'rows', 'columns', 'cached']
+    frame = pd.DataFrame(list(entries.values()), columns=columns)
+    frame['first_ts'] = pd.to_datetime(frame['first_ts'], format='ISO8601')
+    frame['last_ts'] = pd.to_datetime(frame['last_ts'], format='ISO8601')
+    return frame.sort_values(['first_ts', 'file'], ascending=False, na_position='last', ignore_index=True)
+
+
+def resolve_files(manifest_df, start, end, sources=('logman', 'process')):
+    """Returns the files whose [first_ts, last_ts] span overlaps [start, end]."""
+    if manifest_df is None or manifest_df.empty:
+        return []
+    start, end = pd.Timestamp(start), pd.Timestamp(end)
+    overlap = (
+        manifest_df['source'].isin(sources)
+        & (manifest_df['first_ts'] <= end)
+        & (manifest_df['last_ts'] >= start)
+    )
+    return manifest_df.loc[overlap].sort_values('first_ts')['file'].tolist()
+
+
+def describe_entry(entry):
+    """Short label used by the sidebar file picker."""
+    if pd.isna(entry['first_ts']):
+        return f"{entry['file']} (empty)"
+    span = f"{entry['first_ts']:%m-%d %H:%M} ~ {entry['last_ts']:%m-%d %H:%M}"
+    return f"{entry['file']}  [{span}, {int(entry['rows']):,} rows]"
@@ -1,7 +1,7 @@
 # -*- mode: python ; coding: utf-8 -*-
 from PyInstaller.utils.hooks import collect_data_files, copy_metadata, collect_submodules
 
-datas = [('app.py', '.'), ('Monitor.ps1', '.'), ('start_monitor.bat', '.'), ('config.py', '.'), ('data_loader.py', '.'), ('parsers.py', '.'), ('excel_exporter.py', '.'), ('dashboards', 'dashboards'), ('site', 'site')]
+datas = [('app.py', '.'), ('Monitor.ps1', '.'), ('start_monitor.bat', '.'), ('config.py', '.'), ('data_loader.py', '.'), ('parsers.py', '.'), ('excel_exporter.py', '.'), ('episodes.py', '.'), ('trends.py', '.'), ('sketches.py', '.'), ('fleet.py', '.'), ('manifest.py', '.'), ('binlog.py', '.'), ('timeline.py', '.'), ('logsql.py', '.'), ('archive.py', '.'), ('figcache.py', '.'), ('uploads.py', '.'), ('procmatrix.py', '.'), ('timeparse.py', '.'), ('correlate.py', '.'), ('derived.py', '.'), ('api.py', '.'), ('procrecords.py', '.'), ('dashboards', 'dashboards'), ('site', 'site')]
 datas += copy_metadata('streamlit')
 datas += collect_data_files('streamlit')
 
@@ -15,7 +15,8 @@ hidden_imports = [
     'streamlit.runtime.state',
     'streamlit.runtime.state.session_state',
     'plotly',
-    'pandas'
+    'pandas',
+    'duckdb'
 ]
 hidden_imports += collect_submodules('streamlit')
 
@@ -1,11 +1,14 @@
 # parsers.py
 import re
+import numpy as np
 import pandas as pd
 
 def parse_process_column(df_col):
     process_stats = {}
 
-    for row in df_col.dropna():
+    # Only the peak per process is kept, so each distinct string needs parsing once
+    # (after the as-of join, every 1s row repeats the same 30s process sample)
+    for row in df_col.dropna().unique():
         # Strip potential literal quotes if the CSV was overly-quoted or has leading/trailing spaces
         row = str(row).strip('"\' ')
         
@@ -43,37 +46,53 @@ def extract_process_time_series(df, col_name):
     """
     Extracts time-series data for individual processes from a summary column.
     Returns a long-format DataFrame with ['Timestamp', 'Process', 'Value'].
+    Vectorized with pandas string ops so multi-day logs don't go through iterrows.
+    After the as-of join every 30s process sample repeats on each 1s row, so a run of identical
+    consecutive strings is one sample, kept once at the run's first Timestamp.
     """
-    rows = []
     if col_name not in df.columns:
         return pd.DataFrame(columns=['Timestamp', 'Process', 'Value'])
-        
-    for _, row_val in df[['Timestamp', col_name]].dropna().iterrows():
-        ts = row_val['Timestamp']
-        data_str = str(row_val[col_name]).strip('"\' ')
-        
-        if not data_str or data_str.lower() in ["no_active_io", "nan", "none"]:
-            continue
-            
-        # Per-timestamp aggregation map
-        current_ts_stats = {}
-            
-        for item in [x.strip() for x in data_str.split('|') if x.strip()]:
-            try:
-                if ':' in item:
-                    name_part, val_part = item.split(':', 1)
-                    name = name_part.strip()
-                    val_match = re.search(r"([\d\.]+)", val_part)
-                    if val_match:
-                        val = float(val_match.group(1))
-                        # Sum values if process appears multiple times in same timestamp (e.g. chrome)
-                        current_ts_stats[name] = current_ts_stats.get(name, 0) + val
-            except:
-                continue
-        
-        # Append aggregated results
-        for proc_name, total_val in current_ts_stats.items():
-            rows.append({'Timestamp': ts, 'Process': proc_name, 'Value': total_val})
-                
-    return pd.DataFrame(rows)
 
+    column = df[col_name]
+    keys = column.cat.codes.to_numpy() if isinstance(column.dtype, pd.CategoricalDtype) else column.to_numpy()
+    first = np.ones(len(keys), dtype=bool)
+    first[1:] = keys[1:] != keys[:-1]
+    raw = df.loc[first, ['Timestamp', col_name]].dropna()
+    agg = parse_process_items(raw[col_name])
+    if agg.empty:
+        return pd.DataFrame(columns=['Timestamp', 'Process', 'Value'])
+    agg.insert(0, 'Timestamp', raw['Timestamp'].to_numpy()[agg['Row'].to_numpy()])
+
+    return agg[['Timestamp', 'Process', 'Value']]
+
+
+def parse_process_items(strings):
+    """
+    Splits Top5 summary strings ("procA:123MB | procB:45MB") into long-format items.
+    Returns ['Row', 'Process', 'Value'] where Row is the position in `strings`; a process listed
+    twice in one string (e.g. chrome) is summed.
+    """
+    data_str = pd.Series(strings).astype(str).str.strip('"\' ')
+    valid = (data_str != '') & ~data_str.str.lower().isin(["no_active_io", "nan", "none"])
+    if not valid.any():
+        return pd.DataFrame(columns=['Row', 'Process', 'Value'])
+
+    # One row per "name:value" item, keeping the source row position for per-row sums
+    items = (
+        pd.DataFrame({'Row': range(len(data_str)), 'Item': data_str.to_numpy()})[valid.to_numpy()]
+        .assign(Item=lambda x: x['Item'].str.split('|'))
+        .explode('Item')
+    )
+    items['Item'] = items['Item'].str.strip()
+    items = items[items['Item'].str.contains(':', regex=False, na=False)]
+    if items.empty:
+        # e.g. an all-"Idle" / "N/A" column: split(expand=True) would have no value column
+        return pd.DataFrame(columns=['Row', 'Process', 'Value'])
+
+    parts = items['Item'].str.split(':', n=1, expand=True)
+    values = pd.to_numeric(parts[1].str.extract(r"([\d\.]+)", expand=False), errors='coerce')
+    items = pd.DataFrame({'Row': items['Row'].to_numpy(), 'Process': parts[0].str.strip().to_numpy(), 'Value': values.to_numpy()})
+    items = items[items['Value'].notna()]
+
+    # Sum values if process appears multiple times in same row (e.g. chrome)
+    return items.groupby(['Row', 'Process'], sort=False)['Value'].sum().reset_index()
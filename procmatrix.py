@@ -0,0 +1,195 @@
+# procmatrix.py
+"""
+Time-bucket x process matrix over a Top5 summary column (Top5_Memory_MB, Top5_Disk_IO_Global).
+
+Every distinct Top5 string is parsed once; rows only carry a string code and a time-bucket code.
+The matrix is sparse, stored as dictionary-encoded COO arrays:
+    bucket (int32) x process (int32) -> value sum (float64), plus the row count per bucket
+so a wider bucket is a reduction over those arrays (sum values and row counts, divide at the end)
+and thousands of process names cost nothing for buckets they never appear in.
+Cell values read back as the mean over the bucket's rows, with 0 for rows that did not list the
+process (it was not in that sample's Top5).
+
+`build_record_matrix` builds the same matrix from structured process records (procrecords.py):
+rows are then the process samples themselves and no string is parsed.
+"""
+import numpy as np
+import pandas as pd
+
+from parsers import parse_process_items
+from procrecords import records_time_series
+from timeline import time_buckets
+
+MATRIX_BASE_FREQ = '1min'
+OTHER_PROCESSES = 'Other'
+
+
+def _reduce_coo(bucket, process, value, n_processes):
+    """Sums duplicate (bucket, process) cells; returns arrays sorted by (bucket, process)."""
+    key = bucket.astype(np.int64) * n_processes + process
+    uniq, inverse = np.unique(key, return_inverse=True)
+    sums = np.bincount(inverse.ravel(), weights=value, minlength=len(uniq))
+    return (uniq // n_processes).astype(np.int32), (uniq % n_processes).astype(np.int32), sums
+
+
+def _empty_matrix():
+    return {
+        'buckets': np.array([], dtype='datetime64[ns]'),
+        'processes': np.array([], dtype=object),
+        'bucket': np.array([], dtype=np.int32),
+        'process': np.array([], dtype=np.int32),
+        'value': np.array([], dtype=np.float64),
+        'rows': np.array([], dtype=np.int64),
+    }
+
+
+def build_process_matrix(df, col_name, freq=MATRIX_BASE_FREQ):
+    """
+    Builds the sparse matrix of `df[col_name]` at `freq` buckets.
+    Returns a dict of arrays: `bucket`, `process`, `value` (the non-zero cells), `rows` (rows per
+    bucket), and the dictionaries the codes index into: `buckets` (bucket starts), `processes`.
+    """
+    if df is None or df.empty or col_name not in df.columns:
+        return _empty_matrix()
+
+    regular = time_buckets(df, freq)
+    if regular is not None:
+        valid_ts = np.ones(len(df), dtype=bool)
+        bucket_codes, bucket_starts = regular
+    else:
+        valid_ts = df['Timestamp'].notna().to_numpy()
+        bucket_codes, bucket_starts = pd.factorize(df['Timestamp'].dt.floor(freq).to_numpy()[valid_ts], sort=True)
+    bucket_starts = np.asarray(bucket_starts, dtype='datetime64[ns]')
+    rows = np.bincount(bucket_codes, minlength=len(bucket_starts)).astype(np.int64)
+
+    # Rows repeat the same 30s sample after the as-of join: count (bucket, string) pairs first
+    column = df[col_name] if valid_ts.all() else df[col_name][valid_ts]
+    string_codes, strings = pd.factorize(column)
+    present = string_codes >= 0
+    if not present.any():
+        return dict(_empty_matrix(), buckets=bucket_starts, rows=rows)
+    n_strings = len(strings)
+    pair_key, pair_count = np.unique(
+        bucket_codes[present].astype(np.int64) * n_strings + string_codes[present], return_counts=True
+    )
+    pair_bucket, pair_string = pair_key // n_strings, pair_key % n_strings
+
+    items = parse_process_items(np.asarray(strings, dtype=object)).sort_values('Row', kind='stable')
+    if items.empty:
+        return dict(_empty_matrix(), buckets=bucket_starts, rows=rows)
+    item_row = items['Row'].to_numpy(dtype=np.int64)
+    item_values = items['Value'].to_numpy(dtype=np.float64)
+    item_process, processes = pd.factorize(items['Process'])
+    item_start = np.searchsorted(item_row, np.arange(n_strings))
+    item_count = np.bincount(item_row, minlength=n_strings)
+
+    # Expand each (bucket, string) pair into that string's items, weighted by the pair's row count
+    repeat = item_count[pair_string]
+    total = int(repeat.sum())
+    first = np.repeat(item_start[pair_string], repeat)
+    within = np.arange(total) - np.repeat(np.cumsum(repeat) - repeat, repeat)
+    item_idx = first + within
+
+    bucket, process, value = _reduce_coo(
+        np.repeat(pair_bucket, repeat),
+        item_process[item_idx],
+        item_values[item_idx] * np.repeat(pair_count, repeat),
+        len(processes),
+    )
+    return {
+        'buckets': bucket_starts,
+        'processes': np.asarray(processes, dtype=object),
+        'bucket': bucket,
+        'process': process,
+        'value': value,
+        'rows': rows,
+    }
+
+
+def build_record_matrix(records, metric, freq=MATRIX_BASE_FREQ):
+    """
+    `build_process_matrix` over structured records: `metric` is a record column ('Memory_MB',
+    'DiskIO_MBps'); a bucket's row count is the number of process samples taken in it.
+    """
+    if records is None or records.empty:
+        return _empty_matrix()
+
+    samples = np.unique(records['Timestamp'].to_numpy(dtype='datetime64[ns]'))
+    sample_bucket, bucket_starts = pd.factorize(pd.DatetimeIndex(samples).floor(freq), sort=True)
+    bucket_starts = np.asarray(bucket_starts, dtype='datetime64[ns]')
+    rows = np.bincount(sample_bucket, minlength=len(bucket_starts)).astype(np.int64)
+
+    series = records_time_series(records, metric)
+    if series.empty:
+        return dict(_empty_matrix(), buckets=bucket_starts, rows=rows)
+    process_codes, processes = pd.factorize(series['Process'])
+    bucket, process, value = _reduce_coo(
+        sample_bucket[np.searchsorted(samples, series['Timestamp'].to_numpy(dtype='datetime64[ns]'))],
+        process_codes,
+        series['Value'].to_numpy(dtype=np.float64),
+        len(processes),
+    )
+    return {
+        'buckets': bucket_starts,
+        'processes': np.asarray(processes, dtype=object),
+        'bucket': bucket,
+        'process': process,
+        'value': value,
+        'rows': rows,
+    }
+
+
+def coarsen_matrix(matrix, freq):
+    """Re-buckets a matrix to a wider `freq` (a multiple of the one it was built with)."""
+    if len(matrix['buckets']) == 0:
+        return matrix
+    wider = pd.DatetimeIndex(matrix['buckets']).floor(freq)
+    mapping, new_starts = pd.factorize(wider, sort=True)
+    bucket, process, value = _reduce_coo(
+        mapping[matrix['bucket']], matrix['process'], matrix['value'], max(1, len(matrix['processes']))
+    )
+    return dict(
+        matrix,
+        buckets=np.asarray(new_starts, dtype='datetime64[ns]'),
+        bucket=bucket,
+        process=process,
+        value=value,
+        rows=np.bincount(mapping, weights=matrix['rows'], minlength=len(new_starts)).astype(np.int64),
+    )
+
+
+def auto_freq(matrix, max_buckets, choices=('1min', '5min', '15min', '30min', '1h', '3h', '6h', '12h', '1D')):
+    """Narrowest of `choices` that keeps the matrix span within `max_buckets` columns."""
+    if len(matrix['buckets']) == 0:
+        return choices[0]
+    span = pd.Timestamp(matrix['buckets'][-1]) - pd.Timestamp(matrix['buckets'][0])
+    for freq in choices:
+        if span / pd.Timedelta(freq) < max_buckets:
+            return freq
+    return choices[-1]
+
+
+def matrix_to_frame(matrix, top_n=None, share=False):
+    """
+    Dense (bucket x process) frame of per-bucket means for the `top_n` processes by total,
+    the rest folded into OTHER_PROCESSES. `share=True` returns each cell as % of its bucket total.
+    """
+    n_processes = len(matrix['processes'])
+    mean = matrix['value'] / np.maximum(matrix['rows'][matrix['bucket']], 1)
+    column = matrix['process'].astype(np.int64)
+    names = list(matrix['processes'])
+
+    if top_n is not None and n_processes > top_n:
+        totals = np.bincount(column, weights=matrix['value'], minlength=n_processes)
+        keep = np.argsort(-totals, kind='stable')[:top_n]
+        remap = np.full(n_processes, top_n, dtype=np.int64)
+        remap[keep] = np.arange(top_n)
+        column = remap[column]
+        names = [names[i] for i in keep] + [OTHER_PROCESSES]
+
+    dense = np.zeros((len(matrix['buckets']), len(names)), dtype=np.float64)
+    np.add.at(dense, (matrix['bucket'], column), mean)
+    if share:
+        bucket_total = dense.sum(axis=1, keepdims=True)
+        dense = np.divide(dense * 100, bucket_total, out=np.zeros_like(dense), where=bucket_total > 0)
+    return pd.DataFrame(dense, index=pd.DatetimeIndex(matrix['buckets'], name='Bucket'), columns=names)
@@ -0,0 +1,170 @@
+# procrecords.py
+"""
+Structured per-sample process records (JSON lines), written next to the process log:
+    System_Log_2026-02-06.csv          Top5 summary strings (unchanged, read by every build)
+    System_Log_2026-02-06.procs.jsonl  one flat object per process per sample:
+        {"Timestamp":"2026-02-06 11:51:10","PID":4120,"Process":"chrome","Memory_MB":647.2,
+         "DiskIO_MBps":0.0,"CPU_s":812.4,"Handles":1532}
+
+A sample lists the union of the top-N processes by memory and by disk I/O (N = the collector's
+--top-n / -TopN), one record per PID. CPU_s is the process's cumulative CPU time and Handles its
+handle count (open file descriptors off Windows); unknown values are null.
+
+The pyarrow JSON reader maps the file onto a fixed schema, so columns arrive typed and nothing
+goes through regular expressions; a partial last line (collector mid-write) is ignored. When a
+log has no records file the dashboards fall back to the Top5 strings (parsers.py).
+"""
+import json
+
+import numpy as np
+import pandas as pd
+
+RECORDS_SUFFIX = '.procs.jsonl'
+RECORDS_CACHE_SUFFIX = '.procs.parquet'
+RECORD_COLUMNS = ['Timestamp', 'PID', 'Process', 'Memory_MB', 'DiskIO_MBps', 'CPU_s', 'Handles']
+# Top5 summary column -> record metric carrying the same quantity
+METRICS = {'Top5_Memory_MB': 'Memory_MB', 'Top5_Disk_IO_Global(MB/s)': 'DiskIO_MBps'}
+_BOM = b'\xef\xbb\xbf'  # PowerShell 5 writes UTF-8 with BOM
+
+
+def records_path(log_path):
+    """Records file belonging to a process log (System_Log_*.csv)."""
+    return log_path[:-len('.csv')] + RECORDS_SUFFIX if log_path.endswith('.csv') else None
+
+
+def records_cache_path(path):
+    return path[:-len(RECORDS_SUFFIX)] + RECORDS_CACHE_SUFFIX
+
+
+def format_record(timestamp, pid, name, memory_mb, disk_io_mbps, cpu_s=None, handles=None):
+    """One JSON line (without newline) in the layout above."""
+    return json.dumps({
+        'Timestamp': timestamp, 'PID': pid, 'Process': name,
+        'Memory_MB': None if memory_mb is None else round(memory_mb, 1),
+        'DiskIO_MBps': None if disk_io_mbps is None else round(disk_io_mbps, 3),
+        'CPU_s': None if cpu_s is None else round(cpu_s, 2),
+        'Handles': handles,
+    }, ensure_ascii=False, separators=(',', ':'))
+
+
+def _schema():
+    import pyarrow as pa
+
+    return pa.schema([
+        ('Timestamp', pa.timestamp('ns')), ('PID', pa.int64()), ('Process', pa.string()),
+        ('Memory_MB', pa.float32()), ('DiskIO_MBps', pa.float32()), ('CPU_s', pa.float32()), ('Handles', pa.float32()),
+    ])
+
+
+def _typed(df):
+    df = df[RECORD_COLUMNS]
+    df = df[df['Timestamp'].notna() & df['PID'].notna()]
+    df = df.astype({'PID': 'int32', 'Process': 'category', 'Memory_MB': 'float32', 'DiskIO_MBps': 'float32',
+                    'CPU_s': 'float32', 'Handles': 'float32'})
+    if not df['Timestamp'].is_monotonic_increasing:
+        df = df.sort_values('Timestamp', kind='stable')
+    return df.reset_index(drop=True)
+
+
+def _read_lines_fallback(data):
+    """Line-by-line reader used when a line does not fit the schema: bad lines are skipped."""
+    rows = []
+    for line in data.splitlines():
+        try:
+            record = json.loads(line)
+            rows.append([record.get(c) for c in RECORD_COLUMNS])
+        except (ValueError, AttributeError):
+            continue
+    df = pd.DataFrame(rows, columns=RECORD_COLUMNS)
+    df['Timestamp'] = pd.to_datetime(df['Timestamp'], errors='coerce')
+    for col in ['PID', 'Memory_MB', 'DiskIO_MBps', 'CPU_s', 'Handles']:
+        df[col] = pd.to_numeric(df[col], errors='coerce')
+    return df
+
+
+def read_process_records(path):
+    """Typed records frame (RECORD_COLUMNS) of one .procs.jsonl file, sorted by Timestamp."""
+    import pyarrow as pa
+    import pyarrow.json as pj
+
+    with open(path, 'rb') as fh:
+        data = fh.read()
+    if data.startswith(_BOM):
+        data = data[len(_BOM):]
+    data = data[:data.rfind(b'\n') + 1]  # drop a partial last line
+    if not data.strip():
+        return _typed(_schema().empty_table().to_pandas())
+    try:
+        table = pj.read_json(
+            pa.BufferReader(data),
+            parse_options=pj.ParseOptions(explicit_schema=_schema(), unexpected_field_behavior='ignore'),
+        )
+        df = table.to_pandas()
+    except pa.ArrowInvalid:
+        df = _read_lines_fallback(data)
+    return _typed(df)
+
+
+def _labels(records, by_pid):
+    if not by_pid:
+        return records['Process']
+    return records['Process'].astype(str) + ' [' + records['PID'].astype(str) + ']'
+
+
+def records_time_series(records, metric, by_pid=False):
+    """
+    Timestamp, Process, Value per sample: the counterpart of parsers.extract_process_time_series.
+    Processes sharing a name add up (as in the Top5 strings) unless `by_pid` keeps each PID apart
+    as 'name [pid]'. Zero / missing values (process not active on that metric) are dropped.
+    """
+    values = records[metric].to_numpy(dtype='float64', na_value=np.nan)
+    keep = values > 0
+    frame = pd.DataFrame({
+        'Timestamp': records['Timestamp'].to_numpy()[keep],
+        'Process': _labels(records, by_pid).to_numpy()[keep],
+        'Value': values[keep],
+    })
+    if frame.empty:
+        return frame
+    return frame.groupby(['Timestamp', 'Process'], sort=True, observed=True)['Value'].sum().reset_index()
+
+
+def records_peak(records, metric, by_pid=False):
+    """Process, Max_Value sorted by peak: the counterpart of parsers.parse_process_column."""
+    series = records_time_series(records, metric, by_pid)
+    if series.empty:
+        return pd.DataFrame(columns=['Process', 'Max_Value'])
+    peak = series.groupby('Process', observed=True)['Value'].max()
+    return (
+        pd.DataFrame({'Process': peak.index.astype(str), 'Max_Value': peak.to_numpy()})
+        .sort_values('Max_Value', ascending=False, ignore_index=True)
+    )
+
+
+def process_summary(records):
+    """
+    One row per PID: samples, peak memory / disk I/O, CPU time used and handle growth within the
+    records (last - first), sorted by peak memory.
+    """
+    if records.empty:
+        return pd.DataFrame(columns=['PID', 'Process', 'Samples', 'Peak_Memory_MB', 'Peak_DiskIO_MBps',
+                                     'CPU_Used_s', 'Handles_Max', 'Handles_Growth'])
+    grouped = records.groupby(['PID', 'Process'], sort=False, observed=True)
+    summary = grouped.agg(
+        Samples=('Timestamp', 'size'),
+        Peak_Memory_MB=('Memory_MB', 'max'),
+        Peak_DiskIO_MBps=('DiskIO_MBps', 'max'),
+        CPU_First=('CPU_s', 'first'),
+        CPU_Last=('CPU_s', 'last'),
+        Handles_Max=('Handles', 'max'),
+        Handles_First=('Handles', 'first'),
+        Handles_Last=('Handles', 'last'),
+    ).reset_index()
+    summary['Process'] = summary['Process'].astype(str)
+    summary['CPU_Used_s'] = summary['CPU_Last'] - summary['CPU_First']
+    summary['Handles_Growth'] = summary['Handles_Last'] - summary['Handles_First']
+    return (
+        summary[['PID', 'Process', 'Samples', 'Peak_Memory_MB', 'Peak_DiskIO_MBps', 'CPU_Used_s',
+                 'Handles_Max', 'Handles_Growth']]
+        .sort_values('Peak_Memory_MB', ascending=False, ignore_index=True)
+    )
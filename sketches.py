@@ -0,0 +1,153 @@
+# sketches.py
+import numpy as np
+import pandas as pd
+
+from timeline import time_buckets
+
+# Log-bucketed histogram (DDSketch-style): every value is stored in the bin
+# ceil(log_gamma(v)), so any quantile read back is within RELATIVE_ACCURACY of the true value.
+# Histograms are plain (Bucket, Metric, Bin, Count) rows, so merging is a groupby-sum.
+RELATIVE_ACCURACY = 0.01
+GAMMA = (1 + RELATIVE_ACCURACY) / (1 - RELATIVE_ACCURACY)
+LOG_GAMMA = np.log(GAMMA)
+MIN_INDEXABLE = 1e-6
+ZERO_BIN = np.iinfo(np.int32).min
+
+HIST_BUCKET = '1h'
+HIST_COLUMNS = ['Bucket', 'Metric', 'Bin', 'Count']
+# Static / identity columns that make no sense as distributions
+SKIP_METRICS = {'PhysicalMem(GB)', 'OSTotalMem(GB)'}
+
+
+def _empty_histograms():
+    return pd.DataFrame({
+        'Bucket': pd.Series(dtype='datetime64[ns]'),
+        'Metric': pd.Series(dtype='object'),
+        'Bin': pd.Series(dtype='int32'),
+        'Count': pd.Series(dtype='int64'),
+    })
+
+
+def _values_to_bins(values):
+    bins = np.full(values.shape, ZERO_BIN, dtype=np.int32)
+    positive = values > MIN_INDEXABLE
+    bins[positive] = np.ceil(np.log(values[positive]) / LOG_GAMMA).astype(np.int32)
+    return bins
+
+
+def _bins_to_values(bins):
+    bins = np.asarray(bins)
+    values = 2 * np.power(GAMMA, bins.astype('float64')) / (GAMMA + 1)
+    return np.where(bins == ZERO_BIN, 0.0, values)
+
+
+def build_histograms(df, columns=None, freq=HIST_BUCKET):
+    """
+    Builds one mergeable histogram per metric per `freq` time bucket.
+    Negative values are clamped to zero (all collected metrics are non-negative).
+    """
+    if df is None or df.empty or 'Timestamp' not in df.columns:
+        return _empty_histograms()
+
+    if columns is None:
+        columns = [
+            c for c in df.columns
+            if c != 'Timestamp' and c not in SKIP_METRICS and pd.api.types.is_numeric_dtype(df[c])
+        ]
+
+    regular = time_buckets(df, freq)
+    if regular is not None:
+        # Fixed-stride series: bucket boundaries come from the segment table, no per-row floor/hash
+        valid_ts = np.ones(len(df), dtype=bool)
+        bucket_codes, bucket_values = regular
+    else:
+        valid_ts = df['Timestamp'].notna().to_numpy()
+        buckets = df['Timestamp'].dt.floor(freq).to_numpy()[valid_ts]
+        bucket_codes, bucket_values = pd.factorize(buckets, sort=True)
+
+    frames = []
+    for col in columns:
+        values = pd.to_numeric(df[col], errors='coerce').to_numpy(dtype='float64')[valid_ts]
+        present = ~np.isnan(values)
+        if not present.any():
+            continue
+
+        bins = _values_to_bins(values[present])
+        codes = bucket_codes[present]
+
+        # Count unique (bucket, bin) pairs in one pass on a combined int64 key
+        key = (codes.astype(np.int64) << 32) | (bins.astype(np.int64) & 0xFFFFFFFF)
+        uniq, counts = np.unique(key, return_counts=True)
+        frames.append(pd.DataFrame({
+            'Bucket': bucket_values[(uniq >> 32).astype(np.int64)],
+            'Metric': col,
+            'Bin': (uniq & 0xFFFFFFFF).astype(np.uint32).view(np.int32),
+            'Count': counts.astype(np.int64),
+        }))
+
+    if not frames:
+        return _empty_histograms()
+    return pd.concat(frames, ignore_index=True)
+
+
+def merge_histograms(hist_frames):
+    """Merges histograms from several files (or buckets) by summing counts."""
+    frames = [h for h in hist_frames if h is not None and not h.empty]
+    if not frames:
+        return _empty_histograms()
+    merged = pd.concat(frames, ignore_index=True)
+    return merged.groupby(['Bucket', 'Metric', 'Bin'], as_index=False, sort=False)['Count'].sum()
+
+
+def _quantiles_from_bins(bins, counts, qs):
+    order = np.argsort(bins, kind='stable')
+    cum = np.cumsum(counts[order])
+    total = cum[-1]
+    ranks = np.clip(np.ceil(np.asarray(qs) * total).astype(np.int64), 1, total)
+    return _bins_to_values(bins[order][np.searchsorted(cum, ranks)])
+
+
+def histogram_percentiles(hist, metric, qs=(0.95, 0.99), start=None, end=None, by=None):
+    """
+    Percentiles of `metric` from merged histogram buckets overlapping [start, end].
+    `by` ('h', 'D', ...) returns one row per period instead of a single overall row.
+    Range edges are resolved to whole histogram buckets.
+    """
+    labels = [f"p{round(q * 100, 1):g}" for q in qs]
+    if hist is None or hist.empty:
+        return pd.DataFrame(columns=['Period'] + labels + ['Samples'])
+
+    data = hist[hist['Metric'] == metric]
+    if start is not None:
+        data = data[data['Bucket'] >= pd.Timestamp(start).floor(HIST_BUCKET)]
+    if end is not None:
+        data = data[data['Bucket'] <= pd.Timestamp(end)]
+    if data.empty:
+        return pd.DataFrame(columns=['Period'] + labels + ['Samples'])
+
+    periods = data['Bucket'].dt.floor(by) if by else pd.Series('All', index=data.index)
+    rows = []
+    for period, group in data.groupby(periods, sort=True):
+        bins = group['Bin'].to_numpy()
+        counts = group['Count'].to_numpy()
+        rows.append([period, *_quantiles_from_bins(bins, counts, qs), int(counts.sum())])
+
+    return pd.DataFrame(rows, columns=['Period'] + labels + ['Samples'])
+
+
+def memory_usage_percentiles(hist, total_mem_gb, qs=(0.95, 0.99), start=None, end=None, by=None):
+    """
+    Usage(%) percentiles derived from the 'AvailableMem(MB)' histogram:
+    the q-th percentile of used memory is total minus the (1-q)-th percentile of available memory.
+    """
+    inverse = histogram_percentiles(hist, 'AvailableMem(MB)', [1 - q for q in qs], start, end, by)
+    labels = [f"p{round(q * 100, 1):g}" for q in qs]
+    if inverse.empty:
+        return pd.DataFrame(columns=['Period'] + labels + ['Samples'])
+
+    total_mb = float(total_mem_gb) * 1024
+    result = inverse[['Period']].copy()
+    for label, col in zip(labels, inverse.columns[1:1 + len(qs)]):
+        result[label] = ((total_mb - inverse[col].astype('float64')) / total_mb * 100).clip(0, 100)
+    result['Samples'] = inverse['Samples']
+    return result
@@ -0,0 +1,56 @@
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+pytest.importorskip("streamlit")
+pytest.importorskip("pyarrow")
+
+from archive import compact_logs  # noqa: E402
+from data_loader import merge_file_results, process_single_file  # noqa: E402
+
+HEADER = '"(PDH-CSV 4.0) (Korea Standard Time)(-540)","\\\\HOST\\Processor(_Total)\\% Processor Time"\n'
+
+
+def _write_closed_log(log_dir, name, start, periods, bad_rows=0):
+    """A 1s logman CSV last modified 40 days ago, with `bad_rows` unreadable timestamps."""
+    timestamps = pd.date_range(start, periods=periods, freq='s')
+    lines = [f'"{t:%m/%d/%Y %H:%M:%S}.000","{v}"' for t, v in zip(timestamps, np.arange(periods) % 7)]
+    lines[5:5] = ['"garbage","1"'] * bad_rows
+    path = log_dir / name
+    path.write_text(HEADER + '\n'.join(lines) + '\n')
+    mtime = time.time() - 40 * 86400
+    os.utime(path, (mtime, mtime))
+
+
+def _compact(log_dir):
+    return compact_logs(str(log_dir), downsample_after_days=30, downsample_interval='1min', now=time.time())
+
+
+def test_existing_rows_are_not_averaged_again(tmp_path):
+    _write_closed_log(tmp_path, 'Global_Usage_20260206_1000.csv', '2026-02-06 10:00:00', 45)
+    _compact(tmp_path)
+    archive = tmp_path / 'Global_Usage_2026-02.archive.parquet'
+    first = pd.read_parquet(archive)
+
+    _write_closed_log(tmp_path, 'Global_Usage_20260206_1001.csv', '2026-02-06 10:00:30', 60)
+    _compact(tmp_path)
+    second = pd.read_parquet(archive)
+
+    # The 10:00 bucket written by the first run is kept as-is; the second run adds its own rows
+    assert second['CPU(%)'].iloc[0] == first['CPU(%)'].iloc[0]
+    assert len(second) == len(first) + 2
+
+
+def test_timestamp_failures_are_kept_with_the_archive(tmp_path):
+    _write_closed_log(tmp_path, 'Global_Usage_20260206_1000.csv', '2026-02-06 10:00:00', 60, bad_rows=3)
+    _compact(tmp_path)
+
+    merged = merge_file_results([process_single_file(str(tmp_path / 'Global_Usage_2026-02.archive.parquet'))])
+    (fname, _, failed, _, examples), = merged.attrs['timestamp_failures']
+    assert (fname, failed, examples) == ('Global_Usage_20260206_1000.csv', 3, ('garbage',) * 3)
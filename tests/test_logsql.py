@@ -0,0 +1,41 @@
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+duckdb = pytest.importorskip("duckdb")
+
+from logsql import open_log_store, run_query  # noqa: E402
+
+
+@pytest.fixture
+def store(tmp_path):
+    archive = tmp_path / "Global_Usage_2026-02.archive.parquet"
+    pd.DataFrame({
+        'Timestamp': pd.date_range('2026-02-06 11:51:16', periods=3, freq='s'),
+        'CPU(%)': [10.0, 20.0, 30.0],
+    }).to_parquet(archive, index=False)
+    con = open_log_store([str(archive)], current_df=pd.DataFrame({'x': [1]}))
+    yield con
+    con.close()
+
+
+def test_store_views_are_queryable(store):
+    result, truncated = run_query(store, 'SELECT max("CPU(%)") AS peak FROM logman')
+    assert result['peak'].iloc[0] == 30.0
+    assert not truncated
+
+
+def test_read_text_is_rejected(store, tmp_path):
+    secret = tmp_path / "secret.txt"
+    secret.write_text("not part of the log store")
+    with pytest.raises(duckdb.Error):
+        run_query(store, f"SELECT * FROM read_text('{secret.as_posix()}')")
+
+
+def test_sandbox_cannot_be_reenabled(store):
+    with pytest.raises(duckdb.Error):
+        store.execute("SET enable_external_access = true")
@@ -0,0 +1,46 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from parsers import extract_process_time_series  # noqa: E402
+from trends import fit_process_trends  # noqa: E402
+
+
+def _process_samples(periods=120):
+    """Monitor.ps1-style Top5 strings every 30s, with leaky.exe growing 2MB per sample."""
+    return pd.DataFrame({
+        'Timestamp': pd.date_range('2026-02-06 00:00:00', periods=periods, freq='30s'),
+        'Top5_Memory_MB': [f"leaky.exe:{100 + 2 * i}MB | steady.exe:{50 + i % 2}MB" for i in range(periods)],
+    })
+
+
+def _expand_to_seconds(samples):
+    """Repeats each sample on the 1s rows it covers, as the as-of join onto the logman timeline does."""
+    seconds = pd.DataFrame({'Timestamp': pd.date_range(samples['Timestamp'].iloc[0],
+                                                       samples['Timestamp'].iloc[-1] + pd.Timedelta('29s'),
+                                                       freq='s')})
+    expanded = pd.merge_asof(seconds, samples, on='Timestamp', direction='backward')
+    expanded['Top5_Memory_MB'] = expanded['Top5_Memory_MB'].astype('category')
+    return expanded
+
+
+def test_expanded_series_reports_raw_sample_count():
+    samples = _process_samples()
+    raw = fit_process_trends(extract_process_time_series(samples, 'Top5_Memory_MB')).set_index('Process')
+    expanded = fit_process_trends(
+        extract_process_time_series(_expand_to_seconds(samples), 'Top5_Memory_MB')).set_index('Process')
+
+    assert raw.loc['leaky.exe', 'Samples'] == len(samples)
+    assert expanded.loc['leaky.exe', 'Samples'] == raw.loc['leaky.exe', 'Samples']
+    assert np.isclose(expanded.loc['leaky.exe', 'Slope(MB/h)'], raw.loc['leaky.exe', 'Slope(MB/h)'])
+
+
+def test_expanded_series_keeps_sample_timestamps():
+    samples = _process_samples(periods=12)
+    ts_df = extract_process_time_series(_expand_to_seconds(samples), 'Top5_Memory_MB')
+    leaky = ts_df[ts_df['Process'] == 'leaky.exe']
+    assert leaky['Timestamp'].tolist() == samples['Timestamp'].tolist()
@@ -0,0 +1,291 @@
+# timeline.py
+"""
+Implicit timestamps for fixed-interval series (logman `-si`).
+
+A regular series is described by a segment table with one row per gap-free run:
+    (Start ns, Interval ns, Offset, Rows)  ->  row Offset + k is at Start + k * Interval
+Intervals are whole milliseconds (the loggers' resolution). A table that reproduces every logged
+timestamp exactly is attached as SEGMENTS_ATTR: time-range slicing and time bucketing become index
+arithmetic on it, and the parquet cache stores it in the file metadata instead of a Timestamp
+column. A jittered run (e.g. 17.213, 18.221, ...) keeps its logged Timestamp column; its table is
+only kept as APPROX_SEGMENTS_ATTR / parquet metadata for display (gaps, interval) and never
+replaces a logged value.
+"""
+import json
+
+import numpy as np
+import pandas as pd
+
+SEGMENTS_ATTR = 'segments'
+APPROX_SEGMENTS_ATTR = 'approx_segments'
+SEGMENT_COLUMNS = ['Start', 'Interval', 'Offset', 'Rows']
+# A sample may sit at most this fraction of the interval away from its implicit timestamp
+MAX_JITTER = 0.1
+# Steps longer/shorter than this factor of the median step start a new segment (gap / restart)
+GAP_FACTOR = 1.5
+TIMESTAMP_RESOLUTION_NS = 1_000_000  # logman / Monitor.ps1 write milliseconds at most
+_PARQUET_KEY = b'pcm_segments_exact'
+_APPROX_PARQUET_KEY = b'pcm_segments_approx'
+# Caches written before the exactness check: Timestamps were snapped onto the table
+_LEGACY_PARQUET_KEY = b'pcm_segments'
+
+
+def detect_segments(timestamps, max_jitter=MAX_JITTER):
+    """
+    Splits a sorted timestamp array into fixed-stride segments.
+    Returns the segment table as a tuple of (start, interval, offset, rows) int tuples
+    (hashable, so it can live in DataFrame.attrs), or None when the series is not regular.
+    """
+    ts = np.asarray(timestamps, dtype='datetime64[ns]')
+    n = len(ts)
+    if n < 2 or np.isnat(ts).any():
+        return None
+    ts = ts.view('i8')
+    steps = np.diff(ts)
+    if (steps <= 0).any():
+        return None
+
+    step = max(TIMESTAMP_RESOLUTION_NS, _round_resolution(np.median(steps)))
+    breaks = np.flatnonzero((steps > step * GAP_FACTOR) | (steps < step / GAP_FACTOR)) + 1
+    bounds = np.concatenate([[0], breaks, [n]])
+    pending = list(zip(bounds[:-1].tolist(), bounds[1:].tolist()))[::-1]
+    max_segments = max(16, n // 100)
+
+    segments = []
+    while pending:
+        lo, hi = pending.pop()
+        rows = hi - lo
+        if rows == 1:
+            segments.append((int(ts[lo]), step, lo, 1))
+            continue
+        interval = max(TIMESTAMP_RESOLUTION_NS, _round_resolution((ts[hi - 1] - ts[lo]) / (rows - 1)))
+        residual = np.abs(ts[lo:hi] - (ts[lo] + np.arange(rows, dtype=np.int64) * interval))
+        worst = int(residual.argmax())
+        if residual[worst] <= max_jitter * interval:
+            segments.append((int(ts[lo]), interval, lo, rows))
+            continue
+        # Clock drift / stall inside the run: split at the worst sample and refit both halves
+        pending.append((lo + worst, hi))
+        pending.append((lo, lo + worst))
+        if len(segments) + len(pending) > max_segments:
+            return None
+    return tuple(segments)
+
+
+def _round_resolution(ns):
+    return int(round(ns / TIMESTAMP_RESOLUTION_NS)) * TIMESTAMP_RESOLUTION_NS
+
+
+def segments_exact(timestamps, segments):
+    """True when the segment table reproduces every timestamp exactly (zero residual)."""
+    ts = np.asarray(timestamps, dtype='datetime64[ns]')
+    implicit = implicit_timestamps(segments)
+    return len(implicit) == len(ts) and bool((implicit == ts).all())
+
+
+def attach_segments(df):
+    """
+    Detects the segment table of `df`'s (sorted) Timestamp column and attaches it in place:
+    as SEGMENTS_ATTR when it is exact, else as APPROX_SEGMENTS_ATTR. Timestamps are never changed.
+    """
+    df.attrs.pop(SEGMENTS_ATTR, None)
+    df.attrs.pop(APPROX_SEGMENTS_ATTR, None)
+    segments = detect_segments(df['Timestamp'])
+    if segments is not None:
+        exact = segments_exact(df['Timestamp'], segments)
+        df.attrs[SEGMENTS_ATTR if exact else APPROX_SEGMENTS_ATTR] = segments
+    return df
+
+
+def display_segments(df):
+    """Segment table for display: the exact one, else the approximate one (still cut to `df`'s span)."""
+    segments = segments_of(df)
+    if segments is not None:
+        return segments
+    return df.attrs.get(APPROX_SEGMENTS_ATTR) if df is not None else None
+
+
+def _segment_array(segments):
+    return np.asarray(segments, dtype=np.int64).reshape(-1, 4)
+
+
+def implicit_timestamps(segments):
+    """Rebuilds the datetime64[ns] column described by a segment table."""
+    seg = _segment_array(segments)
+    rows = seg[:, 3]
+    k = np.arange(rows.sum(), dtype=np.int64) - np.repeat(seg[:, 2], rows)
+    return (np.repeat(seg[:, 0], rows) + k * np.repeat(seg[:, 1], rows)).view('datetime64[ns]')
+
+
+def segment_span(segments):
+    """(first timestamp, last timestamp, rows) without materialising the column."""
+    seg = _segment_array(segments)
+    last = seg[-1]
+    return (pd.Timestamp(int(seg[0, 0])), pd.Timestamp(int(last[0] + (last[3] - 1) * last[1])), int(seg[:, 3].sum()))
+
+
+def segments_of(df):
+    """
+    Returns the segment table attached to `df` if it still describes its rows, else None.
+    attrs survive filtering, so the row count and both end timestamps are re-checked (O(1)).
+    """
+    segments = df.attrs.get(SEGMENTS_ATTR) if df is not None else None
+    if not segments or 'Timestamp' not in df.columns:
+        return None
+    first, last, rows = segment_span(segments)
+    if rows != len(df):
+        return None
+    ts = df['Timestamp']
+    if ts.iloc[0] != first or ts.iloc[-1] != last:
+        return None
+    return segments
+
+
+def segments_to_frame(segments):
+    """Readable segment table (one row per gap-free run) for display."""
+    seg = _segment_array(segments)
+    starts = seg[:, 0].view('datetime64[ns]')
+    return pd.DataFrame({
+        'Start': starts,
+        'End': starts + ((seg[:, 3] - 1) * seg[:, 1]).astype('timedelta64[ns]'),
+        'Interval(s)': seg[:, 1] / 1e9,
+        'Rows': seg[:, 3],
+    })
+
+
+def _slice_segments(segments, start_ns, end_ns):
+    seg = _segment_array(segments)
+    s, interval, offset, rows = seg.T
+    # First row >= start (ceil) and one past the last row <= end (floor + 1), per segment
+    lo = np.clip(-((s - start_ns) // interval), 0, rows)
+    hi = np.clip((end_ns - s) // interval + 1, 0, rows)
+    keep = hi > lo
+    lo, hi = lo[keep], hi[keep]
+    s, interval, offset = s[keep], interval[keep], offset[keep]
+    new_rows = hi - lo
+    new_offset = np.concatenate([[0], np.cumsum(new_rows)[:-1]]).astype(np.int64)
+    ranges = list(zip((offset + lo).tolist(), (offset + hi).tolist()))
+    sliced = tuple(zip((s + lo * interval).tolist(), interval.tolist(), new_offset.tolist(), new_rows.tolist()))
+    return ranges, sliced
+
+
+def time_slice(df, start=None, end=None):
+    """
+    Rows with start <= Timestamp <= end. Regular series are cut by index arithmetic on the
+    segment table (a single gap-free run returns a view); others fall back to a boolean mask.
+    """
+    segments = segments_of(df)
+    if segments is None:
+        mask = pd.Series(True, index=df.index)
+        if start is not None:
+            mask &= df['Timestamp'] >= pd.Timestamp(start)
+        if end is not None:
+            mask &= df['Timestamp'] <= pd.Timestamp(end)
+        out = df[mask]
+        approx = df.attrs.get(APPROX_SEGMENTS_ATTR)
+        if approx:
+            start_ns = pd.Timestamp(start).value if start is not None else np.iinfo(np.int64).min // 2
+            end_ns = pd.Timestamp(end).value if end is not None else np.iinfo(np.int64).max // 2
+            out.attrs[APPROX_SEGMENTS_ATTR] = _slice_segments(approx, start_ns, end_ns)[1] or None
+        return out
+
+    start_ns = pd.Timestamp(start).value if start is not None else np.iinfo(np.int64).min // 2
+    end_ns = pd.Timestamp(end).value if end is not None else np.iinfo(np.int64).max // 2
+    ranges, sliced = _slice_segments(segments, start_ns, end_ns)
+    if len(ranges) <= 1:
+        lo, hi = ranges[0] if ranges else (0, 0)
+        out = df.iloc[lo:hi]
+    else:
+        out = df.iloc[np.concatenate([np.arange(lo, hi) for lo, hi in ranges])]
+    out.attrs[SEGMENTS_ATTR] = sliced if sliced else None
+    return out
+
+
+def time_buckets(df, freq):
+    """
+    (codes, bucket starts) for flooring every row's Timestamp to a fixed `freq`, or None when
+    `df` has no valid segment table. Rows are in time order, so buckets come from change points
+    instead of hashing every timestamp.
+    """
+    segments = segments_of(df)
+    if segments is None:
+        return None
+    freq_ns = pd.Timedelta(freq).value
+    bucket = implicit_timestamps(segments).view('i8') // freq_ns
+    change = np.flatnonzero(np.diff(bucket)) + 1
+    codes = np.zeros(len(bucket), dtype=np.int64)
+    codes[change] = 1
+    codes = np.cumsum(codes)
+    starts = np.concatenate([[0], change])
+    return codes, (bucket[starts] * freq_ns).view('datetime64[ns]')
+
+
+def write_parquet(df, path, compression='snappy', metadata=None):
+    """
+    Writes `df` to parquet. A series with an exact segment table is stored without its Timestamp
+    column: the table goes into the file metadata and `read_parquet` rebuilds the column from it.
+    An approximate table is only stored as metadata next to the logged Timestamp column.
+    `metadata` ({bytes: bytes}) is added to the file's schema metadata.
+    """
+    segments = segments_of(df)
+    approx = df.attrs.get(APPROX_SEGMENTS_ATTR) if segments is None else None
+    if segments is None and not approx and not metadata:
+        df.to_parquet(path, index=False, compression=compression)
+        return
+
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    table = pa.Table.from_pandas(df if segments is None else df.drop(columns=['Timestamp']), preserve_index=False)
+    file_metadata = dict(table.schema.metadata or {})
+    file_metadata.update(metadata or {})
+    if segments is not None:
+        file_metadata[_PARQUET_KEY] = json.dumps(segments).encode('utf-8')
+    elif approx:
+        file_metadata[_APPROX_PARQUET_KEY] = json.dumps(approx).encode('utf-8')
+    pq.write_table(table.replace_schema_metadata(file_metadata), path, compression=compression)
+
+
+def read_parquet_segments(path):
+    """Segment table stored by `write_parquet`, or None for a parquet with a Timestamp column."""
+    import pyarrow.parquet as pq
+
+    metadata = pq.read_schema(path).metadata or {}
+    return _metadata_segments(metadata, _PARQUET_KEY) or _metadata_segments(metadata, _LEGACY_PARQUET_KEY)
+
+
+def _metadata_segments(metadata, key):
+    if key not in metadata:
+        return None
+    return tuple(tuple(int(v) for v in seg) for seg in json.loads(metadata[key]))
+
+
+def is_legacy_segment_cache(path):
+    """
+    True for a parquet written before the exactness check (its Timestamps were snapped onto an
+    end-to-end fit). Caches of a CSV should be rebuilt; archives have no other copy and stay readable.
+    """
+    import pyarrow.parquet as pq
+
+    metadata = pq.read_schema(path).metadata or {}
+    return _LEGACY_PARQUET_KEY in metadata
+
+
+def read_parquet(path, columns=None):
+    """Counterpart of `write_parquet`; returns a frame with a Timestamp column either way."""
+    segments = read_parquet_segments(path)
+    if segments is None:
+        import pyarrow.parquet as pq
+
+        df = pd.read_parquet(path, columns=columns)
+        approx = _metadata_segments(pq.read_schema(path).metadata or {}, _APPROX_PARQUET_KEY)
+        if approx:
+            df.attrs[APPROX_SEGMENTS_ATTR] = approx
+        return df
+
+    stored = None if columns is None else [c for c in columns if c != 'Timestamp']
+    df = pd.read_parquet(path, columns=stored)
+    if columns is None or 'Timestamp' in columns:
+        df.insert(0, 'Timestamp', implicit_timestamps(segments))
+    df.attrs[SEGMENTS_ATTR] = segments
+    return df
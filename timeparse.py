@@ -0,0 +1,272 @@
+# timeparse.py
+"""
+Timestamp parsing with per-file format detection.
+
+The format of a file's Timestamp column is detected once from a sample spread over the whole
+column and cached by header signature (column names + the digit/separator shape of the first value), so every file
+from the same collector and locale reuses the decision. Parsing then uses one fixed format:
+known fixed-width layouts go through a NumPy digit parser, other formats through
+`pd.to_datetime(format=...)`. Nothing is inferred per row.
+
+Day-first and month-first layouts (dd/mm vs mm/dd) tie on any sample whose days are all <= 12;
+the earlier (month-first) candidate is then only provisional: when rows fail to parse, the
+day-first counterpart is tried on them and kept if it parses more of the column.
+
+Rows that do not match the format are not silently turned into NaT: `parse_timestamps` returns
+them (row number + raw text) so the loader can drop and report them.
+"""
+import json
+import re
+import threading
+
+import numpy as np
+import pandas as pd
+
+# Candidates in detection order; the first one parsing the most sample values wins
+TIMESTAMP_FORMATS = (
+    '%m/%d/%Y %H:%M:%S.%f',   # logman PDH-CSV (en-US)
+    '%Y-%m-%d %H:%M:%S',      # Monitor.ps1 Get-Date "yyyy-MM-dd HH:mm:ss"
+    '%Y-%m-%d %H:%M:%S.%f',
+    '%Y-%m-%dT%H:%M:%S',
+    '%Y-%m-%dT%H:%M:%S.%f',
+    '%m/%d/%Y %H:%M:%S',
+    '%d/%m/%Y %H:%M:%S.%f',
+    '%d/%m/%Y %H:%M:%S',
+    '%d.%m.%Y %H:%M:%S',
+    '%Y/%m/%d %H:%M:%S',
+    '%Y.%m.%d %H:%M:%S',
+    '%m/%d/%Y %I:%M:%S %p',
+)
+
+# Formats that differ only in day/month order, both directions
+_DAY_MONTH_SWAPS = {
+    '%m/%d/%Y %H:%M:%S.%f': '%d/%m/%Y %H:%M:%S.%f',
+    '%m/%d/%Y %H:%M:%S': '%d/%m/%Y %H:%M:%S',
+}
+_DAY_MONTH_SWAPS.update({v: k for k, v in _DAY_MONTH_SWAPS.items()})
+
+# Fixed-width layouts: total width, (start, length) of each field, separator positions
+_FIXED_LAYOUTS = {
+    '%m/%d/%Y %H:%M:%S.%f': (23, {'month': (0, 2), 'day': (3, 2), 'year': (6, 4), 'hour': (11, 2),
+                                  'minute': (14, 2), 'second': (17, 2), 'frac': (20, 3)},
+                             {2: '/', 5: '/', 10: ' ', 13: ':', 16: ':', 19: '.'}),
+    '%Y-%m-%d %H:%M:%S': (19, {'year': (0, 4), 'month': (5, 2), 'day': (8, 2), 'hour': (11, 2),
+                               'minute': (14, 2), 'second': (17, 2)},
+                          {4: '-', 7: '-', 10: ' ', 13: ':', 16: ':'}),
+}
+
+_MONTH_DAYS = np.array([31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31], dtype=np.int64)
+
+SAMPLE_SIZE = 200
+# A detected format must parse at least this share of the sample
+MIN_SAMPLE_MATCH = 0.5
+MAX_FAILURE_EXAMPLES = 5
+REPORT_ATTR = 'timestamp_report'        # per-file summary (process_single_file)
+FAILURES_ATTR = 'timestamp_failures'     # tuple of per-file summaries on the merged frame
+_PARQUET_KEY = b'pcm_timestamp_report'
+_FAILURES_PARQUET_KEY = b'pcm_timestamp_failures'
+
+_lock = threading.Lock()
+_format_cache = {}  # header signature -> format
+
+
+def value_shape(value):
+    """Digit/separator shape of a timestamp string: '02/06/2026 11:51:16.208' -> 'dd/dd/dddd dd:dd:dd.ddd'."""
+    return re.sub(r'\d', 'd', str(value).strip())
+
+
+def spread_sample(values, size=SAMPLE_SIZE):
+    """Up to `size` values evenly strided over `values`, first and last included (not just the head)."""
+    if len(values) <= size:
+        return values
+    return values[np.linspace(0, len(values) - 1, size).astype(np.int64)]
+
+
+def header_signature(columns, sample):
+    first = next((v for v in sample if isinstance(v, str) and v.strip()), '')
+    return (tuple(str(c) for c in columns), value_shape(first))
+
+
+def detect_format(sample, formats=TIMESTAMP_FORMATS):
+    """Format parsing the most of `sample` (ties -> earlier candidate), or None if none fits."""
+    sample = pd.Series(sample, dtype=object).dropna().astype(str).str.strip()
+    sample = sample[sample != '']
+    if sample.empty:
+        return None
+    best, best_hits = None, 0
+    for fmt in formats:
+        hits = int(pd.to_datetime(sample, format=fmt, errors='coerce').notna().sum())
+        if hits > best_hits:
+            best, best_hits = fmt, hits
+            if hits == len(sample):
+                break
+    return best if best_hits >= MIN_SAMPLE_MATCH * len(sample) else None
+
+
+def _days_from_civil(year, month, day):
+    """Days since 1970-01-01 for proleptic Gregorian dates (integer arrays)."""
+    y = year - (month <= 2)
+    era = y // 400
+    yoe = y - era * 400
+    doy = (153 * (month + np.where(month > 2, -3, 9)) + 2) // 5 + day - 1
+    return era * 146097 + yoe * 365 + yoe // 4 - yoe // 100 + doy - 719468
+
+
+def _parse_fixed_width(values, layout):
+    """
+    NumPy digit parser for one fixed-width layout. Returns (datetime64[ns] array, ok mask);
+    rows with a different width, a non-digit or an out-of-range field are left to the caller.
+    """
+    width, fields, separators = layout
+    try:
+        raw = np.asarray(values, dtype=f'S{width + 1}')
+    except (UnicodeEncodeError, ValueError):
+        return None
+    buf = raw.view(np.uint8).reshape(len(raw), width + 1)
+    # Exactly `width` characters: the extra byte must be padding
+    ok = (buf[:, width - 1] != 0) & (buf[:, width] == 0)
+    for pos, char in separators.items():
+        ok &= buf[:, pos] == ord(char)
+
+    digit_pos = [p for start, length in fields.values() for p in range(start, start + length)]
+    ok &= (buf[:, digit_pos] - ord('0') <= 9).all(axis=1)  # uint8 wrap-around rejects bytes below '0'
+    digits = buf[:, :width].astype(np.int64) - ord('0')
+    parts = {
+        name: digits[:, start:start + length] @ (10 ** np.arange(length - 1, -1, -1, dtype=np.int64))
+        for name, (start, length) in fields.items()
+    }
+
+    year, month, day = parts['year'], parts['month'], parts['day']
+    leap = (year % 4 == 0) & ((year % 100 != 0) | (year % 400 == 0))
+    month_days = _MONTH_DAYS[np.clip(month, 1, 12) - 1] + ((month == 2) & leap)
+    ok &= (month >= 1) & (month <= 12) & (day >= 1) & (day <= month_days)
+    ok &= (parts['hour'] < 24) & (parts['minute'] < 60) & (parts['second'] < 60)
+
+    seconds = _days_from_civil(year, month, day) * 86400 + (parts['hour'] * 60 + parts['minute']) * 60 + parts['second']
+    ns = seconds * 1_000_000_000
+    if 'frac' in parts:
+        ns += parts['frac'] * 10 ** (9 - fields['frac'][1])
+    out = np.where(ok, ns, np.iinfo(np.int64).min).view('datetime64[ns]')
+    return out, ok
+
+
+def _parse_with_format(values, fmt):
+    """(datetime64[ns] array, ok mask) for `values` in exactly `fmt`."""
+    out = np.full(len(values), np.datetime64('NaT'), dtype='datetime64[ns]')
+    ok = np.zeros(len(values), dtype=bool)
+    pending = np.ones(len(values), dtype=bool)
+
+    layout = _FIXED_LAYOUTS.get(fmt)
+    if layout is not None:
+        fixed = _parse_fixed_width(values, layout)
+        if fixed is not None:
+            out, ok = fixed
+            pending = ~ok
+    if pending.any():
+        # Off-layout rows (e.g. "16.2" instead of "16.208") still get the same format, just parsed by pandas
+        parsed = pd.to_datetime(pd.Series(values[pending], dtype=object), format=fmt, errors='coerce')
+        out[pending] = parsed.to_numpy(dtype='datetime64[ns]')
+        ok[pending] = parsed.notna().to_numpy()
+    return out, ok
+
+
+def parse_timestamps(column, columns=None):
+    """
+    Parses a Timestamp column with the format detected for its header signature.
+    Returns (datetime64[ns] Series aligned with `column`, report) where report is None when every
+    non-empty value parsed, else a dict: format, rows, failed, failed_rows, examples.
+    """
+    if pd.api.types.is_datetime64_any_dtype(column):
+        # Already typed by the CSV reader (pyarrow recognises ISO timestamps)
+        parsed = pd.Series(column.to_numpy(dtype='datetime64[ns]'), index=column.index, name=column.name)
+        return parsed, None
+
+    text = pd.Series(column.to_numpy(dtype=object), dtype=object)
+    present = text.notna()
+    text[present] = text[present].astype(str).str.strip()
+    values = text.to_numpy()
+    blank = ~present.to_numpy() | (text == '').to_numpy()
+
+    sample_values = spread_sample(values[~blank])
+    signature = header_signature(columns if columns is not None else [column.name], sample_values)
+    with _lock:
+        fmt = _format_cache.get(signature)
+    if fmt is None:
+        fmt = detect_format(sample_values)
+
+    out = np.full(len(values), np.datetime64('NaT'), dtype='datetime64[ns]')
+    ok = np.zeros(len(values), dtype=bool)
+    if fmt is not None and (~blank).any():
+        out[~blank], ok[~blank] = _parse_with_format(values[~blank], fmt)
+        if ok[~blank].mean() < MIN_SAMPLE_MATCH:
+            # Cached decision does not fit this file (same shape, other locale): detect again
+            redetected = detect_format(sample_values)
+            if redetected is not None and redetected != fmt:
+                fmt = redetected
+                out[~blank], ok[~blank] = _parse_with_format(values[~blank], fmt)
+        swapped = _DAY_MONTH_SWAPS.get(fmt)
+        if swapped is not None and (~ok & ~blank).any():
+            # dd/mm vs mm/dd is ambiguous until a day > 12 appears: let the failing rows decide
+            failing = values[~ok & ~blank]
+            if _parse_with_format(failing, swapped)[1].any():
+                alt_out, alt_ok = _parse_with_format(values[~blank], swapped)
+                if alt_ok.sum() > ok[~blank].sum():
+                    fmt = swapped
+                    out[~blank], ok[~blank] = alt_out, alt_ok
+        with _lock:
+            _format_cache[signature] = fmt
+
+    failed = ~ok & ~blank
+    report = None
+    if failed.any():
+        failed_rows = np.flatnonzero(failed)
+        report = {
+            'format': fmt,
+            'rows': int(len(values)),
+            'failed': int(len(failed_rows)),
+            'failed_rows': failed_rows.tolist(),
+            'examples': [str(values[i]) for i in failed_rows[:MAX_FAILURE_EXAMPLES]],
+        }
+    return pd.Series(out, index=column.index, name=column.name), report
+
+
+def describe_report(fname, report):
+    """Hashable one-line summary kept in DataFrame.attrs (file, format, failed, rows, examples)."""
+    return (fname, report['format'] or 'unknown', report['failed'], report['rows'], tuple(report['examples']))
+
+
+def report_metadata(summary):
+    """Parquet metadata entry preserving a file's summary across cache loads."""
+    return {_PARQUET_KEY: json.dumps(list(summary)).encode('utf-8')} if summary else {}
+
+
+def read_report_metadata(path):
+    """Summary stored by `report_metadata`, or None."""
+    import pyarrow.parquet as pq
+
+    metadata = pq.read_schema(path).metadata or {}
+    if _PARQUET_KEY not in metadata:
+        return None
+    fname, fmt, failed, rows, examples = json.loads(metadata[_PARQUET_KEY])
+    return (fname, fmt, failed, rows, tuple(examples))
+
+
+def failures_metadata(failures):
+    """Parquet metadata entry for the summaries of several files (monthly archives)."""
+    return {_FAILURES_PARQUET_KEY: json.dumps([list(s) for s in failures]).encode('utf-8')} if failures else {}
+
+
+def read_failures_metadata(path):
+    """Summaries stored by `failures_metadata`, or an empty tuple."""
+    import pyarrow.parquet as pq
+
+    metadata = pq.read_schema(path).metadata or {}
+    if _FAILURES_PARQUET_KEY not in metadata:
+        return ()
+    return tuple((fname, fmt, failed, rows, tuple(examples))
+                 for fname, fmt, failed, rows, examples in json.loads(metadata[_FAILURES_PARQUET_KEY]))
+
+
+def clear_format_cache():
+    with _lock:
+        _format_cache.clear()
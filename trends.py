@@ -0,0 +1,78 @@
+# trends.py
+import numpy as np
+import pandas as pd
+
+TREND_COLUMNS = ['Process', 'Slope(MB/h)', 'R2', 'Samples', 'Span(h)', 'Start(MB)', 'End(MB)', 'Growth(MB)']
+
+
+def fit_process_trends(ts_df, min_samples=10, min_span_hours=0.5):
+    """
+    Fits value = a + b * hours for every process at once using grouped least squares.
+    Input is the long format from `extract_process_time_series` (Timestamp, Process, Value).
+    All per-process sums come from a single np.bincount pass over dictionary-encoded names,
+    so cost is O(rows) regardless of how many distinct processes there are.
+    """
+    if ts_df is None or ts_df.empty:
+        return pd.DataFrame(columns=TREND_COLUMNS)
+
+    data = ts_df.dropna(subset=['Timestamp', 'Value'])
+    codes, names = pd.factorize(data['Process'], sort=False)
+    n_groups = len(names)
+    if n_groups == 0:
+        return pd.DataFrame(columns=TREND_COLUMNS)
+
+    ts = data['Timestamp'].to_numpy(dtype='datetime64[ns]').view('i8')
+    y = data['Value'].to_numpy(dtype='float64')
+
+    # Hours relative to the per-process first sample keeps x small and the sums well-conditioned
+    t_first = np.full(n_groups, np.iinfo(np.int64).max, dtype=np.int64)
+    t_last = np.full(n_groups, np.iinfo(np.int64).min, dtype=np.int64)
+    np.minimum.at(t_first, codes, ts)
+    np.maximum.at(t_last, codes, ts)
+    x = (ts - t_first[codes]) / 3.6e12
+
+    n = np.bincount(codes, minlength=n_groups).astype('float64')
+    sx = np.bincount(codes, weights=x, minlength=n_groups)
+    sy = np.bincount(codes, weights=y, minlength=n_groups)
+    sxx = np.bincount(codes, weights=x * x, minlength=n_groups)
+    sxy = np.bincount(codes, weights=x * y, minlength=n_groups)
+    syy = np.bincount(codes, weights=y * y, minlength=n_groups)
+
+    var_x = n * sxx - sx * sx
+    var_y = n * syy - sy * sy
+    cov_xy = n * sxy - sx * sy
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        slope = np.where(var_x > 0, cov_xy / var_x, np.nan)
+        intercept = (sy - slope * sx) / n
+        r2 = np.where((var_x > 0) & (var_y > 0), (cov_xy * cov_xy) / (var_x * var_y), np.nan)
+
+    span_h = (t_last - t_first) / 3.6e12
+    start_mb = intercept
+    end_mb = intercept + slope * span_h
+
+    result = pd.DataFrame({
+        'Process': names,
+        'Slope(MB/h)': slope,
+        'R2': r2,
+        'Samples': n.astype('int64'),
+        'Span(h)': span_h,
+        'Start(MB)': start_mb,
+        'End(MB)': end_mb,
+        'Growth(MB)': end_mb - start_mb,
+    })
+    result = result[(result['Samples'] >= min_samples) & (result['Span(h)'] >= min_span_hours)]
+    return result.reset_index(drop=True)
+
+
+def rank_leak_suspects(trends_df, min_r2=0.6, min_slope=1.0, top_n=20):
+    """
+    Ranks processes by sustained growth: positive slope with a good linear fit.
+    Score = slope * R2 so a noisy fit with a high slope does not outrank a steady ramp.
+    """
+    if trends_df is None or trends_df.empty:
+        return pd.DataFrame(columns=TREND_COLUMNS + ['Score'])
+
+    suspects = trends_df[(trends_df['Slope(MB/h)'] >= min_slope) & (trends_df['R2'] >= min_r2)].copy()
+    suspects['Score'] = suspects['Slope(MB/h)'] * suspects['R2']
+    return suspects.sort_values('Score', ascending=False).head(top_n).reset_index(drop=True)
@@ -0,0 +1,132 @@
+# uploads.py
+"""
+Content-addressed spooling of files uploaded through the sidebar.
+
+Each upload is written once to UPLOAD_CACHE_DIR as `<stem>.<content hash>.csv`, hashed and
+written straight from the UploadedFile's buffer (no bytes copy). From then on it is an ordinary
+local log: load_data gets a path (cheap for @st.cache_data to hash), process_single_file keeps a
+.parquet / .hist.parquet sidecar next to it, and the upload folder has its own manifest.
+Re-uploading the same content resolves to the existing file and its parquet cache.
+
+A spool's mtime is its last use (refreshed on re-upload or re-selection); `prune_uploads` drops
+spools idle for UPLOAD_RETENTION_DAYS and then the least recently used ones over UPLOAD_CACHE_MB.
+"""
+import hashlib
+import os
+import threading
+import time
+
+from config import UPLOAD_CACHE_DIR, UPLOAD_RETENTION_DAYS, UPLOAD_CACHE_MB
+
+_HASH_CHARS = 16
+
+_lock = threading.Lock()
+_spooled = {}  # (upload file_id, size) -> local path, so reruns skip re-hashing
+_SIDECAR_SUFFIXES = ('.parquet', '.hist.parquet')
+_TMP_MAX_AGE_S = 86400  # a .tmp this old is left over from a crashed write
+
+
+def content_hash(buffer):
+    """Hex digest of a bytes-like object (memoryview / bytes)."""
+    return hashlib.blake2b(buffer, digest_size=_HASH_CHARS // 2).hexdigest()
+
+
+def spooled_path(name, digest, cache_dir=UPLOAD_CACHE_DIR):
+    """Local path for an upload; keeps the original name so log type detection still works."""
+    stem, ext = os.path.splitext(os.path.basename(name))
+    return os.path.join(cache_dir, f"{stem}.{digest}{ext or '.csv'}")
+
+
+def spool_upload(uploaded, cache_dir=UPLOAD_CACHE_DIR):
+    """
+    Returns the local path holding `uploaded`'s content, writing it only if this content was
+    never seen before. The temp-file + rename keeps a half-written spool from being picked up.
+    """
+    # getbuffer() is a zero-copy view; released on exit so the BytesIO stays usable
+    with uploaded.getbuffer() as buffer:
+        key = (getattr(uploaded, 'file_id', None), buffer.nbytes)
+        with _lock:
+            path = _spooled.get(key) if key[0] is not None else None
+        if path and os.path.exists(path):
+            return path
+
+        path = spooled_path(uploaded.name, content_hash(buffer), cache_dir)
+        if os.path.exists(path) and os.path.getsize(path) == buffer.nbytes:
+            mark_used([path])
+        else:
+            os.makedirs(cache_dir, exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'wb') as fh:
+                fh.write(buffer)
+            os.replace(tmp_path, path)
+
+    if key[0] is not None:
+        with _lock:
+            _spooled[key] = path
+    return path
+
+
+def mark_used(paths):
+    """Refreshes the last-use time (mtime) of spooled uploads so pruning keeps them."""
+    for path in paths:
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+
+def prune_uploads(cache_dir=UPLOAD_CACHE_DIR, retention_days=UPLOAD_RETENTION_DAYS, max_mb=UPLOAD_CACHE_MB,
+                  keep=(), now=None):
+    """
+    Deletes spooled uploads (with their parquet sidecars) unused for `retention_days`, then the
+    least recently used ones until the folder fits in `max_mb`. Paths in `keep` (in use by this
+    run) are never deleted. Returns the deleted spool file names.
+    """
+    if not os.path.isdir(cache_dir):
+        return []
+    now = now or time.time()
+    keep = {os.path.abspath(p) for p in keep if isinstance(p, str)}
+    spools = []  # (last use, bytes incl. sidecars, path)
+    for entry in os.scandir(cache_dir):
+        if not entry.is_file():
+            continue
+        if entry.name.endswith('.tmp'):
+            if entry.stat().st_mtime < now - _TMP_MAX_AGE_S:
+                os.remove(entry.path)
+            continue
+        if not entry.name.endswith('.csv'):
+            continue
+        stem = os.path.splitext(entry.path)[0]
+        sidecars = [stem + s for s in _SIDECAR_SUFFIXES if os.path.exists(stem + s)]
+        size = entry.stat().st_size + sum(os.path.getsize(s) for s in sidecars)
+        spools.append((entry.stat().st_mtime, size, entry.path))
+
+    spools.sort()  # least recently used first
+    total = sum(size for _, size, _ in spools)
+    deleted = []
+    for mtime, size, path in spools:
+        expired = retention_days is not None and mtime < now - retention_days * 86400
+        over_cap = max_mb is not None and total > max_mb * 1024 ** 2
+        if not (expired or over_cap) or os.path.abspath(path) in keep:
+            continue
+        stem = os.path.splitext(path)[0]
+        for p in [path] + [stem + s for s in _SIDECAR_SUFFIXES]:
+            if os.path.exists(p):
+                os.remove(p)
+        with _lock:
+            for key in [k for k, v in _spooled.items() if v == path]:
+                del _spooled[key]
+        total -= size
+        deleted.append(os.path.basename(path))
+    return deleted
+
+
+def spool_uploads(uploaded_files, cache_dir=UPLOAD_CACHE_DIR):
+    """Local paths for a list of uploads; an upload that cannot be spooled is passed through as-is."""
+    paths = []
+    for uploaded in uploaded_files:
+        try:
+            paths.append(spool_upload(uploaded, cache_dir))
+        except OSError:
+            paths.append(uploaded)
+    return paths